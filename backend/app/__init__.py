@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
@@ -17,7 +18,7 @@ def create_app():
     
     # Register blueprints
     from .routes import auth_routes, transaction_routes, ai_routes, budget_routes, goal_routes, bank_routes, analytics_routes, search_routes
-    from .routes import export_routes
+    from .routes import export_routes, category_routes
     
     app.register_blueprint(export_routes.bp, url_prefix='/api/export')
     app.register_blueprint(analytics_routes.bp, url_prefix='/api/analytics')
@@ -28,6 +29,35 @@ def create_app():
     app.register_blueprint(goal_routes.bp, url_prefix='/api/goals')
     app.register_blueprint(bank_routes.bp, url_prefix='/api/banks')
     app.register_blueprint(search_routes.search_bp, url_prefix='/api/search')
+    app.register_blueprint(category_routes.bp, url_prefix='/api/categories')
+    
+    # Create missing indexes declared on the models (AUTO_APPLY_INDEXES=0 leaves it to manage_db.py)
+    if os.getenv('AUTO_APPLY_INDEXES', '1') != '0':
+        from .config.schema import apply_indexes_in_background
+        apply_indexes_in_background()
+    
+    # Keep this worker's compiled category rules in sync with the database
+    from .services.category_rules import get_rule_index
+    get_rule_index().start_watching()
+    
+    # Saved search snapshots go stale when this process edits or deletes transactions
+    from .services import saved_searches, rollups
+    saved_searches.watch_transaction_changes()
+    
+    # Monthly rollups follow every transaction write
+    rollups.watch_transaction_changes()
+    
+    # New transactions are scored as they are written; crossings become notifications
+    from .services import alert_stream
+    alert_stream.watch_transaction_changes()
+    
+    # Recurring payments extend their subscription or wait in a per-merchant buffer
+    from .services import subscriptions
+    subscriptions.watch_transaction_changes()
+    
+    # Background statement ingestion (INGESTION_WORKERS=0 leaves it to ingestion_worker.py)
+    from .services.ingestion import get_worker_pool
+    get_worker_pool().start()
     
     @app.route('/api/health')
     def health():
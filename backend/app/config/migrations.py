@@ -0,0 +1,157 @@
+from datetime import datetime
+from app.config.database import mongo
+
+# Registered data migrations, run in id order; each runs once per database
+MIGRATIONS = []
+
+
+def migration(migration_id, description):
+    """Register a data migration; the function returns a summary dict stored with its record"""
+    def register(func):
+        MIGRATIONS.append({'id': migration_id, 'description': description, 'run': func})
+        MIGRATIONS.sort(key=lambda m: m['id'])
+        return func
+    return register
+
+
+def applied_migrations():
+    return {m['_id']: m for m in mongo.db.schema_migrations.find()}
+
+
+def migration_status():
+    applied = applied_migrations()
+    return [
+        {
+            'id': m['id'],
+            'description': m['description'],
+            'applied_at': applied[m['id']]['applied_at'] if m['id'] in applied else None
+        }
+        for m in MIGRATIONS
+    ]
+
+
+def run_pending(only=None):
+    """Run migrations not yet recorded in schema_migrations; stops at the first failure"""
+    applied = applied_migrations()
+    results = []
+
+    for m in MIGRATIONS:
+        if m['id'] in applied or (only and m['id'] != only):
+            continue
+
+        print(f"🚚 Running migration {m['id']}: {m['description']}")
+        started = datetime.utcnow()
+        try:
+            summary = m['run']()
+        except Exception as e:
+            print(f"❌ Migration {m['id']} failed: {e}")
+            results.append({'id': m['id'], 'status': 'failed', 'error': str(e)})
+            break
+
+        mongo.db.schema_migrations.insert_one({
+            '_id': m['id'],
+            'description': m['description'],
+            'started_at': started,
+            'applied_at': datetime.utcnow(),
+            'summary': summary
+        })
+        results.append({'id': m['id'], 'status': 'applied', 'summary': summary})
+
+    return results
+
+
+@migration('0001_transaction_fingerprints', 'Fingerprint imported and pre-source transactions, converting their ISO string dates')
+def backfill_transaction_fingerprints():
+    from app.services.transaction_import import backfill_fingerprints
+    state = backfill_fingerprints()
+    state.pop('last_id', None)
+    return state
+
+
+@migration('0004_transaction_search_tokens', 'Index description tokens of existing transactions for search')
+def transaction_search_tokens():
+    from pymongo import UpdateOne
+    from app.models.transaction import Transaction
+    from app.services.text_search import tokenize
+
+    collection = Transaction.collection
+    last_id = None
+    updated = 0
+    while True:
+        query = {'search_tokens': {'$exists': False}}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        docs = list(collection.find(query, {'description': 1}).sort('_id', 1).limit(1000))
+        if not docs:
+            break
+        collection.bulk_write([
+            UpdateOne({'_id': doc['_id']}, {'$set': {'search_tokens': tokenize(doc.get('description'))}})
+            for doc in docs
+        ], ordered=False)
+        updated += len(docs)
+        last_id = docs[-1]['_id']
+    return {'updated': updated}
+
+
+@migration('0005_monthly_rollups', 'Build monthly income/expense rollups from existing transactions')
+def monthly_rollups():
+    from app.config.schema import apply_indexes
+    from app.models.monthly_rollup import MonthlyRollup
+    from app.models.rollup_state import RollupState
+    from app.services.rollups import rebuild_rollups
+
+    apply_indexes([MonthlyRollup, RollupState])
+    return rebuild_rollups()
+
+
+@migration('0006_alert_stats', 'Build running alert statistics from existing transactions')
+def alert_stats():
+    from app.config.schema import apply_indexes
+    from app.models.alert_stats import AlertStats
+    from app.models.notification import Notification
+    from app.services.alert_stream import rebuild_alert_stats
+
+    apply_indexes([AlertStats, Notification])
+    return rebuild_alert_stats()
+
+
+@migration('0007_subscriptions', 'Detect subscriptions and recurring bills in existing transactions')
+def subscriptions():
+    from app.config.schema import apply_indexes
+    from app.models.subscription import Subscription
+    from app.models.subscription_candidate import SubscriptionCandidate
+    from app.models.subscription_state import SubscriptionState
+    from app.services.subscriptions import rebuild_subscriptions
+
+    apply_indexes([Subscription, SubscriptionCandidate, SubscriptionState])
+    return rebuild_subscriptions()
+
+
+@migration('0008_transaction_dates', 'Convert transaction dates stored as ISO strings (manual entries) to real dates')
+def transaction_dates():
+    from pymongo import UpdateOne
+    from app.models.transaction import Transaction
+    from app.services.transaction_import import parse_transaction_date
+
+    collection = Transaction.collection
+    last_id = None
+    converted = 0
+    errors = 0
+    while True:
+        query = {'date': {'$type': 'string'}}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        docs = list(collection.find(query, {'date': 1}).sort('_id', 1).limit(1000))
+        if not docs:
+            break
+        operations = []
+        for doc in docs:
+            try:
+                operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {'date': parse_transaction_date(doc['date'])}}))
+            except Exception:
+                errors += 1
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+            converted += len(operations)
+        last_id = docs[-1]['_id']
+    return {'converted': converted, 'errors': errors}
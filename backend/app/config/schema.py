@@ -0,0 +1,201 @@
+import threading
+from datetime import datetime, timedelta
+from pymongo.errors import OperationFailure, PyMongoError
+
+
+def declared_models():
+    """Every model that declares indexes (imported lazily: models need an initialized db)"""
+    from app.models.transaction import Transaction
+    from app.models.statement_upload import StatementUpload
+    from app.models.user import User
+    from app.models.bank import Bank
+    from app.models.budget import Budget
+    from app.models.goal import Goal
+    from app.models.notification import Notification
+    from app.models.saved_search import SavedSearch
+    from app.models.category_rule import CategoryRule
+    from app.models.ingestion_job import IngestionJob
+    from app.models.monthly_rollup import MonthlyRollup
+    from app.models.rollup_state import RollupState
+    from app.models.alert_stats import AlertStats
+    from app.models.subscription import Subscription
+    from app.models.subscription_candidate import SubscriptionCandidate
+    from app.models.subscription_state import SubscriptionState
+    return [Transaction, StatementUpload, User, Bank, Budget, Goal, Notification,
+            SavedSearch, CategoryRule, IngestionJob, MonthlyRollup, RollupState, AlertStats,
+            Subscription, SubscriptionCandidate, SubscriptionState]
+
+
+def apply_indexes(models=None):
+    """Create any declared index that doesn't exist yet; returns one status row per index.
+
+    A failure on one index (typically a unique index over data that already
+    has duplicates) is reported and the rest still get created.
+    """
+    results = []
+    for model in models or declared_models():
+        collection = model.collection
+        existing = collection.index_information()
+
+        for index in getattr(model, 'indexes', []):
+            spec = index.document
+            row = {'collection': collection.name, 'name': spec['name'], 'keys': list(spec['key'].items())}
+
+            if spec['name'] in existing:
+                same_keys = list(existing[spec['name']]['key']) == row['keys']
+                row['status'] = 'exists' if same_keys else 'conflict'
+                if not same_keys:
+                    row['error'] = f"existing index has keys {existing[spec['name']]['key']}"
+            else:
+                try:
+                    collection.create_indexes([index])
+                    row['status'] = 'created'
+                except OperationFailure as e:
+                    row['status'] = 'failed'
+                    row['error'] = str(e)
+            results.append(row)
+    return results
+
+
+def apply_indexes_in_background():
+    """Apply indexes at startup without holding up the app if Mongo is slow or down"""
+    def run():
+        try:
+            results = apply_indexes()
+        except PyMongoError as e:
+            print(f"⚠️ Could not apply indexes: {e}")
+            return
+        created = [r for r in results if r['status'] == 'created']
+        problems = [r for r in results if r['status'] in ('failed', 'conflict')]
+        if created:
+            print(f"🗂️ Created {len(created)} indexes: {', '.join(r['collection'] + '.' + r['name'] for r in created)}")
+        for row in problems:
+            print(f"⚠️ Index {row['collection']}.{row['name']} {row['status']}: {row.get('error')}")
+
+    thread = threading.Thread(target=run, name='index-bootstrap', daemon=True)
+    thread.start()
+    return thread
+
+
+def query_shapes(sample):
+    """The hot queries the app issues, as (name, model, filter, sort) with sample values filled in"""
+    from app.models.transaction import Transaction
+    from app.models.statement_upload import StatementUpload
+    from app.models.user import User
+    from app.models.bank import Bank
+    from app.models.notification import Notification
+    from app.models.saved_search import SavedSearch
+    from app.models.category_rule import CategoryRule
+    from app.models.ingestion_job import IngestionJob
+    from app.models.monthly_rollup import MonthlyRollup
+    from app.models.rollup_state import RollupState
+    from app.models.alert_stats import AlertStats
+    from app.models.subscription import Subscription
+    from app.models.subscription_candidate import SubscriptionCandidate
+    from app.models.subscription_state import SubscriptionState
+
+    user_id = sample['user_id']
+    now = datetime.utcnow()
+    month_ago = now - timedelta(days=30)
+
+    return [
+        ('Transaction.find_by_user', Transaction, {'user_id': user_id}, [('date', -1)]),
+        ('Transaction.get_by_date_range', Transaction,
+         {'user_id': user_id, 'date': {'$gte': month_ago, '$lte': now}}, [('date', -1)]),
+        ('Transaction.get_analytics ($match)', Transaction, {'user_id': user_id}, None),
+        ('search: category filter', Transaction,
+         {'user_id': user_id, 'category': {'$in': [sample['category']]}}, [('date', -1), ('_id', -1)]),
+        ('search: type filter', Transaction, {'user_id': user_id, 'type': 'expense'}, [('date', -1), ('_id', -1)]),
+        ('search: amount sort', Transaction, {'user_id': user_id}, [('amount', -1), ('_id', -1)]),
+        ('search: description tokens', Transaction,
+         {'user_id': user_id, 'search_tokens': {'$in': ['swiggy', 'swiggyinstamart']}}, [('date', -1), ('_id', -1)]),
+        ('search: count_documents', Transaction, {'user_id': user_id, 'type': 'expense'}, None),
+        ('Transaction fingerprint upsert', Transaction,
+         {'user_id': user_id, 'fingerprint': 'sample'}, None),
+        ('StatementUpload.find_by_hash', StatementUpload,
+         {'user_id': user_id, 'file_hash': 'sample'}, None),
+        ('StatementUpload.find_by_user', StatementUpload, {'user_id': user_id}, [('uploaded_at', -1)]),
+        ('User.find_by_email', User, {'email': sample['email']}, None),
+        ('Bank.find_by_account', Bank, {'user_id': user_id, 'account_number': 'sample'}, None),
+        ('Notification.find_by_user', Notification, {'user_id': user_id, 'read': False}, [('created_at', -1)]),
+        ('Notification.find_alerts', Notification,
+         {'user_id': user_id, 'source': 'alerts', 'created_at': {'$gte': month_ago}}, [('created_at', -1)]),
+        ('SavedSearch.find_by_user', SavedSearch, {'user_id': user_id}, [('created_at', -1)]),
+        ('CategoryRule.find_by_scope', CategoryRule,
+         {'user_id': user_id, 'active': True}, [('priority', -1), ('created_at', 1)]),
+        ('MonthlyRollup.find_by_user', MonthlyRollup, {'user_id': user_id}, [('month', -1)]),
+        ('RollupState.is_built', RollupState, {'user_id': user_id}, None),
+        ('AlertStats.find_by_user', AlertStats, {'user_id': user_id}, None),
+        ('Subscription.find_by_user', Subscription, {'user_id': user_id}, [('next_expected', 1)]),
+        ('Subscription.find_by_user (upcoming)', Subscription,
+         {'user_id': user_id, 'next_expected': {'$gte': now, '$lte': now + timedelta(days=30)}}, [('next_expected', 1)]),
+        ('Subscription.find_by_keys', Subscription,
+         {'user_id': user_id, 'merchant_key': {'$in': ['netflix', 'airtel postpaid']}}, None),
+        ('SubscriptionCandidate.push', SubscriptionCandidate, {'user_id': user_id, 'merchant_key': 'netflix'}, None),
+        ('SubscriptionState.is_built', SubscriptionState, {'user_id': user_id}, None),
+        ('IngestionJob.claim_next', IngestionJob, {'status': 'queued'}, [('created_at', 1)]),
+    ]
+
+
+def plan_stages(plan):
+    """All stage names in an explain() winning plan"""
+    plan = plan.get('queryPlan', plan)
+    stages = [plan.get('stage')]
+    for child in [plan.get('inputStage')] + plan.get('inputStages', []):
+        if child:
+            stages.extend(plan_stages(child))
+    return [s for s in stages if s]
+
+
+def explain_queries(user_id=None):
+    """Explain every hot query shape and flag the ones whose winning plan is a COLLSCAN"""
+    from app.models.transaction import Transaction
+    from app.models.user import User
+
+    sample_txn = Transaction.collection.find_one({'user_id': user_id} if user_id else {}) or {}
+    sample_user = User.collection.find_one() or {}
+    sample = {
+        'user_id': user_id or sample_txn.get('user_id', 'sample-user'),
+        'category': sample_txn.get('category', 'Other'),
+        'email': sample_user.get('email', 'sample@example.com'),
+    }
+
+    report = []
+    for name, model, query, sort in query_shapes(sample):
+        cursor = model.collection.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = cursor.explain()
+        stages = plan_stages(explain['queryPlanner']['winningPlan'])
+        stats = explain.get('executionStats', {})
+        report.append({
+            'query': name,
+            'collection': model.collection.name,
+            'plan': ' <- '.join(stages),
+            'collscan': 'COLLSCAN' in stages,
+            'in_memory_sort': 'SORT' in stages,
+            'docs_examined': stats.get('totalDocsExamined'),
+        })
+    return report
+
+
+def profiled_collscans(db, limit=20):
+    """COLLSCANs recorded by the database profiler (needs profiling enabled, e.g. level 1)"""
+    entries = db.system.profile.find(
+        {'planSummary': 'COLLSCAN', 'ns': {'$not': {'$regex': r'\.system\.'}}},
+        {'ns': 1, 'op': 1, 'command': 1, 'millis': 1, 'docsExamined': 1, 'ts': 1}
+    ).sort('ts', -1).limit(limit)
+
+    report = []
+    for entry in entries:
+        command = entry.get('command', {})
+        query = command.get('filter') or command.get('query') or {}
+        report.append({
+            'ns': entry.get('ns'),
+            'op': entry.get('op'),
+            'fields': sorted(query.keys()) if isinstance(query, dict) else [],
+            'millis': entry.get('millis'),
+            'docs_examined': entry.get('docsExamined'),
+            'ts': entry.get('ts'),
+        })
+    return report
@@ -0,0 +1,88 @@
+import numpy as np
+from datetime import datetime
+
+
+class BalanceReconciler:
+    """Check extracted rows against the statement's running balance.
+
+    Each row's balance minus the previous row's balance (the opening
+    balance for the first row) is the signed transaction amount. When its
+    size matches the parsed amount, the sign decides income vs expense.
+    That is more reliable than the keyword guess, which calls most UPI
+    rows expenses. Rows whose amount does not match are flagged instead of
+    silently trusted.
+    """
+
+    def __init__(self, tolerance=0.01):
+        self.tolerance = tolerance
+
+    def reconcile(self, transactions, opening_balance=None, closing_balance=None):
+        """Set 'type' and 'reconciled' on each row in place and return a summary"""
+        summary = {
+            'checked': 0,
+            'reconciled': 0,
+            'flagged': 0,
+            'direction_fixed': 0,
+            'opening_balance': opening_balance,
+            'closing_balance': closing_balance,
+            'chain_end_balance': None,
+            'closing_matches': None
+        }
+
+        if not transactions:
+            return summary
+
+        # Work in chronological order (some banks list newest first)
+        rows = list(transactions)
+        if self._is_descending(rows):
+            rows.reverse()
+
+        amounts = np.array([float(t.get('amount') or 0) for t in rows])
+        balances = np.array([
+            float(t['balance']) if t.get('balance') is not None else np.nan for t in rows
+        ])
+        previous = np.concatenate((
+            [opening_balance if opening_balance is not None else np.nan],
+            balances[:-1]
+        ))
+        deltas = balances - previous
+
+        checkable = ~np.isnan(deltas)
+        matches = checkable & np.isclose(np.abs(deltas), amounts, rtol=0, atol=self.tolerance)
+        incoming = deltas > 0
+
+        for i, txn in enumerate(rows):
+            if not checkable[i]:
+                txn['reconciled'] = None
+                continue
+            if matches[i]:
+                txn_type = 'income' if incoming[i] else 'expense'
+                if txn.get('type') != txn_type:
+                    summary['direction_fixed'] += 1
+                    txn['type'] = txn_type
+                txn['reconciled'] = True
+            else:
+                txn['reconciled'] = False
+
+        summary['checked'] = int(checkable.sum())
+        summary['reconciled'] = int(matches.sum())
+        summary['flagged'] = summary['checked'] - summary['reconciled']
+
+        # The chain has to end on the statement's closing balance
+        known = balances[~np.isnan(balances)]
+        if len(known):
+            summary['chain_end_balance'] = float(known[-1])
+            if closing_balance is not None:
+                summary['closing_matches'] = bool(
+                    abs(known[-1] - closing_balance) <= self.tolerance
+                )
+
+        return summary
+
+    def _is_descending(self, rows):
+        try:
+            first = datetime.fromisoformat(rows[0]['date'])
+            last = datetime.fromisoformat(rows[-1]['date'])
+            return first > last
+        except (KeyError, TypeError, ValueError):
+            return False
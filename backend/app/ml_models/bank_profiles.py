@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+DEFAULT_PROFILES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'trained_models',
+    'bank_profiles.json'
+)
+
+
+class BankProfile:
+    """Table extraction settings that worked for one bank's statements"""
+
+    # Consecutive pages where another strategy won before the profile switches to it
+    MISS_LIMIT = 2
+
+    def __init__(self, bank_name=None, strategy=None, columns=None, date_format=None,
+                 hits=0, misses=0, updated_at=None):
+        self.bank_name = bank_name
+        self.strategy = strategy          # 1-based index into StatementExtractor.table_strategies
+        self.columns = columns            # {'date': 0, 'description': 1, 'withdrawal': 2, ...}
+        self.date_format = date_format    # strptime format, e.g. '%d-%m-%Y'
+        self.hits = hits
+        self.misses = misses
+        self.updated_at = updated_at
+
+    def strategy_order(self, strategy_count):
+        """Learned strategy first, then the rest in their default order"""
+        order = list(range(1, strategy_count + 1))
+        if self.strategy in order:
+            order.remove(self.strategy)
+            order.insert(0, self.strategy)
+        return order
+
+    def observe(self, outcome):
+        """Update the profile from one page's extraction outcome"""
+        if not outcome or outcome.get('strategy') is None:
+            # No strategy found rows (summary page, blank page): nothing to learn
+            return
+
+        if self.strategy is None or outcome['strategy'] == self.strategy:
+            self.strategy = outcome['strategy']
+            self.hits += 1
+            self.misses = 0
+        else:
+            # The learned strategy found zero rows but another one worked
+            self.misses += 1
+            if self.misses < self.MISS_LIMIT:
+                return
+            print(f"   🔁 {self.bank_name or 'Statement'} profile: switching to strategy {outcome['strategy']}")
+            self.strategy = outcome['strategy']
+            self.hits = 1
+            self.misses = 0
+
+        if outcome.get('columns'):
+            self.columns = outcome['columns']
+        if outcome.get('date_format'):
+            self.date_format = outcome['date_format']
+        self.updated_at = datetime.utcnow().isoformat()
+
+    def copy(self):
+        return BankProfile.from_dict(self.to_dict())
+
+    def to_dict(self):
+        return {
+            'bank_name': self.bank_name,
+            'strategy': self.strategy,
+            'columns': self.columns,
+            'date_format': self.date_format,
+            'hits': self.hits,
+            'misses': self.misses,
+            'updated_at': self.updated_at
+        }
+
+    @staticmethod
+    def from_dict(data):
+        return BankProfile(
+            bank_name=data.get('bank_name'),
+            strategy=data.get('strategy'),
+            columns=data.get('columns'),
+            date_format=data.get('date_format'),
+            hits=data.get('hits', 0),
+            misses=data.get('misses', 0),
+            updated_at=data.get('updated_at')
+        )
+
+
+class BankProfileRegistry:
+    """Bank profiles keyed by the bank name detected on the statement, persisted as JSON"""
+
+    _default = None
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('BANK_PROFILES_PATH', DEFAULT_PROFILES_PATH)
+        self.profiles = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def default(cls):
+        """Process-wide registry, so every upload handled by this worker shares what was learned"""
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.profiles = {name: BankProfile.from_dict(p) for name, p in data.items()}
+        except Exception as e:
+            print(f"⚠️ Could not load bank profiles from {self.path}: {e}")
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({name: p.to_dict() for name, p in self.profiles.items()}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ Could not save bank profiles to {self.path}: {e}")
+
+    def get(self, bank_name):
+        """Working copy of a bank's profile (a blank one for unknown banks)"""
+        with self._lock:
+            profile = self.profiles.get(bank_name)
+            return profile.copy() if profile else BankProfile(bank_name)
+
+    def update(self, bank_name, outcomes):
+        """Replay page outcomes (in page order) into the stored profile"""
+        if not bank_name:
+            return
+        with self._lock:
+            profile = self.profiles.get(bank_name) or BankProfile(bank_name)
+            before = profile.to_dict()
+            for outcome in outcomes:
+                profile.observe(outcome)
+            self.profiles[bank_name] = profile
+            if profile.to_dict() != before:
+                self.save()
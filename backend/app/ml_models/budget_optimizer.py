@@ -1,30 +1,38 @@
 import numpy as np
+from app.ml_models.categorizer import canonical_category
+from app.ml_models.transaction_frame import TransactionFrame
 from datetime import datetime, timedelta
 
 class BudgetOptimizer:
     def __init__(self):
         self.category_limits = {
-            'Food & Groceries': 0.20,      # 20% of income
+            'Food & Dining': 0.20,         # 20% of income
             'Transportation': 0.10,         # 10% of income
-            'Bills': 0.15,                  # 15% of income
+            'Bills & Utilities': 0.15,      # 15% of income
             'Shopping': 0.10,               # 10% of income
             'Entertainment': 0.05,          # 5% of income
             'Healthcare': 0.05,             # 5% of income
         }
     
     def analyze_spending_pattern(self, transactions):
-        """Analyze spending patterns and suggest budget"""
+        """Analyze spending patterns and suggest budget (transactions: list of dicts or TransactionFrame)"""
+        frame = TransactionFrame.coerce(transactions)
+        
         # Calculate total income and expenses
-        total_income = sum(t['amount'] for t in transactions if t['type'] == 'income')
-        total_expense = sum(t['amount'] for t in transactions if t['type'] == 'expense')
+        total_income = float(frame.amounts[frame.is_income].sum())
+        total_expense = float(frame.amounts[frame.is_expense].sum())
         
-        # Group by category
+        # Group by category codes, then fold aliases into canonical names
         category_spending = {}
-        for t in transactions:
-            if t['type'] == 'expense':
-                cat = t.get('category', 'Other')
-                category_spending[cat] = category_spending.get(cat, 0) + t['amount']
+        for name, amount in zip(frame.categories, frame.category_sums(frame.is_expense)):
+            if amount:
+                cat = canonical_category(name)
+                category_spending[cat] = category_spending.get(cat, 0) + float(amount)
         
+        return self.analyze_totals(total_income, total_expense, category_spending)
+    
+    def analyze_totals(self, total_income, total_expense, category_spending):
+        """Budget analysis from precomputed totals (e.g. app.services.analytics.period_summary)"""
         # Calculate recommended budgets
         recommendations = {}
         for category, limit_percent in self.category_limits.items():
@@ -46,9 +54,10 @@ class BudgetOptimizer:
             'savings_potential': sum(r['difference'] for r in recommendations.values() if r['difference'] > 0)
         }
     
-    def get_smart_suggestions(self, transactions):
-        """Generate AI-powered suggestions"""
-        analysis = self.analyze_spending_pattern(transactions)
+    def get_smart_suggestions(self, transactions=None, analysis=None):
+        """Generate AI-powered suggestions (from transactions or a precomputed analysis)"""
+        if analysis is None:
+            analysis = self.analyze_spending_pattern(transactions)
         suggestions = []
         
         for category, data in analysis['recommendations'].items():
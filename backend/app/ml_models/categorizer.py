@@ -0,0 +1,122 @@
+import re
+
+# Keyword rules in priority order: the first category with a keyword anywhere
+# in the (lowercased) description wins
+DEFAULT_CATEGORY_RULES = [
+    ('Food & Dining', ['swiggy', 'zomato', 'restaurant', 'food', 'cafe',
+                       'dominos', 'pizza', 'mcdonald', 'kfc', 'subway']),
+    ('Transportation', ['irctc', 'rail', 'uber', 'ola', 'rapido', 'fuel',
+                        'petrol', 'diesel', 'fastag', 'parking', 'ticket']),
+    ('Shopping', ['flipkart', 'amazon', 'shopping', 'store', 'myntra',
+                  'ajio', 'meesho', 'mart', 'supermarket', 'paytm',
+                  'phonepe', 'merchant', 'gpay', 'bharatpe']),
+    ('Bills & Utilities', ['recharge', 'mobile', 'electricity', 'water', 'gas',
+                           'internet', 'broadband', 'dth', 'jio', 'airtel', 'vodafone']),
+    ('Healthcare', ['medical', 'pharmacy', 'medic', 'hospital', 'clinic',
+                    'doctor', 'apollo', 'fortis', '1mg', 'rishi']),
+    ('Entertainment', ['movie', 'cinema', 'netflix', 'prime', 'hotstar',
+                       'spotify', 'youtube', 'gaming', 'entertainment', 'district']),
+    ('ATM Withdrawal', ['atm', 'cash withdrawal', 'cwt']),
+]
+
+# Older names still used by manual entries and budget limits
+CATEGORY_ALIASES = {
+    'Food & Groceries': 'Food & Dining',
+    'Food': 'Food & Dining',
+    'Groceries': 'Food & Dining',
+    'Bills': 'Bills & Utilities',
+    'Utilities': 'Bills & Utilities',
+    'Travel': 'Transportation',
+    'Health': 'Healthcare',
+    'ATM': 'ATM Withdrawal',
+}
+
+# Description cleanup shared by the table and text parsers
+UPI_REFERENCE_PATTERN = re.compile(r'UPI:\d+:')
+UPI_HANDLE_PATTERN = re.compile(r'@[a-z]+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Names in caps usually mean a personal transfer
+TRANSFER_PATTERN = re.compile(r'[A-Z]{2,}')
+
+
+def canonical_category(category):
+    """Map an old or alias category name onto the name the categorizer uses"""
+    if not category:
+        return 'Other'
+    return CATEGORY_ALIASES.get(category.strip(), category.strip())
+
+
+def clean_description(description, max_length=100):
+    """Strip UPI references/handles and collapse whitespace"""
+    description = UPI_REFERENCE_PATTERN.sub('', description)
+    description = UPI_HANDLE_PATTERN.sub('', description)
+    description = WHITESPACE_PATTERN.sub(' ', description).strip()
+
+    if len(description) > max_length:
+        description = description[:max_length - 3] + "..."
+
+    return description
+
+
+class TransactionCategorizer:
+    """Keyword categorizer with every rule compiled once.
+
+    Each category's keywords become one alternation regex, searched in
+    priority order. With CPython's re this beats both a single alternation
+    over all keywords (which needs lookaheads to see overlapping matches
+    from different categories) and scanning a joined batch buffer.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = rules if rules is not None else DEFAULT_CATEGORY_RULES
+        self.matchers = [
+            (category, re.compile('|'.join(re.escape(k.lower()) for k in keywords)))
+            for category, keywords in self.rules
+            if keywords
+        ]
+
+    def chain(self, *fallbacks):
+        """Categorizer that tries these rules first, then each fallback's, without recompiling"""
+        chained = TransactionCategorizer(rules=[])
+        chained.rules = list(self.rules)
+        chained.matchers = list(self.matchers)
+        for fallback in fallbacks:
+            chained.rules.extend(fallback.rules)
+            chained.matchers.extend(fallback.matchers)
+        return chained
+
+    def categorize(self, description):
+        """Category for a single description"""
+        desc_lower = description.lower()
+
+        for category, matcher in self.matchers:
+            if matcher.search(desc_lower):
+                return category
+
+        # Check if it looks like a personal transfer (has names in caps)
+        if TRANSFER_PATTERN.search(description) and 'merchant' not in desc_lower:
+            return 'Transfer'
+
+        return 'Other'
+
+    def categorize_batch(self, descriptions):
+        """Categories for a list of descriptions, in the same order"""
+        matchers = self.matchers
+        search_transfer = TRANSFER_PATTERN.search
+        categories = []
+        append = categories.append
+
+        for description in descriptions:
+            desc_lower = description.lower()
+            for category, matcher in matchers:
+                if matcher.search(desc_lower):
+                    append(category)
+                    break
+            else:
+                if search_transfer(description) and 'merchant' not in desc_lower:
+                    append('Transfer')
+                else:
+                    append('Other')
+
+        return categories
@@ -1,27 +1,25 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from app.ml_models.transaction_frame import TransactionFrame
 
 class ExpensePredictor:
     def __init__(self):
         self.model = None
     
     def predict_simple(self, transactions):
-        """Simple moving average prediction"""
-        if len(transactions) < 7:
+        """Simple moving average prediction (transactions: list of dicts or TransactionFrame, newest first)"""
+        frame = TransactionFrame.coerce(transactions)
+        if len(frame) < 7:
             return {'next_month': 0, 'confidence': 'low'}
         
-        # Convert to DataFrame
-        df = pd.DataFrame(transactions)
-        df['amount'] = pd.to_numeric(df['amount'])
-        
         # Calculate average of last 30 days
-        recent = df.head(30)
-        avg_expense = recent[recent['type'] == 'expense']['amount'].sum() / 30 * 30
+        recent = frame.head(30)
+        avg_expense = float(recent.amounts[recent.is_expense].sum()) / 30 * 30
         
         return {
             'next_month_prediction': round(avg_expense, 2),
             'daily_average': round(avg_expense / 30, 2),
             'confidence': 'medium',
             'based_on_days': len(recent)
-        }
\ No newline at end of file
+        }
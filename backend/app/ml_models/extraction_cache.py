@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'trained_models',
+    'extraction_cache'
+)
+
+
+def hash_stream(stream, destination=None, chunk_size=64 * 1024):
+    """MD5 of a stream (same digest as StatementExtractor.calculate_file_hash),
+    optionally writing the bytes to destination on the way through"""
+    hash_md5 = hashlib.md5()
+    out = open(destination, 'wb') if destination else None
+    try:
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            hash_md5.update(chunk)
+            if out:
+                out.write(chunk)
+    finally:
+        if out:
+            out.close()
+    return hash_md5.hexdigest()
+
+
+class ExtractionCache:
+    """Extraction results on local disk, keyed by file content hash and extractor version.
+
+    One JSON file per result. Reading an entry touches its mtime, and when
+    the directory grows past max_bytes the least recently used entries are
+    removed first.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or os.getenv('EXTRACTION_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(os.getenv('EXTRACTION_CACHE_MAX_MB', 256)) * 1024 * 1024
+        self.max_bytes = max_bytes
+
+    def _path(self, file_hash, version):
+        key = hashlib.sha256(f"{file_hash}:{version}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, file_hash, version):
+        path = self._path(file_hash, version)
+        try:
+            with open(path, 'r') as f:
+                result = json.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Dropping unreadable extraction cache entry {path}: {e}")
+            self._remove(path)
+            return None
+
+        statement_date = result.get('bank_info', {}).get('statement_date')
+        if statement_date:
+            result['bank_info']['statement_date'] = datetime.fromisoformat(statement_date)
+        return result
+
+    def put(self, file_hash, version, result):
+        path = self._path(file_hash, version)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(result, f, default=self._encode)
+            os.replace(tmp_path, path)
+            self.evict()
+        except Exception as e:
+            print(f"⚠️ Could not cache extraction result: {e}")
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        raise TypeError(f"Cannot cache {type(value).__name__}")
@@ -0,0 +1,113 @@
+from bisect import bisect_left
+from pdfplumber.table import TableFinder, TableSettings
+from pdfplumber import utils
+
+
+class PageLayout:
+    """Parsed content of one PDF page, shared by text and table extraction.
+
+    The page's content stream is interpreted once when the layout is built;
+    after that the pdfplumber page is flushed and everything below runs from
+    the cached characters, words, lines and rects. The object exposes the
+    small part of the pdfplumber Page interface that TableFinder and Table
+    use (chars, edges, bbox, extract_words), so table strategies can run
+    against it directly.
+    """
+
+    def __init__(self, page):
+        self.page_number = page.page_number
+        self.bbox = page.bbox
+        self.width = page.width
+        self.height = page.height
+
+        # Decode the content stream (pdfplumber caches the objects on the page)
+        objects = page.objects
+        self.chars = objects.get('char', [])
+        self.lines = objects.get('line', [])
+        self.rects = objects.get('rect', [])
+        self.edges = page.edges
+
+        self.text = page.extract_text()
+
+        # Word clusterings keyed by their settings, filled on demand
+        self._words = {}
+
+        # Char indices sorted by vertical midpoint, so table rows can bisect
+        # instead of scanning every char on the page
+        self._char_order = sorted(
+            range(len(self.chars)),
+            key=lambda i: (self.chars[i]['top'] + self.chars[i]['bottom']) / 2
+        )
+        self._char_mids = [
+            (self.chars[i]['top'] + self.chars[i]['bottom']) / 2 for i in self._char_order
+        ]
+
+        # Drop pdfminer's layout tree and pdfplumber's derived caches
+        page.flush_cache()
+        page.get_textmap.cache_clear()
+
+    @property
+    def words(self):
+        return self.extract_words()
+
+    def extract_words(self, **kwargs):
+        """Cluster chars into words once per distinct set of settings"""
+        key = tuple(sorted(kwargs.items()))
+        if key not in self._words:
+            self._words[key] = utils.extract_words(self.chars, **kwargs)
+        return self._words[key]
+
+    def extract_text(self):
+        return self.text
+
+    def extract_tables(self, table_settings=None):
+        """Same result as pdfplumber's Page.extract_tables, without touching the PDF"""
+        tset = TableSettings.resolve(table_settings)
+        tables = TableFinder(self, tset).tables
+        return [self._extract_table(table, **(tset.text_settings or {})) for table in tables]
+
+    def _chars_in_row(self, bbox):
+        """Chars whose midpoint falls inside bbox, in original page order"""
+        x0, top, x1, bottom = bbox
+        lo = bisect_left(self._char_mids, top)
+        hi = bisect_left(self._char_mids, bottom)
+        row_chars = []
+        for i in sorted(self._char_order[lo:hi]):
+            char = self.chars[i]
+            h_mid = (char['x0'] + char['x1']) / 2
+            if x0 <= h_mid < x1:
+                row_chars.append(char)
+        return row_chars
+
+    def _extract_table(self, table, **kwargs):
+        """Mirror of pdfplumber's Table.extract using the row index above"""
+        table_arr = []
+
+        for row in table.rows:
+            arr = []
+            row_chars = self._chars_in_row(row.bbox)
+
+            for cell in row.cells:
+                if cell is None:
+                    cell_text = None
+                else:
+                    x0, top, x1, bottom = cell
+                    cell_chars = [
+                        char for char in row_chars
+                        if x0 <= (char['x0'] + char['x1']) / 2 < x1
+                        and top <= (char['top'] + char['bottom']) / 2 < bottom
+                    ]
+
+                    if cell_chars:
+                        kwargs['x_shift'] = x0
+                        kwargs['y_shift'] = top
+                        if 'layout' in kwargs:
+                            kwargs['layout_width'] = x1 - x0
+                            kwargs['layout_height'] = bottom - top
+                        cell_text = utils.extract_text(cell_chars, **kwargs)
+                    else:
+                        cell_text = ''
+                arr.append(cell_text)
+            table_arr.append(arr)
+
+        return table_arr
@@ -1,6 +1,168 @@
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import Counter
+from zlib import crc32
 import re
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from app.ml_models.transaction_frame import TransactionFrame
+
+MERCHANT_WORD_PATTERN = re.compile(r'[a-z]{2,}')
+
+# Payment-rail words, UPI handle suffixes and web/company filler that say
+# nothing about the merchant ('NETFLIX.COM SUBSCRIPTION' -> 'netflix')
+RAIL_WORDS = {
+    'upi', 'dr', 'cr', 'pos', 'neft', 'imps', 'rtgs', 'ach', 'nach', 'ecs', 'si', 'txn', 'ref', 'no',
+    'payment', 'pay', 'paid', 'to', 'by', 'via', 'from', 'for', 'debit', 'credit', 'card', 'purchase',
+    'autopay', 'mandate', 'ybl', 'ibl', 'axl', 'apl', 'okaxis', 'oksbi', 'okicici', 'okhdfcbank',
+    'www', 'com', 'in', 'co', 'online', 'subscription', 'india', 'pvt', 'ltd', 'limited', 'private',
+}
+
+# MinHash signature length and LSH banding (8 bands of 4 rows: pairs with
+# Jaccard 0.8 share a band with probability ~0.97, pairs at 0.3 ~0.06)
+MINHASH_SIZE = 32
+LSH_BANDS = 8
+MINHASH_PRIME = (1 << 31) - 1
+_MINHASH_A, _MINHASH_B = np.random.RandomState(7).randint(1, MINHASH_PRIME, size=(2, MINHASH_SIZE)).astype(np.int64)
+
+# A band starts a new amount band past max(absolute, relative * band start)
+AMOUNT_TOLERANCE = 50
+AMOUNT_TOLERANCE_RATIO = 0.2
+
+# (name, period in days, tolerance in days, step for the next expected date,
+# max (max - min) / mean of the amounts). Three yearly payments are easy to
+# hit by chance at a busy merchant, so annual series must be near fixed-price.
+CADENCES = [
+    ('weekly', 7, 2, relativedelta(weeks=1), None),
+    ('monthly', 30.44, 4, relativedelta(months=1), None),
+    ('annual', 365.25, 15, relativedelta(years=1), 0.05),
+]
+CADENCE_BY_NAME = {cadence[0]: cadence for cadence in CADENCES}
+
+MIN_OCCURRENCES = 3
+
+# Share of gaps that must fit the cadence (a skipped period counts as fitting),
+# and share that must be exactly one period
+MIN_REGULAR_SHARE = 0.75
+MIN_SINGLE_SHARE = 0.5
+
+
+def merchant_words(description):
+    """Merchant words of a description: letters only, without payment-rail words"""
+    words = []
+    for word in MERCHANT_WORD_PATTERN.findall((description or '').lower()):
+        if word not in RAIL_WORDS and word not in words:
+            words.append(word)
+    return words
+
+
+def merchant_key(description):
+    """Grouping key for a merchant ('UPI/DR/4123/NETFLIX/netflix@ybl' -> 'netflix')"""
+    words = merchant_words(description)
+    return ' '.join(words) if words else (description or '').strip().lower()
+
+
+def minhash_signatures(word_sets):
+    """MINHASH_SIZE x len(word_sets) MinHash signatures, computed in one pass over all words"""
+    lengths = np.array([max(len(words), 1) for words in word_sets])
+    hashes = np.array([
+        crc32(word.encode()) % MINHASH_PRIME
+        for words in word_sets for word in (words or [''])
+    ], dtype=np.int64)
+    permuted = (_MINHASH_A[:, None] * hashes[None, :] + _MINHASH_B[:, None]) % MINHASH_PRIME
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return np.minimum.reduceat(permuted, starts, axis=1)
+
+
+def cluster_keys(keys, threshold):
+    """Cluster id per merchant key: keys whose word sets have Jaccard >= threshold are joined.
+    
+    Candidates come from LSH buckets over MinHash signatures and each is
+    checked against its bucket's first key, so the work is linear in the
+    number of distinct keys.
+    """
+    parent = list(range(len(keys)))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    if len(keys) > 1:
+        word_sets = [set(key.split()) for key in keys]
+        signatures = minhash_signatures([sorted(words) for words in word_sets])
+        rows = MINHASH_SIZE // LSH_BANDS
+        for band in range(LSH_BANDS):
+            buckets = {}
+            for i, column in enumerate(map(bytes, signatures[band * rows:(band + 1) * rows].T.copy())):
+                first = buckets.setdefault(column, i)
+                if first == i or find(first) == find(i):
+                    continue
+                union = word_sets[first] | word_sets[i]
+                if union and len(word_sets[first] & word_sets[i]) / len(union) >= threshold:
+                    parent[find(i)] = find(first)
+    
+    return np.array([find(i) for i in range(len(keys))], dtype=np.int64)
+
+
+def amount_bands(clusters, amounts):
+    """Band id per row: rows of a cluster sorted by amount, a new band past the tolerance"""
+    order = np.lexsort((amounts, clusters))
+    bands = np.empty(len(amounts), dtype=np.int64)
+    band, cluster, start = -1, None, 0.0
+    for i in order:
+        amount = amounts[i]
+        if clusters[i] != cluster or amount - start > max(AMOUNT_TOLERANCE, AMOUNT_TOLERANCE_RATIO * start):
+            band += 1
+            cluster, start = clusters[i], amount
+        bands[i] = band
+    return bands
+
+
+def gap_fits(gaps, period, tolerance):
+    """Per gap: whether it is a whole number of periods (at least one) within tolerance, and that number"""
+    periods = np.maximum(np.round(gaps / period), 1)
+    return np.abs(gaps - periods * period) <= tolerance, periods
+
+
+def match_cadence(days, amounts):
+    """(cadence name, period, step) that the sorted distinct days follow, or None"""
+    gaps = np.diff(days).astype(np.float64)
+    if len(gaps) < MIN_OCCURRENCES - 1:
+        return None
+    median_gap = float(np.median(gaps))
+    spread = (amounts.max() - amounts.min()) / amounts.mean() if amounts.mean() > 0 else 0.0
+    for name, period, tolerance, step, max_spread in CADENCES:
+        fits, periods = gap_fits(gaps, period, tolerance)
+        single = fits & (periods == 1)
+        if (abs(median_gap - period) <= tolerance
+                and fits.mean() >= MIN_REGULAR_SHARE
+                and single.sum() >= MIN_OCCURRENCES - 1
+                and single.mean() >= MIN_SINGLE_SHARE
+                and (max_spread is None or spread <= max_spread)):
+            return name, period, step
+    return None
+
+
+def cadence_fits(gap_days, cadence):
+    """Whether two payments gap_days apart fit a stored series' cadence (skipped periods allowed)"""
+    _, period, tolerance, _, _ = CADENCE_BY_NAME[cadence]
+    fits, _ = gap_fits(np.array([abs(gap_days)], dtype=np.float64), period, tolerance)
+    return bool(fits[0])
+
+
+def amount_fits(low, high, cadence=None):
+    """Whether amounts from low to high still make one amount band (of the cadence)"""
+    if high - low > max(AMOUNT_TOLERANCE, AMOUNT_TOLERANCE_RATIO * low):
+        return False
+    max_spread = CADENCE_BY_NAME[cadence][4] if cadence else None
+    return max_spread is None or high - low <= max_spread * (high + low) / 2
+
+
+def next_expected(date, cadence):
+    return date + CADENCE_BY_NAME[cadence][3]
+
 
 class RecurringDetector:
     def __init__(self):
@@ -20,58 +182,73 @@ class RecurringDetector:
         
         return len(intersection) / len(union)
     
-    def detect_recurring(self, transactions):
-        """Detect recurring transactions"""
-        # Group transactions by similar description and amount
-        groups = defaultdict(list)
+    def detect_series(self, transactions):
+        """Recurring expense series with their raw values (transactions: list of dicts or TransactionFrame).
+        
+        Descriptions are normalized once per distinct text into merchant
+        keys, similar keys are clustered (MinHash/LSH), each cluster is
+        split into amount bands, and a band is recurring when its dates
+        follow a weekly, monthly or annual cadence within tolerance.
+        """
+        frame = TransactionFrame.coerce(transactions)
+        expenses = frame.take(frame.is_expense & ~np.isnat(frame.dates))
+        if len(expenses) < MIN_OCCURRENCES:
+            return []
+        
+        description_codes, descriptions = pd.factorize(expenses.descriptions)
+        key_codes, keys = pd.factorize(np.array([merchant_key(d) for d in descriptions], dtype=object))
+        clusters = cluster_keys(list(keys), self.similarity_threshold)[key_codes[description_codes]]
         
-        for txn in transactions:
-            if txn['type'] != 'expense':
+        bands = amount_bands(clusters, expenses.amounts)
+        day_numbers = expenses.dates.astype('datetime64[D]').astype(np.int64)
+        
+        # Rows grouped by band, newest first within each band
+        order = np.lexsort((-expenses.dates.astype(np.int64), bands))
+        boundaries = np.flatnonzero(np.diff(bands[order])) + 1
+        series = []
+        for rows in np.split(order, boundaries):
+            if len(rows) < MIN_OCCURRENCES:
+                continue
+            days = np.unique(day_numbers[rows])
+            amounts = expenses.amounts[rows]
+            cadence = match_cadence(days, amounts)
+            if not cadence:
                 continue
             
-            # Round amount to group similar transactions
-            amount_key = round(txn['amount'], -1)  # Round to nearest 10
-            
-            # Find similar transactions
-            found_group = False
-            for key in list(groups.keys()):
-                if abs(key[1] - amount_key) <= 50:  # Within ₹50
-                    # Check description similarity
-                    for existing_txn in groups[key]:
-                        similarity = self.calculate_similarity(
-                            txn['description'], 
-                            existing_txn['description']
-                        )
-                        if similarity >= self.similarity_threshold:
-                            groups[key].append(txn)
-                            found_group = True
-                            break
-                if found_group:
-                    break
-            
-            if not found_group:
-                key = (txn['description'][:20], amount_key)
-                groups[key].append(txn)
-        
-        # Find recurring patterns (3+ occurrences)
-        recurring = []
-        for key, txns in groups.items():
-            if len(txns) >= 3:
-                # Calculate frequency
-                dates = [datetime.fromisoformat(t['date'].replace('Z', '+00:00')) for t in txns]
-                dates.sort()
-                
-                if len(dates) >= 2:
-                    avg_days = sum((dates[i+1] - dates[i]).days for i in range(len(dates)-1)) / (len(dates)-1)
-                    
-                    recurring.append({
-                        'description': txns[0]['description'],
-                        'category': txns[0]['category'],
-                        'avg_amount': sum(t['amount'] for t in txns) / len(txns),
-                        'frequency': f"Every {int(avg_days)} days",
-                        'occurrences': len(txns),
-                        'last_date': dates[-1].strftime('%d-%m-%Y'),
-                        'next_expected': (dates[-1] + timedelta(days=int(avg_days))).strftime('%d-%m-%Y')
-                    })
+            name, period, _ = cadence
+            newest = rows[0]
+            last_date = pd.Timestamp(expenses.dates[newest]).to_pydatetime()
+            merchant_keys = Counter(keys[key_codes[description_codes[rows]]])
+            series.append({
+                'merchant_key': merchant_keys.most_common(1)[0][0],
+                'description': expenses.descriptions[newest],
+                'category': expenses.categories[expenses.category_codes[newest]],
+                'cadence': name,
+                'period_days': period,
+                'avg_amount': float(amounts.mean()),
+                'amount_min': float(amounts.min()),
+                'amount_max': float(amounts.max()),
+                'occurrences': len(rows),
+                'avg_gap_days': float(np.diff(days).mean()),
+                'first_date': datetime(1970, 1, 1) + timedelta(days=int(days[0])),
+                'last_date': last_date,
+                'next_expected': next_expected(last_date, name)
+            })
         
-        return sorted(recurring, key=lambda x: x['avg_amount'], reverse=True)
\ No newline at end of file
+        return sorted(series, key=lambda s: s['avg_amount'], reverse=True)
+    
+    def detect_recurring(self, transactions):
+        """Detect recurring transactions (transactions: list of dicts or TransactionFrame)"""
+        return [
+            {
+                'description': s['description'],
+                'category': s['category'],
+                'avg_amount': s['avg_amount'],
+                'frequency': f"Every {int(s['avg_gap_days'])} days",
+                'cadence': s['cadence'],
+                'occurrences': s['occurrences'],
+                'last_date': s['last_date'].strftime('%d-%m-%Y'),
+                'next_expected': s['next_expected'].strftime('%d-%m-%Y')
+            }
+            for s in self.detect_series(transactions)
+        ]
@@ -3,10 +3,64 @@ import re
 from datetime import datetime
 from dateutil import parser
 import hashlib
+import math
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+from app.ml_models.page_layout import PageLayout
+from app.ml_models.bank_profiles import BankProfile, BankProfileRegistry
+from app.ml_models.categorizer import TransactionCategorizer, clean_description
+from app.ml_models.balance_reconciler import BalanceReconciler
+
+# Row patterns used once per table row / text line
+ROW_DATE_PATTERN = re.compile(r'\d{2}-\d{2}-\d{4}')
+LINE_DATE_PATTERN = re.compile(r'(\d{2}-\d{2}-\d{4})\s+(.+)')
+AMOUNT_PATTERN = re.compile(r'(\d{1,3}(?:,\d{3})*\.\d{2}|\d+\.\d{2})')
+
+# Bump whenever a parsing change should invalidate cached extraction results
+EXTRACTOR_VERSION = 1
+
 
 class StatementExtractor:
-    def __init__(self):
+    def __init__(self, workers=1, profiles=None, categorizer=None, cache=None):
+        # Number of processes used to extract pages (1 = serial)
+        self.workers = workers
+        
+        # Keyword rules compiled once per extractor (pass a user's rules from CategoryRuleIndex)
+        self.categorizer = categorizer or TransactionCategorizer()
+        
+        # Fixes debit/credit direction from the running balance
+        self.reconciler = BalanceReconciler()
+        
+        # Optional ExtractionCache: results reused by file hash + EXTRACTOR_VERSION
+        self.cache = cache
+        
+        # Learned per-bank table settings (shared by every extractor in this process)
+        self.profiles = profiles if profiles is not None else BankProfileRegistry.default()
+        
+        # Table extraction strategies, tried in this order unless a bank profile says otherwise
+        self.table_strategies = [
+            {
+                'vertical_strategy': "text",
+                'horizontal_strategy': "text",
+                'snap_tolerance': 3,
+                'join_tolerance': 3,
+            },
+            {
+                'vertical_strategy': "lines",
+                'horizontal_strategy': "lines",
+                'snap_tolerance': 5,
+            },
+            {
+                'vertical_strategy': "explicit",
+                'horizontal_strategy': "explicit",
+                'explicit_vertical_lines': [],
+                'explicit_horizontal_lines': [],
+            }
+        ]
+        
+        # Date formats a profile can learn, checked against dateutil's reading
+        self.date_formats = ['%d-%m-%Y', '%d/%m/%Y', '%d %b %Y', '%Y-%m-%d']
+        
         # Indian date formats
         self.date_patterns = [
             r'\d{2}-\d{2}-\d{4}',           # DD-MM-YYYY (Karnataka Bank format)
@@ -55,15 +109,7 @@ class StatementExtractor:
                 break
         
         # Find bank name
-        text_lower = text.lower()
-        for bank in self.indian_banks:
-            if bank.lower() in text_lower:
-                bank_info['bank_name'] = bank
-                break
-        
-        # Karnataka Bank specific
-        if 'kbl' in text_lower or 'karnataka bank' in text_lower:
-            bank_info['bank_name'] = 'Karnataka Bank'
+        bank_info['bank_name'] = self.detect_bank_name(text)
         
         # Extract account number
         account_patterns = [
@@ -107,6 +153,40 @@ class StatementExtractor:
         
         return bank_info
     
+    def detect_bank_name(self, text):
+        """Find which bank issued the statement"""
+        bank_name = None
+        text_lower = text.lower()
+        for bank in self.indian_banks:
+            if bank.lower() in text_lower:
+                bank_name = bank
+                break
+        
+        # Karnataka Bank specific
+        if 'kbl' in text_lower or 'karnataka bank' in text_lower:
+            bank_name = 'Karnataka Bank'
+        
+        return bank_name
+    
+    def parse_statement_date(self, date_str, date_format=None):
+        """Parse a statement date, trying the bank's learned format before dateutil"""
+        if date_format:
+            try:
+                return datetime.strptime(date_str, date_format)
+            except ValueError:
+                pass
+        return parser.parse(date_str, dayfirst=True)
+    
+    def infer_date_format(self, date_str, parsed_date):
+        """Find a strptime format that reads date_str the same way dateutil did"""
+        for date_format in self.date_formats:
+            try:
+                if datetime.strptime(date_str, date_format) == parsed_date:
+                    return date_format
+            except ValueError:
+                continue
+        return None
+    
     def parse_amount(self, amount_str):
         """Parse amount string to float - handles Indian number format"""
         if not amount_str or str(amount_str).strip() in ['', 'None', 'nan']:
@@ -132,48 +212,14 @@ class StatementExtractor:
     
     def categorize_transaction(self, description):
         """Enhanced categorization for transactions"""
-        desc_lower = description.lower()
-        
-        # Food & Dining
-        if any(x in desc_lower for x in ['swiggy', 'zomato', 'restaurant', 'food', 'cafe', 
-                                          'dominos', 'pizza', 'mcdonald', 'kfc', 'subway']):
-            return 'Food & Dining'
-        
-        # Transportation
-        if any(x in desc_lower for x in ['irctc', 'rail', 'uber', 'ola', 'rapido', 'fuel',
-                                          'petrol', 'diesel', 'fastag', 'parking', 'ticket']):
-            return 'Transportation'
-        
-        # Shopping
-        if any(x in desc_lower for x in ['flipkart', 'amazon', 'shopping', 'store', 'myntra',
-                                          'ajio', 'meesho', 'mart', 'supermarket', 'paytm', 
-                                          'phonepe', 'merchant', 'gpay', 'bharatpe']):
-            return 'Shopping'
-        
-        # Bills & Utilities
-        if any(x in desc_lower for x in ['recharge', 'mobile', 'electricity', 'water', 'gas',
-                                          'internet', 'broadband', 'dth', 'jio', 'airtel', 'vodafone']):
-            return 'Bills & Utilities'
-        
-        # Healthcare
-        if any(x in desc_lower for x in ['medical', 'pharmacy', 'medic', 'hospital', 'clinic',
-                                          'doctor', 'apollo', 'fortis', '1mg', 'rishi']):
-            return 'Healthcare'
-        
-        # Entertainment
-        if any(x in desc_lower for x in ['movie', 'cinema', 'netflix', 'prime', 'hotstar',
-                                          'spotify', 'youtube', 'gaming', 'entertainment', 'district']):
-            return 'Entertainment'
-        
-        # ATM Withdrawal
-        if any(x in desc_lower for x in ['atm', 'cash withdrawal', 'cwt']):
-            return 'ATM Withdrawal'
-        
-        # Check if it looks like a personal transfer (has names in caps)
-        if re.search(r'[A-Z]{2,}', description) and 'merchant' not in desc_lower:
-            return 'Transfer'
-        
-        return 'Other'
+        return self.categorizer.categorize(description)
+    
+    def categorize_transactions(self, transactions):
+        """Fill in categories for a batch of parsed rows in one pass"""
+        categories = self.categorizer.categorize_batch([txn['description'] for txn in transactions])
+        for txn, category in zip(transactions, categories):
+            txn['category'] = category
+        return transactions
     
     def extract_transactions_from_table(self, pdf):
         """Extract transactions using pdfplumber's table detection"""
@@ -181,422 +227,600 @@ class StatementExtractor:
         
         print("\n🔍 Attempting table extraction...")
         
+        profile = None
         for page_num, page in enumerate(pdf.pages, 1):
-            print(f"\n   📄 Processing page {page_num}...")
-            
-            # Try multiple extraction strategies
-            strategies = [
-                {
-                    'vertical_strategy': "text",
-                    'horizontal_strategy': "text",
-                    'snap_tolerance': 3,
-                    'join_tolerance': 3,
-                },
-                {
-                    'vertical_strategy': "lines",
-                    'horizontal_strategy': "lines",
-                    'snap_tolerance': 5,
-                },
-                {
-                    'vertical_strategy': "explicit",
-                    'horizontal_strategy': "explicit",
-                    'explicit_vertical_lines': [],
-                    'explicit_horizontal_lines': [],
-                }
-            ]
-            
-            page_transactions = []
-            
-            for strategy_num, strategy in enumerate(strategies, 1):
-                try:
-                    tables = page.extract_tables(strategy)
-                    
-                    if not tables:
+            layout = PageLayout(page)
+            if profile is None:
+                profile = self.profile_for(layout.text)
+            page_transactions, outcome = self._extract_page_tables(layout, page_num, profile)
+            profile.observe(outcome)
+            transactions.extend(page_transactions)
+        
+        print(f"\n   📊 Total from table extraction: {len(transactions)} transactions")
+        return transactions
+    
+    def extract_transactions_from_page(self, page, page_num, profile=None):
+        """Extract transactions from the tables on a single page (a PageLayout or pdfplumber page)"""
+        page_transactions, _ = self._extract_page_tables(page, page_num, profile)
+        return page_transactions
+    
+    def _extract_page_tables(self, page, page_num, profile=None):
+        """Run the table strategies on a page; returns (transactions, outcome for the bank profile)"""
+        print(f"\n   📄 Processing page {page_num}...")
+        
+        profile = profile or BankProfile()
+        strategies = self.table_strategies
+        
+        # What worked on this page, fed back into the bank profile
+        outcome = {'strategy': None, 'columns': None, 'date_format': None}
+        
+        page_transactions = []
+        
+        # Try the strategy that worked for this bank first, then the others
+        for strategy_num in profile.strategy_order(len(strategies)):
+            strategy = strategies[strategy_num - 1]
+            try:
+                tables = page.extract_tables(strategy)
+                
+                if not tables:
+                    continue
+                
+                print(f"      Strategy {strategy_num}: Found {len(tables)} table(s)")
+                
+                for table_num, table in enumerate(tables, 1):
+                    if not table or len(table) < 2:
                         continue
                     
-                    print(f"      Strategy {strategy_num}: Found {len(tables)} table(s)")
+                    print(f"      Table {table_num}: {len(table)} rows")
+                    
+                    # Find header row
+                    header_row_idx = None
+                    for idx, row in enumerate(table[:5]):
+                        if row:
+                            row_text = ' '.join([str(cell).lower() if cell else '' for cell in row])
+                            if 'date' in row_text and ('particular' in row_text or 'withdrawal' in row_text):
+                                header_row_idx = idx
+                                break
+                    
+                    if header_row_idx is None:
+                        # Try without header - assume first row is data
+                        header_row_idx = -1
+                        headers = ['Date', 'Particulars', 'Withdrawals', 'Deposits', 'Balance']
+                    else:
+                        headers = table[header_row_idx]
                     
-                    for table_num, table in enumerate(tables, 1):
-                        if not table or len(table) < 2:
+                    # Identify columns
+                    date_col = None
+                    desc_col = None
+                    withdrawal_col = None
+                    deposit_col = None
+                    balance_col = None
+                    
+                    for i, header in enumerate(headers):
+                        if not header:
+                            continue
+                        h = str(header).lower()
+                        if 'date' in h:
+                            date_col = i
+                        elif 'particular' in h or 'description' in h:
+                            desc_col = i
+                        elif 'withdrawal' in h or 'debit' in h:
+                            withdrawal_col = i
+                        elif 'deposit' in h or 'credit' in h:
+                            deposit_col = i
+                        elif 'balance' in h:
+                            balance_col = i
+                    
+                    # If no columns identified, try positional (common Karnataka Bank format)
+                    if date_col is None:
+                        date_col = 0
+                        desc_col = 1
+                        withdrawal_col = 2
+                        deposit_col = 3
+                        balance_col = 4
+                    
+                    # Continuation pages without a header: use the columns learned for this bank
+                    if header_row_idx == -1 and profile.columns:
+                        date_col = profile.columns.get('date')
+                        desc_col = profile.columns.get('description')
+                        withdrawal_col = profile.columns.get('withdrawal')
+                        deposit_col = profile.columns.get('deposit')
+                        balance_col = profile.columns.get('balance')
+                    
+                    # Process data rows
+                    rows_processed = 0
+                    for row_idx, row in enumerate(table[header_row_idx + 1:], 1):
+                        if not row or len(row) < 2:
                             continue
                         
-                        print(f"      Table {table_num}: {len(table)} rows")
-                        
-                        # Find header row
-                        header_row_idx = None
-                        for idx, row in enumerate(table[:5]):
-                            if row:
-                                row_text = ' '.join([str(cell).lower() if cell else '' for cell in row])
-                                if 'date' in row_text and ('particular' in row_text or 'withdrawal' in row_text):
-                                    header_row_idx = idx
-                                    break
-                        
-                        if header_row_idx is None:
-                            # Try without header - assume first row is data
-                            header_row_idx = -1
-                            headers = ['Date', 'Particulars', 'Withdrawals', 'Deposits', 'Balance']
-                        else:
-                            headers = table[header_row_idx]
-                        
-                        # Identify columns
-                        date_col = None
-                        desc_col = None
-                        withdrawal_col = None
-                        deposit_col = None
-                        balance_col = None
+                        # Skip rows that look like headers or footers
+                        row_text = ' '.join([str(cell) for cell in row if cell]).lower()
+                        if 'closing balance' in row_text or 'opening balance' in row_text:
+                            continue
+                        if 'date' in row_text and 'particular' in row_text:
+                            continue
                         
-                        for i, header in enumerate(headers):
-                            if not header:
+                        try:
+                            # Extract date
+                            date_str = None
+                            if date_col is not None and date_col < len(row):
+                                date_str = str(row[date_col]).strip() if row[date_col] else None
+                            
+                            if not date_str or date_str == 'None':
                                 continue
-                            h = str(header).lower()
-                            if 'date' in h:
-                                date_col = i
-                            elif 'particular' in h or 'description' in h:
-                                desc_col = i
-                            elif 'withdrawal' in h or 'debit' in h:
-                                withdrawal_col = i
-                            elif 'deposit' in h or 'credit' in h:
-                                deposit_col = i
-                            elif 'balance' in h:
-                                balance_col = i
-                        
-                        # If no columns identified, try positional (common Karnataka Bank format)
-                        if date_col is None:
-                            date_col = 0
-                            desc_col = 1
-                            withdrawal_col = 2
-                            deposit_col = 3
-                            balance_col = 4
-                        
-                        # Process data rows
-                        rows_processed = 0
-                        for row_idx, row in enumerate(table[header_row_idx + 1:], 1):
-                            if not row or len(row) < 2:
+                            
+                            # Must start with date pattern
+                            if not ROW_DATE_PATTERN.match(date_str):
                                 continue
                             
-                            # Skip rows that look like headers or footers
-                            row_text = ' '.join([str(cell) for cell in row if cell]).lower()
-                            if 'closing balance' in row_text or 'opening balance' in row_text:
+                            # Parse date
+                            transaction_date = None
+                            try:
+                                transaction_date = self.parse_statement_date(date_str, profile.date_format)
+                            except:
                                 continue
-                            if 'date' in row_text and 'particular' in row_text:
+                            
+                            if outcome['date_format'] is None:
+                                outcome['date_format'] = self.infer_date_format(date_str, transaction_date)
+                            
+                            # Extract description
+                            description = ''
+                            if desc_col is not None and desc_col < len(row):
+                                description = str(row[desc_col]).strip() if row[desc_col] else ''
+                            
+                            if not description or description == 'None' or len(description) < 3:
                                 continue
                             
-                            try:
-                                # Extract date
-                                date_str = None
-                                if date_col is not None and date_col < len(row):
-                                    date_str = str(row[date_col]).strip() if row[date_col] else None
-                                
-                                if not date_str or date_str == 'None':
-                                    continue
-                                
-                                # Must start with date pattern
-                                if not re.match(r'\d{2}-\d{2}-\d{4}', date_str):
-                                    continue
-                                
-                                # Parse date
-                                transaction_date = None
-                                try:
-                                    transaction_date = parser.parse(date_str, dayfirst=True)
-                                except:
-                                    continue
-                                
-                                # Extract description
-                                description = ''
-                                if desc_col is not None and desc_col < len(row):
-                                    description = str(row[desc_col]).strip() if row[desc_col] else ''
-                                
-                                if not description or description == 'None' or len(description) < 3:
-                                    continue
-                                
-                                # Extract amounts
-                                withdrawal = None
-                                deposit = None
-                                balance = None
-                                
-                                if withdrawal_col is not None and withdrawal_col < len(row):
-                                    withdrawal = self.parse_amount(row[withdrawal_col])
-                                
-                                if deposit_col is not None and deposit_col < len(row):
-                                    deposit = self.parse_amount(row[deposit_col])
-                                
-                                if balance_col is not None and balance_col < len(row):
-                                    balance = self.parse_amount(row[balance_col])
-                                
-                                # Determine transaction type and amount
-                                if withdrawal and withdrawal > 0:
-                                    amount = withdrawal
-                                    txn_type = 'expense'
-                                elif deposit and deposit > 0:
-                                    amount = deposit
-                                    txn_type = 'income'
-                                else:
-                                    continue
-                                
-                                # Clean description
-                                description = re.sub(r'UPI:\d+:', '', description)
-                                description = re.sub(r'@[a-z]+', '', description)
-                                description = re.sub(r'\s+', ' ', description).strip()
-                                
-                                if len(description) > 100:
-                                    description = description[:97] + "..."
-                                
-                                # Categorize
-                                category = self.categorize_transaction(description)
-                                
-                                transaction = {
-                                    'date': transaction_date.isoformat(),
-                                    'description': description,
-                                    'amount': amount,
-                                    'type': txn_type,
-                                    'category': category,
-                                    'balance': balance
-                                }
-                                
-                                page_transactions.append(transaction)
-                                rows_processed += 1
-                                
-                            except Exception as e:
+                            # Extract amounts
+                            withdrawal = None
+                            deposit = None
+                            balance = None
+                            
+                            if withdrawal_col is not None and withdrawal_col < len(row):
+                                withdrawal = self.parse_amount(row[withdrawal_col])
+                            
+                            if deposit_col is not None and deposit_col < len(row):
+                                deposit = self.parse_amount(row[deposit_col])
+                            
+                            if balance_col is not None and balance_col < len(row):
+                                balance = self.parse_amount(row[balance_col])
+                            
+                            # Determine transaction type and amount
+                            if withdrawal and withdrawal > 0:
+                                amount = withdrawal
+                                txn_type = 'expense'
+                            elif deposit and deposit > 0:
+                                amount = deposit
+                                txn_type = 'income'
+                            else:
                                 continue
-                        
-                        if rows_processed > 0:
-                            print(f"         ✅ Extracted {rows_processed} transactions")
+                            
+                            # Clean description
+                            description = clean_description(description)
+                            
+                            # Categorized in one batch once the page is done
+                            transaction = {
+                                'date': transaction_date.isoformat(),
+                                'description': description,
+                                'amount': amount,
+                                'type': txn_type,
+                                'category': None,
+                                'balance': balance
+                            }
+                            
+                            page_transactions.append(transaction)
+                            rows_processed += 1
+                            
+                        except Exception as e:
+                            continue
                     
-                    # If we got transactions, no need to try other strategies
-                    if page_transactions:
-                        break
-                        
-                except Exception as e:
-                    print(f"      ⚠️  Strategy {strategy_num} failed: {e}")
-                    continue
-            
-            transactions.extend(page_transactions)
+                    if rows_processed > 0:
+                        print(f"         ✅ Extracted {rows_processed} transactions")
+                        if outcome['columns'] is None:
+                            outcome['columns'] = {
+                                'date': date_col,
+                                'description': desc_col,
+                                'withdrawal': withdrawal_col,
+                                'deposit': deposit_col,
+                                'balance': balance_col
+                            }
+                
+                # If we got transactions, no need to try other strategies
+                if page_transactions:
+                    outcome['strategy'] = strategy_num
+                    self.categorize_transactions(page_transactions)
+                    break
+                    
+            except Exception as e:
+                print(f"      ⚠️  Strategy {strategy_num} failed: {e}")
+                continue
         
-        print(f"\n   📊 Total from table extraction: {len(transactions)} transactions")
-        return transactions
+        return page_transactions, outcome
     
     def extract_transactions_from_text(self, text):
         """Fallback: Extract transactions from raw text using advanced regex"""
-        transactions = []
-        
+        return list(self.iter_transactions_from_text([text]))
+    
+    def iter_text_lines(self, chunks):
+        """Lines of ''.join(chunks), produced one chunk at a time with the chunk index"""
+        partial = ''
+        chunk_index = 0
+        for chunk_index, chunk in enumerate(chunks):
+            parts = (partial + chunk).split('\n')
+            partial = parts.pop()
+            for part in parts:
+                yield part, chunk_index
+        yield partial, chunk_index
+    
+    def iter_transactions_from_text(self, chunks):
+        """Stream transactions out of text chunks (usually one page each).
+        
+        Only the current line and the next one are held, so memory stays at
+        one page however long the statement is. The table header / end of
+        statement state carries over from one page to the next. Rows are
+        categorized and yielded once the page they came from is finished.
+        """
         print("\n🔍 Using text-based extraction (fallback)...")
         
-        lines = text.split('\n')
-        in_table = False
+        state = {'in_table': False, 'done': False}
+        batch = []
+        batch_chunk = 0
         transaction_count = 0
+        previous = None
+        line_num = 0
+        
+        # Pair every line with the line after it (the last line is its own lookahead)
+        for line, chunk_index in self.iter_text_lines(chunks):
+            if previous is not None:
+                transaction_count += self._parse_text_line(previous[0], line, previous[1], state, batch)
+                if state['done']:
+                    break
+                if chunk_index != batch_chunk:
+                    yield from self.categorize_transactions(batch)
+                    batch = []
+                    batch_chunk = chunk_index
+            line_num += 1
+            previous = (line, line_num)
+        else:
+            if previous is not None:
+                transaction_count += self._parse_text_line(previous[0], previous[0], previous[1], state, batch)
+        
+        yield from self.categorize_transactions(batch)
         
-        for line_num, line in enumerate(lines, 1):
-            # Check if we're entering a transaction section (handle multiple table headers)
-            if 'Date' in line and 'Particulars' in line and ('Withdrawal' in line or 'Balance' in line):
-                in_table = True
-                print(f"   Found transaction table header at line {line_num}")
-                continue
+        print(f"   ✅ Extracted {transaction_count} transactions from text")
+    
+    def _parse_text_line(self, line, next_line, line_num, state, transactions):
+        """Parse one statement line, appending to transactions; returns rows added"""
+        # Check if we're entering a transaction section (handle multiple table headers)
+        if 'Date' in line and 'Particulars' in line and ('Withdrawal' in line or 'Balance' in line):
+            state['in_table'] = True
+            print(f"   Found transaction table header at line {line_num}")
+            return 0
+        
+        # Skip opening balance line
+        if 'Opening Balance' in line:
+            return 0
+        
+        if not state['in_table']:
+            return 0
+        
+        # Stop only at the final system generated statement line
+        if 'This is a system generated' in line.lower():
+            print(f"   Reached end of statement at line {line_num}")
+            state['done'] = True
+            return 0
+        
+        # Don't stop at "Closing Balance" - it might appear multiple times
+        if 'Closing Balance' in line and 'system' not in next_line.lower():
+            return 0
+        
+        if not line.strip():
+            return 0
+        
+        # Look for date pattern at start of line
+        date_match = LINE_DATE_PATTERN.match(line)
+        if not date_match:
+            return 0
+        
+        try:
+            transaction_date = parser.parse(date_match.group(1), dayfirst=True)
+            rest = date_match.group(2).strip()
             
-            # Skip opening balance line
-            if 'Opening Balance' in line:
-                continue
+            # Extract all numbers from the line (including decimals)
+            # Pattern matches: 1,500.00 or 206.17 or 834.12
+            numbers = AMOUNT_PATTERN.findall(rest)
             
-            if not in_table:
-                continue
+            if len(numbers) < 1:
+                return 0
             
-            # Stop only at the final system generated statement line
-            if 'This is a system generated' in line.lower():
-                print(f"   Reached end of statement at line {line_num}")
-                break
+            # Parse numbers
+            parsed_numbers = [self.parse_amount(n) for n in numbers]
+            parsed_numbers = [n for n in parsed_numbers if n is not None and n > 0]
             
-            # Don't stop at "Closing Balance" - it might appear multiple times
-            if 'Closing Balance' in line and 'system' not in lines[min(line_num, len(lines)-1)].lower():
-                continue
+            if len(parsed_numbers) < 1:
+                return 0
             
-            if not line.strip():
-                continue
+            # Determine which numbers are what:
+            # Karnataka Bank format: Description Amount Balance
+            # OR: Description Withdrawal Deposit Balance
             
-            # Look for date pattern at start of line
-            date_match = re.match(r'(\d{2}-\d{2}-\d{4})\s+(.+)', line)
-            if not date_match:
-                continue
+            balance = parsed_numbers[-1]  # Last number is always balance
             
-            try:
-                transaction_date = parser.parse(date_match.group(1), dayfirst=True)
-                rest = date_match.group(2).strip()
-                
-                # Extract all numbers from the line (including decimals)
-                # Pattern matches: 1,500.00 or 206.17 or 834.12
-                numbers = re.findall(r'(\d{1,3}(?:,\d{3})*\.\d{2}|\d+\.\d{2})', rest)
-                
-                if len(numbers) < 1:
-                    continue
-                
-                # Parse numbers
-                parsed_numbers = [self.parse_amount(n) for n in numbers]
-                parsed_numbers = [n for n in parsed_numbers if n is not None and n > 0]
-                
-                if len(parsed_numbers) < 1:
-                    continue
-                
-                # Determine which numbers are what:
-                # Karnataka Bank format: Description Amount Balance
-                # OR: Description Withdrawal Deposit Balance
-                
-                balance = parsed_numbers[-1]  # Last number is always balance
-                
-                if len(parsed_numbers) == 1:
-                    # Only balance, skip this line
-                    continue
-                elif len(parsed_numbers) == 2:
-                    # Description Amount Balance (single transaction)
-                    amount = parsed_numbers[0]
-                elif len(parsed_numbers) >= 3:
-                    # Description Withdrawal Deposit Balance
-                    # Take second-to-last as the transaction amount
-                    amount = parsed_numbers[-2]
+            if len(parsed_numbers) == 1:
+                # Only balance, skip this line
+                return 0
+            elif len(parsed_numbers) == 2:
+                # Description Amount Balance (single transaction)
+                amount = parsed_numbers[0]
+            elif len(parsed_numbers) >= 3:
+                # Description Withdrawal Deposit Balance
+                # Take second-to-last as the transaction amount
+                amount = parsed_numbers[-2]
+            else:
+                return 0
+            
+            # Extract description (everything before the first number)
+            first_num_pos = rest.find(numbers[0])
+            description = rest[:first_num_pos].strip()
+            
+            if len(description) < 3:
+                return 0
+            
+            # Clean description
+            description_clean = clean_description(description)
+            
+            # Determine type by checking if it's a deposit/credit
+            # Most UPI transactions from others are deposits (income)
+            # Check the original transaction for patterns
+            is_deposit = False
+            desc_lower = description.lower()
+            
+            # Keywords that indicate money coming IN (deposits/income)
+            deposit_keywords = ['credit', 'deposit', 'salary', 'refund', 'reversal', 'received']
+            
+            # If description contains someone's name sending money, it's income
+            # UPI format: sendername@provider means someone sent you money
+            if 'upi:' in desc_lower:
+                # This is a UPI transaction - need to determine direction
+                # If it shows payment TO someone/merchant, it's expense
+                # If it's FROM someone, it's income
+                if any(kw in desc_lower for kw in ['payment', 'merchant', 'paytm', 'phonepe', 'gpay']):
+                    is_deposit = False  # Payment made
                 else:
-                    continue
-                
-                # Extract description (everything before the first number)
-                first_num_pos = rest.find(numbers[0])
-                description = rest[:first_num_pos].strip()
-                
-                if len(description) < 3:
-                    continue
-                
-                # Clean description
-                description_clean = re.sub(r'UPI:\d+:', '', description)
-                description_clean = re.sub(r'@[a-z]+', '', description_clean)
-                description_clean = re.sub(r'\s+', ' ', description_clean).strip()
-                
-                if len(description_clean) > 100:
-                    description_clean = description_clean[:97] + "..."
-                
-                # Determine type by checking if it's a deposit/credit
-                # Most UPI transactions from others are deposits (income)
-                # Check the original transaction for patterns
-                is_deposit = False
-                desc_lower = description.lower()
-                
-                # Keywords that indicate money coming IN (deposits/income)
-                deposit_keywords = ['credit', 'deposit', 'salary', 'refund', 'reversal', 'received']
-                
-                # If description contains someone's name sending money, it's income
-                # UPI format: sendername@provider means someone sent you money
-                if 'upi:' in desc_lower:
-                    # This is a UPI transaction - need to determine direction
-                    # If it shows payment TO someone/merchant, it's expense
-                    # If it's FROM someone, it's income
-                    if any(kw in desc_lower for kw in ['payment', 'merchant', 'paytm', 'phonepe', 'gpay']):
-                        is_deposit = False  # Payment made
-                    else:
-                        # Check if previous balance > current balance (expense)
-                        # This is more reliable
-                        is_deposit = False  # Default to expense for UPI
-                
-                if any(kw in desc_lower for kw in deposit_keywords):
-                    is_deposit = True
-                
-                txn_type = 'income' if is_deposit else 'expense'
-                
-                # Categorize
-                category = self.categorize_transaction(description_clean)
-                
-                transaction = {
-                    'date': transaction_date.isoformat(),
-                    'description': description_clean,
-                    'amount': amount,
-                    'type': txn_type,
-                    'category': category,
-                    'balance': balance
-                }
-                
-                transactions.append(transaction)
-                transaction_count += 1
-                
-            except Exception as e:
-                continue
+                    # Check if previous balance > current balance (expense)
+                    # This is more reliable
+                    is_deposit = False  # Default to expense for UPI
+            
+            if any(kw in desc_lower for kw in deposit_keywords):
+                is_deposit = True
+            
+            txn_type = 'income' if is_deposit else 'expense'
+            
+            # Categorized in one batch once the page is done
+            transaction = {
+                'date': transaction_date.isoformat(),
+                'description': description_clean,
+                'amount': amount,
+                'type': txn_type,
+                'category': None,
+                'balance': balance
+            }
+            
+            transactions.append(transaction)
+            return 1
+            
+        except Exception as e:
+            return 0
+    
+    def __getstate__(self):
+        # Pool workers receive the bank profile as an argument; the registry stays in this process
+        state = self.__dict__.copy()
+        state['profiles'] = None
+        return state
+    
+    def profile_for(self, first_page_text):
+        """Bank profile for a statement, found from the bank named on its first page"""
+        bank_name = self.detect_bank_name(first_page_text or '')
+        if self.profiles is None:
+            return BankProfile(bank_name)
+        
+        profile = self.profiles.get(bank_name)
+        if profile.strategy:
+            print(f"\n🏦 Using learned {bank_name} profile (strategy {profile.strategy}, {profile.date_format})")
+        return profile
+    
+    def learn_from_pages(self, page_results):
+        """Feed each page's winning strategy, columns and date format back into the registry"""
+        if self.profiles is None or not page_results:
+            return
+        bank_name = self.detect_bank_name(page_results[0][1] or '')
+        self.profiles.update(bank_name, [outcome for _, _, _, outcome in page_results])
+    
+    def extract_page_range(self, pdf_path, first_page, last_page=None, profile=None, progress=None):
+        """Extract text and table transactions for pages first_page..last_page (1-based, inclusive)"""
+        results = []
+        
+        # Each call opens the file itself so it can run inside a pool worker
+        with pdfplumber.open(pdf_path) as pdf:
+            if progress and first_page == 1:
+                progress(pages_total=len(pdf.pages))
+            pages = pdf.pages[first_page - 1:last_page]
+            for page_num, page in enumerate(pages, first_page):
+                # Parse the page once; text and every table strategy run from the cache
+                layout = PageLayout(page)
+                
+                # The first page names the bank, so start from what worked for it before
+                if profile is None:
+                    profile = self.profile_for(layout.text)
+                
+                page_transactions, outcome = self._extract_page_tables(layout, page_num, profile)
+                
+                # Page 1 settles the profile for the rest of this statement, so serial and
+                # parallel runs read every later page the same way
+                if page_num == 1:
+                    profile.observe(outcome)
+                results.append((page_num, layout.text, page_transactions, outcome))
+                
+                if progress:
+                    progress(pages_parsed=page_num)
+        
+        return results
+    
+    def extract_pages(self, pdf_path, workers=None, progress=None):
+        """Extract (page_num, text, transactions, outcome) for every page, in page order.
         
-        print(f"   ✅ Extracted {transaction_count} transactions from text")
-        return transactions
+        progress, if given, is called with pages_total= once and pages_parsed= as pages finish.
+        """
+        workers = workers or self.workers
+        
+        page_count = 1
+        if workers > 1:
+            with pdfplumber.open(pdf_path) as pdf:
+                page_count = len(pdf.pages)
+        
+        if page_count <= 1:
+            results = self.extract_page_range(pdf_path, 1, progress=progress)
+            self.learn_from_pages(results)
+            return results
+        
+        # Page 1 runs here: it names the bank and seeds the profile every worker starts from
+        results = self.extract_page_range(pdf_path, 1, 1, progress=progress)
+        profile = self.profile_for(results[0][1])
+        profile.observe(results[0][3])
+        
+        # Contiguous chunks, a couple per worker so one slow page doesn't stall the rest
+        chunk_size = max(1, math.ceil((page_count - 1) / (workers * 2)))
+        page_ranges = [
+            (first, min(first + chunk_size - 1, page_count))
+            for first in range(2, page_count + 1, chunk_size)
+        ]
+        
+        print(f"\n⚡ Extracting {page_count} pages with {workers} workers ({len(page_ranges)} chunks)")
+        
+        with ProcessPoolExecutor(max_workers=min(workers, len(page_ranges))) as pool:
+            futures = [
+                pool.submit(self.extract_page_range, pdf_path, first, last, profile)
+                for first, last in page_ranges
+            ]
+            # Futures are collected in submission order, which keeps pages in order
+            for future in futures:
+                results.extend(future.result())
+                if progress:
+                    progress(pages_parsed=len(results))
+        
+        self.learn_from_pages(results)
+        return results
     
-    def extract_from_pdf(self, pdf_path):
+    def extract_from_pdf(self, pdf_path, workers=None, file_hash=None, progress=None):
         """Main extraction method with dual strategy"""
         try:
             print(f"\n{'='*80}")
             print(f"📄 EXTRACTING FROM: {pdf_path}")
             print(f"{'='*80}")
             
-            with pdfplumber.open(pdf_path) as pdf:
-                # Extract full text
-                full_text = ""
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        full_text += page_text + "\n"
-                
-                if not full_text:
-                    return {
-                        'success': False,
-                        'error': 'Could not extract text from PDF'
-                    }
-                
-                print("\n📋 Extracted text preview (first 500 chars):")
-                print("-" * 80)
-                print(full_text[:500])
-                print("-" * 80)
-                
-                # Extract bank info
-                bank_info = self.extract_bank_info(full_text)
-                print(f"\n🏦 Bank Info:")
-                print(f"   Bank: {bank_info.get('bank_name')}")
-                print(f"   Account: {bank_info.get('account_number')}")
-                print(f"   Customer: {bank_info.get('customer_name')}")
-                print(f"   Opening Balance: ₹{bank_info.get('opening_balance', 0):,.2f}")
-                print(f"   Closing Balance: ₹{bank_info.get('closing_balance', 0):,.2f}")
-                
-                # Try table extraction first
-                transactions = self.extract_transactions_from_table(pdf)
-                print(f"\n✅ Table extraction found: {len(transactions)} transactions")
-                
-                # Always try text parsing as well and compare
-                text_transactions = self.extract_transactions_from_text(full_text)
-                print(f"✅ Text extraction found: {len(text_transactions)} transactions")
-                
-                # Use whichever method found more transactions
-                if len(text_transactions) > len(transactions):
-                    print(f"   📝 Using text extraction results (more complete)")
-                    transactions = text_transactions
-                else:
-                    print(f"   📊 Using table extraction results")
-                
-                # Remove duplicates based on date, amount, and description
-                unique_transactions = []
-                seen = set()
-                
-                for txn in transactions:
-                    key = (txn['date'], txn['amount'], txn['description'][:30])
-                    if key not in seen:
-                        seen.add(key)
-                        unique_transactions.append(txn)
-                
-                transactions = unique_transactions
-                
-                print(f"\n📊 Final count: {len(transactions)} transactions")
-                
-                if transactions:
-                    print("\n📝 Sample transactions (first 3):")
-                    for i, txn in enumerate(transactions[:3], 1):
-                        print(f"   {i}. {txn['date'][:10]}: {txn['description'][:50]}")
-                        print(f"      Amount: ₹{txn['amount']:,.2f} | Type: {txn['type']} | Category: {txn['category']}")
-                
-                # Calculate file hash
-                file_hash = self.calculate_file_hash(pdf_path)
-                
+            # Callers that hashed the upload while saving it pass the hash in
+            file_hash = file_hash or self.calculate_file_hash(pdf_path)
+            
+            if self.cache:
+                cached = self.cache.get(file_hash, EXTRACTOR_VERSION)
+                if cached:
+                    # Rules may have changed since the result was cached
+                    self.categorize_transactions(cached['transactions'])
+                    print(f"⚡ Using cached extraction ({len(cached['transactions'])} transactions)")
+                    return cached
+            
+            page_results = self.extract_pages(pdf_path, workers, progress)
+            
+            # Extract full text
+            full_text = ""
+            for _, page_text, _, _ in page_results:
+                if page_text:
+                    full_text += page_text + "\n"
+            
+            if not full_text:
                 return {
-                    'bank_info': bank_info,
-                    'transactions': transactions,
-                    'file_hash': file_hash,
-                    'success': True,
-                    'extracted_text_preview': full_text[:1000]
+                    'success': False,
+                    'error': 'Could not extract text from PDF'
                 }
-                
+            
+            print("\n📋 Extracted text preview (first 500 chars):")
+            print("-" * 80)
+            print(full_text[:500])
+            print("-" * 80)
+            
+            # Extract bank info
+            bank_info = self.extract_bank_info(full_text)
+            print(f"\n🏦 Bank Info:")
+            print(f"   Bank: {bank_info.get('bank_name')}")
+            print(f"   Account: {bank_info.get('account_number')}")
+            print(f"   Customer: {bank_info.get('customer_name')}")
+            print(f"   Opening Balance: ₹{bank_info.get('opening_balance', 0):,.2f}")
+            print(f"   Closing Balance: ₹{bank_info.get('closing_balance', 0):,.2f}")
+            
+            # Table extraction ran per page above
+            transactions = [txn for _, _, page_transactions, _ in page_results for txn in page_transactions]
+            print(f"\n✅ Table extraction found: {len(transactions)} transactions")
+            
+            # Always try text parsing as well and compare
+            page_texts = (page_text + "\n" for _, page_text, _, _ in page_results if page_text)
+            text_transactions = list(self.iter_transactions_from_text(page_texts))
+            print(f"✅ Text extraction found: {len(text_transactions)} transactions")
+            
+            # Use whichever method found more transactions
+            if len(text_transactions) > len(transactions):
+                print(f"   📝 Using text extraction results (more complete)")
+                transactions = text_transactions
+            else:
+                print(f"   📊 Using table extraction results")
+            
+            # Check every row against the balance column (before dedupe, so the chain is intact)
+            reconciliation = self.reconciler.reconcile(
+                transactions,
+                bank_info.get('opening_balance'),
+                bank_info.get('closing_balance')
+            )
+            print(f"\n⚖️  Balance check: {reconciliation['reconciled']}/{reconciliation['checked']} rows reconcile, "
+                  f"{reconciliation['direction_fixed']} directions corrected")
+            if reconciliation['flagged']:
+                print(f"   ⚠️  {reconciliation['flagged']} rows don't match the balance change")
+            if reconciliation['closing_matches'] is False:
+                print(f"   ⚠️  Chain ends at ₹{reconciliation['chain_end_balance']:,.2f}, "
+                      f"statement closing balance is ₹{reconciliation['closing_balance']:,.2f}")
+            
+            # Remove duplicates based on date, amount, and description
+            unique_transactions = []
+            seen = set()
+            
+            for txn in transactions:
+                key = (txn['date'], txn['amount'], txn['description'][:30])
+                if key not in seen:
+                    seen.add(key)
+                    unique_transactions.append(txn)
+            
+            transactions = unique_transactions
+            
+            print(f"\n📊 Final count: {len(transactions)} transactions")
+            
+            if transactions:
+                print("\n📝 Sample transactions (first 3):")
+                for i, txn in enumerate(transactions[:3], 1):
+                    print(f"   {i}. {txn['date'][:10]}: {txn['description'][:50]}")
+                    print(f"      Amount: ₹{txn['amount']:,.2f} | Type: {txn['type']} | Category: {txn['category']}")
+            
+            result = {
+                'bank_info': bank_info,
+                'transactions': transactions,
+                'file_hash': file_hash,
+                'reconciliation': reconciliation,
+                'success': True,
+                'extracted_text_preview': full_text[:1000]
+            }
+            
+            if self.cache:
+                self.cache.put(file_hash, EXTRACTOR_VERSION, result)
+            
+            return result
+            
         except Exception as e:
             import traceback
             print("\n❌ ERROR during extraction:")
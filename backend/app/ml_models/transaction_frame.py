@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+
+class TransactionFrame:
+    """A user's transactions as columns, in the order given (newest first when loaded).
+
+    dates are datetime64 (naive UTC), amounts float64, and type/category
+    are integer codes into the `types`/`categories` name arrays, so the
+    models group and filter with NumPy instead of looping over dicts.
+    """
+
+    def __init__(self, dates, amounts, type_codes, types, category_codes, categories, descriptions, ids=None):
+        self.dates = dates
+        self.amounts = amounts
+        self.type_codes = type_codes
+        self.types = types
+        self.category_codes = category_codes
+        self.categories = categories
+        self.descriptions = descriptions
+        self.ids = ids if ids is not None else np.empty(len(amounts), dtype=object)
+
+    @classmethod
+    def from_records(cls, transactions):
+        """Frame from transaction dicts; dates may be datetimes or ISO strings"""
+        transactions = list(transactions)
+        dates = pd.to_datetime([t.get('date') for t in transactions], utc=True, errors='coerce', format='ISO8601')
+        type_codes, types = pd.factorize(pd.Series([t.get('type') or 'expense' for t in transactions], dtype=object))
+        category_codes, categories = pd.factorize(pd.Series([t.get('category') or 'Other' for t in transactions], dtype=object))
+        return cls(
+            dates=dates.tz_localize(None).to_numpy(dtype='datetime64[ns]'),
+            amounts=np.array([float(t.get('amount') or 0) for t in transactions], dtype=np.float64),
+            type_codes=type_codes.astype(np.int8),
+            types=np.asarray(types, dtype=object),
+            category_codes=category_codes.astype(np.int32),
+            categories=np.asarray(categories, dtype=object),
+            descriptions=np.array([t.get('description') or '' for t in transactions], dtype=object),
+            ids=np.array([str(t['_id']) if t.get('_id') is not None else None for t in transactions], dtype=object)
+        )
+
+    @classmethod
+    def coerce(cls, transactions):
+        """The models' entry point: frames pass through, lists of dicts are converted"""
+        if isinstance(transactions, cls):
+            return transactions
+        return cls.from_records(transactions or [])
+
+    @classmethod
+    def load(cls, user_id, limit=None):
+        """A user's transactions newest first, read with a projection (no serialization round trip)"""
+        from app.models.transaction import Transaction
+
+        cursor = Transaction.collection.find(
+            {'user_id': user_id},
+            {'date': 1, 'amount': 1, 'type': 1, 'category': 1, 'description': 1}
+        ).sort([('date', -1), ('_id', -1)])
+        if limit:
+            cursor = cursor.limit(limit)
+        return cls.from_records(cursor)
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def take(self, selection):
+        """Rows selected by a boolean mask, index array or slice (code arrays are shared)"""
+        return TransactionFrame(
+            dates=self.dates[selection],
+            amounts=self.amounts[selection],
+            type_codes=self.type_codes[selection],
+            types=self.types,
+            category_codes=self.category_codes[selection],
+            categories=self.categories,
+            descriptions=self.descriptions[selection],
+            ids=self.ids[selection]
+        )
+
+    def head(self, n):
+        return self.take(slice(0, n))
+
+    def type_mask(self, name):
+        matches = np.flatnonzero(self.types == name)
+        if not len(matches):
+            return np.zeros(len(self), dtype=bool)
+        return self.type_codes == matches[0]
+
+    @property
+    def is_expense(self):
+        return self.type_mask('expense')
+
+    @property
+    def is_income(self):
+        return self.type_mask('income')
+
+    def category_names(self):
+        return self.categories[self.category_codes]
+
+    def category_sums(self, mask=None):
+        """Amount per category code (indexed like `categories`)"""
+        codes = self.category_codes if mask is None else self.category_codes[mask]
+        amounts = self.amounts if mask is None else self.amounts[mask]
+        return np.bincount(codes, weights=amounts, minlength=len(self.categories))
+
+    def to_records(self):
+        """Back to dicts with ISO date strings, like Transaction.find_by_user returns"""
+        dates = pd.DatetimeIndex(self.dates)
+        return [
+            {
+                '_id': self.ids[i],
+                'date': dates[i].isoformat() if not pd.isna(dates[i]) else None,
+                'amount': float(self.amounts[i]),
+                'type': self.types[self.type_codes[i]],
+                'category': self.categories[self.category_codes[i]],
+                'description': self.descriptions[i]
+            }
+            for i in range(len(self))
+        ]
+
+    def to_pandas(self):
+        return pd.DataFrame({
+            'date': self.dates,
+            'amount': self.amounts,
+            'type': pd.Categorical.from_codes(self.type_codes, categories=self.types),
+            'category': pd.Categorical.from_codes(self.category_codes, categories=self.categories),
+            'description': self.descriptions
+        })
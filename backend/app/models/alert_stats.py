@@ -0,0 +1,34 @@
+from datetime import datetime
+from app.config.database import mongo
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError
+
+class AlertStats:
+    """Per user: running statistics the streaming alert evaluator scores new transactions against"""
+    collection = mongo.db.alert_stats
+
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('user_id', 1)], name='user_unique', unique=True)
+    ]
+
+    @staticmethod
+    def find_by_user(user_id):
+        return AlertStats.collection.find_one({'user_id': user_id}, {'_id': 0})
+
+    @staticmethod
+    def save(user_id, stats, version):
+        """Store stats if nobody else saved since `version` was read (None = not stored yet); returns success"""
+        stats = dict(stats, user_id=user_id, version=(version or 0) + 1, updated_at=datetime.utcnow())
+        if version is None:
+            try:
+                AlertStats.collection.insert_one(stats)
+                return True
+            except DuplicateKeyError:
+                return False
+        result = AlertStats.collection.replace_one({'user_id': user_id, 'version': version}, stats)
+        return result.matched_count == 1
+
+    @staticmethod
+    def delete(user_id=None):
+        AlertStats.collection.delete_many({'user_id': user_id} if user_id is not None else {})
@@ -1,11 +1,17 @@
 from datetime import datetime
 from app.config.database import mongo
+from pymongo import IndexModel
 from bson import ObjectId
 import re
 
 class Bank:
     collection = mongo.db.banks
     
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('user_id', 1), ('account_number', 1)], name='user_account')
+    ]
+    
     @staticmethod
     def create(user_id, data):
         bank = {
@@ -52,6 +58,15 @@ class Bank:
                 'account_number': {'$regex': regex_pattern}
             })
         
+        # A full account number against a stored masked one (****1234): compare the last four digits
+        if not bank:
+            digits = re.sub(r'\D', '', account_number)
+            if len(digits) >= 4:
+                bank = Bank.collection.find_one({
+                    'user_id': user_id,
+                    'account_number': {'$regex': f'^\\*+{digits[-4:]}$'}
+                })
+        
         if bank:
             bank['_id'] = str(bank['_id'])
         return bank
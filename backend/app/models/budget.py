@@ -1,9 +1,15 @@
 from datetime import datetime
 from app.config.database import mongo
+from pymongo import IndexModel
 
 class Budget:
     collection = mongo.db.budgets
     
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('user_id', 1), ('category', 1)], name='user_category')
+    ]
+    
     @staticmethod
     def create(user_id, data):
         budget = {
@@ -0,0 +1,94 @@
+from datetime import datetime
+from app.config.database import mongo
+from pymongo import IndexModel
+from app.ml_models.categorizer import canonical_category
+from bson import ObjectId
+
+class CategoryRule:
+    """Merchant keyword -> category rule. user_id None means the rule applies to everyone."""
+    collection = mongo.db.category_rules
+    
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('user_id', 1), ('active', 1), ('priority', -1), ('created_at', 1)], name='scope_active_priority'),
+        IndexModel([('updated_at', 1)], name='updated')
+    ]
+    
+    @staticmethod
+    def create(user_id, data):
+        now = datetime.utcnow()
+        rule = {
+            'user_id': user_id,
+            'keyword': data['keyword'].strip().lower(),
+            'category': canonical_category(data['category']),
+            'priority': int(data.get('priority', 0)),
+            'active': True,
+            'created_at': now,
+            'updated_at': now
+        }
+        result = CategoryRule.collection.insert_one(rule)
+        rule['_id'] = str(result.inserted_id)
+        return CategoryRule._serialize(rule)
+    
+    @staticmethod
+    def find_by_scope(user_id):
+        """Active rules of one scope (a user, or the global rules for None), highest priority first"""
+        rules = list(CategoryRule.collection.find({
+            'user_id': user_id,
+            'active': True
+        }).sort([('priority', -1), ('created_at', 1)]))
+        return rules
+    
+    @staticmethod
+    def find_by_user(user_id):
+        """Rules a user can see: their own plus the global ones"""
+        rules = list(CategoryRule.collection.find({
+            'user_id': {'$in': [user_id, None]},
+            'active': True
+        }).sort([('priority', -1), ('created_at', 1)]))
+        return [CategoryRule._serialize(r) for r in rules]
+    
+    @staticmethod
+    def changed_since(since):
+        """(rule _id, user_id, updated_at) of every rule written after `since`"""
+        query = {'updated_at': {'$gt': since}} if since else {}
+        return [
+            (rule['_id'], rule.get('user_id'), rule['updated_at'])
+            for rule in CategoryRule.collection.find(query, {'user_id': 1, 'updated_at': 1})
+        ]
+    
+    @staticmethod
+    def update(rule_id, user_id, data):
+        update_data = {}
+        
+        if 'keyword' in data:
+            update_data['keyword'] = data['keyword'].strip().lower()
+        if 'category' in data:
+            update_data['category'] = canonical_category(data['category'])
+        if 'priority' in data:
+            update_data['priority'] = int(data['priority'])
+        
+        update_data['updated_at'] = datetime.utcnow()
+        
+        result = CategoryRule.collection.update_one(
+            {'_id': ObjectId(rule_id), 'user_id': user_id, 'active': True},
+            {'$set': update_data}
+        )
+        return result.matched_count > 0
+    
+    @staticmethod
+    def delete(rule_id, user_id):
+        """Soft delete, so watchers polling on updated_at see the removal"""
+        result = CategoryRule.collection.update_one(
+            {'_id': ObjectId(rule_id), 'user_id': user_id, 'active': True},
+            {'$set': {'active': False, 'updated_at': datetime.utcnow()}}
+        )
+        return result.modified_count > 0
+    
+    @staticmethod
+    def _serialize(rule):
+        rule['_id'] = str(rule['_id'])
+        for field in ('created_at', 'updated_at'):
+            if isinstance(rule.get(field), datetime):
+                rule[field] = rule[field].isoformat()
+        return rule
@@ -1,10 +1,16 @@
 from datetime import datetime
 from app.config.database import mongo
+from pymongo import IndexModel
 from bson import ObjectId
 
 class Goal:
     collection = mongo.db.goals
     
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('user_id', 1)], name='user')
+    ]
+    
     @staticmethod
     def create(user_id, data):
         goal = {
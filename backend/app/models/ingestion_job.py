@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta
+from app.config.database import mongo
+from pymongo import IndexModel
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+class IngestionJob:
+    """Statement upload waiting for, or going through, background processing"""
+    collection = mongo.db.ingestion_jobs
+    
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('status', 1), ('created_at', 1)], name='status_created'),
+        IndexModel([('status', 1), ('heartbeat_at', 1)], name='status_heartbeat'),
+        IndexModel([('user_id', 1), ('file_hash', 1), ('status', 1)], name='user_file_hash_status')
+    ]
+    
+    # Attempts before a job that keeps dying with its worker is marked failed
+    MAX_ATTEMPTS = 3
+    
+    @staticmethod
+    def create(user_id, data):
+        job = {
+            'user_id': user_id,
+            'filename': data['filename'],
+            'filepath': data['filepath'],
+            'file_hash': data['file_hash'],
+            'status': 'queued',  # queued, running, completed, failed
+            'progress': {
+                'pages_total': None,
+                'pages_parsed': 0,
+                'rows_extracted': 0,
+                'rows_inserted': 0,
+                'rows_skipped': 0
+            },
+            'result': None,
+            'error': None,
+            'attempts': 0,
+            'worker_id': None,
+            'created_at': datetime.utcnow(),
+            'started_at': None,
+            'heartbeat_at': None,
+            'finished_at': None
+        }
+        result = IngestionJob.collection.insert_one(job)
+        job['_id'] = str(result.inserted_id)
+        return IngestionJob._serialize(job)
+    
+    @staticmethod
+    def claim_next(worker_id):
+        """Atomically take the oldest queued job, or None"""
+        now = datetime.utcnow()
+        job = IngestionJob.collection.find_one_and_update(
+            {'status': 'queued'},
+            {
+                '$set': {
+                    'status': 'running',
+                    'worker_id': worker_id,
+                    'started_at': now,
+                    'heartbeat_at': now
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('created_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        return job
+    
+    @staticmethod
+    def _owned(job_id, worker_id):
+        """Filter matching the job only while this worker's attempt is the running one"""
+        return {'_id': ObjectId(job_id), 'worker_id': worker_id, 'status': 'running'}
+    
+    @staticmethod
+    def update_progress(job_id, worker_id, progress):
+        """Set progress counters (also serves as the worker's heartbeat)"""
+        update_data = {f'progress.{key}': value for key, value in progress.items()}
+        update_data['heartbeat_at'] = datetime.utcnow()
+        IngestionJob.collection.update_one(IngestionJob._owned(job_id, worker_id), {'$set': update_data})
+    
+    @staticmethod
+    def complete(job_id, worker_id, result):
+        """Finish this worker's attempt; False if the job was requeued and taken over meanwhile"""
+        result = IngestionJob.collection.update_one(
+            IngestionJob._owned(job_id, worker_id),
+            {'$set': {
+                'status': 'completed',
+                'result': result,
+                'finished_at': datetime.utcnow()
+            }}
+        )
+        return result.matched_count == 1
+    
+    @staticmethod
+    def fail(job_id, worker_id, error):
+        """Fail this worker's attempt; False if the job was requeued and taken over meanwhile"""
+        result = IngestionJob.collection.update_one(
+            IngestionJob._owned(job_id, worker_id),
+            {'$set': {
+                'status': 'failed',
+                'error': error,
+                'finished_at': datetime.utcnow()
+            }}
+        )
+        return result.matched_count == 1
+    
+    @staticmethod
+    def requeue_stale(stale_after_seconds):
+        """Put running jobs whose worker stopped sending heartbeats back on the queue"""
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+        stale = {'status': 'running', 'heartbeat_at': {'$lt': cutoff}}
+        
+        failed = IngestionJob.collection.update_many(
+            dict(stale, attempts={'$gte': IngestionJob.MAX_ATTEMPTS}),
+            {'$set': {
+                'status': 'failed',
+                'error': 'Worker stopped while processing the statement',
+                'finished_at': datetime.utcnow()
+            }}
+        )
+        requeued = IngestionJob.collection.update_many(
+            stale,
+            {'$set': {'status': 'queued', 'worker_id': None}}
+        )
+        return requeued.modified_count, failed.modified_count
+    
+    @staticmethod
+    def find_active_by_hash(user_id, file_hash):
+        """Queued or running job for the same file, so a double submit doesn't import twice"""
+        job = IngestionJob.collection.find_one({
+            'user_id': user_id,
+            'file_hash': file_hash,
+            'status': {'$in': ['queued', 'running']}
+        })
+        return IngestionJob._serialize(job) if job else None
+    
+    @staticmethod
+    def get_by_id(job_id, user_id):
+        job = IngestionJob.collection.find_one({
+            '_id': ObjectId(job_id),
+            'user_id': user_id
+        })
+        return IngestionJob._serialize(job) if job else None
+    
+    @staticmethod
+    def _serialize(job):
+        job['_id'] = str(job['_id'])
+        job.pop('filepath', None)
+        for field in ('created_at', 'started_at', 'heartbeat_at', 'finished_at'):
+            if isinstance(job.get(field), datetime):
+                job[field] = job[field].isoformat()
+        return job
@@ -0,0 +1,25 @@
+from datetime import datetime
+from app.config.database import mongo
+
+class JobCheckpoint:
+    """Resume point for long-running batch jobs, one document per job name"""
+    collection = mongo.db.job_checkpoints
+    
+    @staticmethod
+    def get(job_name):
+        return JobCheckpoint.collection.find_one({'_id': job_name})
+    
+    @staticmethod
+    def save(job_name, data):
+        data = dict(data)
+        data['updated_at'] = datetime.utcnow()
+        JobCheckpoint.collection.update_one(
+            {'_id': job_name},
+            {'$set': data, '$setOnInsert': {'started_at': datetime.utcnow()}},
+            upsert=True
+        )
+    
+    @staticmethod
+    def clear(job_name):
+        result = JobCheckpoint.collection.delete_one({'_id': job_name})
+        return result.deleted_count > 0
@@ -0,0 +1,125 @@
+from datetime import datetime
+from collections import Counter
+from app.config.database import mongo
+from app.ml_models.categorizer import canonical_category
+from pymongo import IndexModel, UpdateOne
+
+class MonthlyRollup:
+    """Per user and month: income/expense totals and counts, overall and per category"""
+    collection = mongo.db.monthly_rollups
+    
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('user_id', 1), ('month', 1)], name='user_month_unique', unique=True)
+    ]
+    
+    @staticmethod
+    def month_key(date):
+        """'YYYY-MM' of a datetime or ISO date string"""
+        if not isinstance(date, datetime):
+            from app.services.transaction_import import parse_transaction_date
+            date = parse_transaction_date(date)
+        return f"{date.year}-{date.month:02d}"
+    
+    @staticmethod
+    def category_key(category):
+        """Category as a field name ('.' and a leading '$' aren't allowed in paths)"""
+        return canonical_category(category or 'Other').replace('.', '_').lstrip('$') or 'Other'
+    
+    @staticmethod
+    def add_amounts(increments, month, txn_type, category, amount, count):
+        """Accumulate one (month, type, category) group into {month: Counter(field path -> delta)}"""
+        fields = increments.setdefault(month, Counter())
+        kind = 'income' if txn_type == 'income' else 'expense'
+        category = MonthlyRollup.category_key(category)
+        fields[kind] += amount
+        fields[f'{kind}_count'] += count
+        fields[f'categories.{category}.{kind}'] += amount
+        fields[f'categories.{category}.count'] += count
+    
+    @staticmethod
+    def apply(user_id, added=(), removed=()):
+        """$inc the user's months by added transactions and decrement by removed ones"""
+        increments = {}
+        for transactions, sign in ((added, 1), (removed, -1)):
+            for txn in transactions:
+                try:
+                    month = MonthlyRollup.month_key(txn['date'])
+                except Exception:
+                    continue
+                MonthlyRollup.add_amounts(
+                    increments, month, txn.get('type'), txn.get('category'),
+                    sign * float(txn.get('amount') or 0), sign
+                )
+        
+        if not increments:
+            return 0
+        
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {'user_id': user_id, 'month': month},
+                {'$inc': dict(fields), '$set': {'updated_at': now}},
+                upsert=True
+            )
+            for month, fields in increments.items()
+        ]
+        MonthlyRollup.collection.bulk_write(operations, ordered=False)
+        return len(operations)
+    
+    @staticmethod
+    def month_documents(increments):
+        """Month documents (without user_id) from accumulated increments, oldest first"""
+        documents = []
+        for month, fields in sorted(increments.items()):
+            doc = {'month': month, 'income': 0, 'expense': 0,
+                   'income_count': 0, 'expense_count': 0, 'categories': {}}
+            for path, value in fields.items():
+                if path.startswith('categories.'):
+                    _, category, field = path.split('.', 2)
+                    doc['categories'].setdefault(category, {})[field] = value
+                else:
+                    doc[path] = value
+            documents.append(doc)
+        return documents
+    
+    @staticmethod
+    def replace_user(user_id, increments):
+        """Replace all of a user's months with freshly computed ones"""
+        now = datetime.utcnow()
+        MonthlyRollup.collection.delete_many({'user_id': user_id})
+        documents = [
+            dict(doc, user_id=user_id, updated_at=now)
+            for doc in MonthlyRollup.month_documents(increments)
+        ]
+        if documents:
+            MonthlyRollup.collection.insert_many(documents)
+        return len(documents)
+    
+    @staticmethod
+    def find_by_user(user_id, start_month=None, end_month=None):
+        """User's months in order, amounts rounded to paise"""
+        query = {'user_id': user_id}
+        if start_month or end_month:
+            query['month'] = {}
+            if start_month:
+                query['month']['$gte'] = start_month
+            if end_month:
+                query['month']['$lte'] = end_month
+        
+        months = list(MonthlyRollup.collection.find(query, {'_id': 0, 'updated_at': 0}).sort('month', 1))
+        return MonthlyRollup.rounded(months)
+    
+    @staticmethod
+    def rounded(months):
+        """Month documents with count fields defaulted and amounts rounded to paise"""
+        for month in months:
+            for field in ('income', 'expense'):
+                month[field] = round(month.get(field, 0), 2)
+                month.setdefault(f'{field}_count', 0)
+            month.setdefault('categories', {})
+            for totals in month['categories'].values():
+                for field in ('income', 'expense'):
+                    if field in totals:
+                        totals[field] = round(totals[field], 2)
+        return months
@@ -1,9 +1,16 @@
 from datetime import datetime
 from app.config.database import mongo
+from pymongo import IndexModel
 
 class Notification:
     collection = mongo.db.notifications
     
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('user_id', 1), ('read', 1), ('created_at', -1)], name='user_read_created'),
+        IndexModel([('user_id', 1), ('source', 1), ('created_at', -1)], name='user_source_created')
+    ]
+    
     @staticmethod
     def create(user_id, data):
         notification = {
@@ -14,6 +21,11 @@ class Notification:
             'read': False,
             'created_at': datetime.utcnow()
         }
+        # Generated notifications say where they came from and carry their payload
+        if data.get('source'):
+            notification['source'] = data['source']
+        if data.get('alert'):
+            notification['alert'] = data['alert']
         result = Notification.collection.insert_one(notification)
         notification['_id'] = str(result.inserted_id)
         return notification
@@ -29,6 +41,16 @@ class Notification:
             n['_id'] = str(n['_id'])
         return notifications
     
+    @staticmethod
+    def find_alerts(user_id, since=None, limit=50):
+        """Alert payloads written by the alert evaluator, newest first"""
+        query = {'user_id': user_id, 'source': 'alerts'}
+        if since:
+            query['created_at'] = {'$gte': since}
+        
+        notifications = Notification.collection.find(query, {'alert': 1}).sort('created_at', -1).limit(limit)
+        return [n['alert'] for n in notifications if n.get('alert')]
+    
     @staticmethod
     def mark_as_read(notification_id, user_id):
         from bson import ObjectId
@@ -0,0 +1,28 @@
+from datetime import datetime
+from app.config.database import mongo
+from pymongo import IndexModel
+
+class RollupState:
+    """Per user: when their monthly rollups were last built from history (present = built)"""
+    collection = mongo.db.rollup_state
+    
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('user_id', 1)], name='user_unique', unique=True)
+    ]
+    
+    @staticmethod
+    def mark_built(user_id, months):
+        RollupState.collection.update_one(
+            {'user_id': user_id},
+            {'$set': {'built_at': datetime.utcnow(), 'months': months}},
+            upsert=True
+        )
+    
+    @staticmethod
+    def is_built(user_id):
+        return RollupState.collection.find_one({'user_id': user_id}, {'_id': 1}) is not None
+    
+    @staticmethod
+    def delete(user_id=None):
+        RollupState.collection.delete_many({'user_id': user_id} if user_id is not None else {})
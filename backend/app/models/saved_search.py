@@ -1,10 +1,16 @@
 from datetime import datetime
 from app.config.database import mongo
+from pymongo import IndexModel
 from bson import ObjectId
 
 class SavedSearch:
     collection = mongo.db.saved_searches
     
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('user_id', 1), ('created_at', -1)], name='user_created')
+    ]
+    
     @staticmethod
     def create(user_id, data):
         """Create a new saved search"""
@@ -32,6 +38,7 @@ class SavedSearch:
                 search['created_at'] = search['created_at'].isoformat()
             if isinstance(search.get('last_used'), datetime):
                 search['last_used'] = search['last_used'].isoformat()
+            search['snapshot'] = SavedSearch._snapshot_info(search.get('snapshot'))
         
         return searches
     
@@ -63,6 +70,22 @@ class SavedSearch:
             }
         )
     
+    @staticmethod
+    def save_snapshot(search_id, snapshot):
+        """Store the materialized result snapshot of a saved search"""
+        SavedSearch.collection.update_one(
+            {'_id': ObjectId(search_id)},
+            {'$set': {'snapshot': snapshot}}
+        )
+    
+    @staticmethod
+    def mark_snapshots_stale(user_id=None):
+        """Flag snapshots for a full rebuild (after updates/deletes, which _id deltas can't see)"""
+        query = {'snapshot': {'$type': 'object'}}
+        if user_id is not None:
+            query['user_id'] = user_id
+        SavedSearch.collection.update_many(query, {'$set': {'snapshot.stale': True}})
+    
     @staticmethod
     def update(search_id, user_id, data):
         """Update a saved search"""
@@ -75,9 +98,13 @@ class SavedSearch:
         
         update_data['updated_at'] = datetime.utcnow()
         
+        update = {'$set': update_data}
+        if 'filters' in data:
+            update['$unset'] = {'snapshot': ''}
+        
         result = SavedSearch.collection.update_one(
             {'_id': ObjectId(search_id), 'user_id': user_id},
-            {'$set': update_data}
+            update
         )
         
         return result.modified_count > 0
@@ -89,4 +116,15 @@ class SavedSearch:
             '_id': ObjectId(search_id),
             'user_id': user_id
         })
-        return result.deleted_count > 0
\ No newline at end of file
+        return result.deleted_count > 0
+    
+    @staticmethod
+    def _snapshot_info(snapshot):
+        """Snapshot as returned to clients: summary and freshness, without the id list"""
+        if not snapshot:
+            return None
+        return {
+            'summary': snapshot['summary'],
+            'refreshed_at': snapshot['refreshed_at'].isoformat(),
+            'stale': snapshot.get('stale', False)
+        }
\ No newline at end of file
@@ -1,10 +1,17 @@
 from datetime import datetime
 from app.config.database import mongo
+from pymongo import IndexModel
 from bson import ObjectId
 
 class StatementUpload:
     collection = mongo.db.statement_uploads
     
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('user_id', 1), ('file_hash', 1)], name='user_file_hash_unique', unique=True),
+        IndexModel([('user_id', 1), ('uploaded_at', -1)], name='user_uploaded')
+    ]
+    
     @staticmethod
     def create(user_id, data):
         statement = {
@@ -0,0 +1,92 @@
+from datetime import datetime
+from app.config.database import mongo
+from pymongo import IndexModel
+
+class Subscription:
+    """A detected recurring expense series: merchant key, cadence, amount band and expected dates"""
+    collection = mongo.db.subscriptions
+    
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        # Listing and upcoming bills are ranges on next_expected
+        IndexModel([('user_id', 1), ('next_expected', 1)], name='user_next_expected'),
+        # The incremental updater looks up a new transaction's series by merchant key
+        IndexModel([('user_id', 1), ('merchant_key', 1)], name='user_merchant')
+    ]
+    
+    @staticmethod
+    def document(user_id, series):
+        """Stored form of a RecurringDetector.detect_series entry"""
+        now = datetime.utcnow()
+        return {
+            'user_id': user_id,
+            'merchant_key': series['merchant_key'],
+            'description': series['description'],
+            'category': series['category'],
+            'cadence': series['cadence'],
+            'amount_min': series['amount_min'],
+            'amount_max': series['amount_max'],
+            'amount_total': series['avg_amount'] * series['occurrences'],
+            'occurrences': series['occurrences'],
+            'first_date': series['first_date'],
+            'last_date': series['last_date'],
+            'next_expected': series['next_expected'],
+            'created_at': now,
+            'updated_at': now
+        }
+    
+    @staticmethod
+    def create(user_id, series):
+        subscription = Subscription.document(user_id, series)
+        result = Subscription.collection.insert_one(subscription)
+        subscription['_id'] = result.inserted_id
+        return subscription
+    
+    @staticmethod
+    def replace_user(user_id, series):
+        """Replace all of a user's subscriptions with freshly detected series"""
+        Subscription.collection.delete_many({'user_id': user_id})
+        documents = [Subscription.document(user_id, s) for s in series]
+        if documents:
+            Subscription.collection.insert_many(documents)
+        return len(documents)
+    
+    @staticmethod
+    def find_by_keys(user_id, merchant_keys):
+        return list(Subscription.collection.find({'user_id': user_id, 'merchant_key': {'$in': list(merchant_keys)}}))
+    
+    @staticmethod
+    def find_by_user(user_id, due_from=None, due_until=None):
+        """User's subscriptions by next expected date (optionally only those due in a range)"""
+        query = {'user_id': user_id}
+        if due_from or due_until:
+            query['next_expected'] = {}
+            if due_from:
+                query['next_expected']['$gte'] = due_from
+            if due_until:
+                query['next_expected']['$lte'] = due_until
+        
+        subscriptions = list(Subscription.collection.find(query).sort('next_expected', 1))
+        for s in subscriptions:
+            s['_id'] = str(s['_id'])
+            s['avg_amount'] = round(s.pop('amount_total') / s['occurrences'], 2) if s['occurrences'] else 0
+        return subscriptions
+    
+    @staticmethod
+    def record_payment(subscription, date, amount, description, next_expected):
+        """Count a matched payment; the newest payment moves last_date and next_expected"""
+        update = {
+            '$inc': {'occurrences': 1, 'amount_total': amount},
+            '$min': {'amount_min': amount, 'first_date': date},
+            '$max': {'amount_max': amount},
+            '$set': {'updated_at': datetime.utcnow()}
+        }
+        newer = dict(update, **{'$set': dict(update['$set'], last_date=date,
+                                             next_expected=next_expected, description=description)})
+        result = Subscription.collection.update_one({'_id': subscription['_id'], 'last_date': {'$lt': date}}, newer)
+        if not result.matched_count:
+            Subscription.collection.update_one({'_id': subscription['_id']}, update)
+    
+    @staticmethod
+    def delete(user_id=None):
+        Subscription.collection.delete_many({'user_id': user_id} if user_id is not None else {})
@@ -0,0 +1,51 @@
+from datetime import datetime
+from app.config.database import mongo
+from pymongo import IndexModel, ReturnDocument
+
+class SubscriptionCandidate:
+    """Per user and merchant key: recent expenses not (yet) part of a subscription, oldest first"""
+    collection = mongo.db.subscription_candidates
+    
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('user_id', 1), ('merchant_key', 1)], name='user_merchant_unique', unique=True)
+    ]
+    
+    @staticmethod
+    def push(user_id, merchant_key, transactions, limit):
+        """Append to a merchant's buffer, keeping its newest `limit` rows; returns the buffer"""
+        return SubscriptionCandidate.collection.find_one_and_update(
+            {'user_id': user_id, 'merchant_key': merchant_key},
+            {
+                '$push': {'transactions': {'$each': transactions, '$sort': {'date': 1}, '$slice': -limit}},
+                '$set': {'updated_at': datetime.utcnow()}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )['transactions']
+    
+    @staticmethod
+    def remove(user_id, merchant_key, transaction_ids):
+        """Take rows out of a buffer by transaction id; an emptied buffer is dropped"""
+        SubscriptionCandidate.collection.update_one(
+            {'user_id': user_id, 'merchant_key': merchant_key},
+            {'$pull': {'transactions': {'id': {'$in': list(transaction_ids)}}}}
+        )
+        SubscriptionCandidate.collection.delete_one({'user_id': user_id, 'merchant_key': merchant_key, 'transactions': []})
+    
+    @staticmethod
+    def replace_user(user_id, buffers):
+        """Replace all of a user's buffers ({merchant key: rows})"""
+        now = datetime.utcnow()
+        SubscriptionCandidate.collection.delete_many({'user_id': user_id})
+        documents = [
+            {'user_id': user_id, 'merchant_key': key, 'transactions': rows, 'updated_at': now}
+            for key, rows in buffers.items() if rows
+        ]
+        if documents:
+            SubscriptionCandidate.collection.insert_many(documents)
+        return len(documents)
+    
+    @staticmethod
+    def delete(user_id=None):
+        SubscriptionCandidate.collection.delete_many({'user_id': user_id} if user_id is not None else {})
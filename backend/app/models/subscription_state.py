@@ -0,0 +1,28 @@
+from datetime import datetime
+from app.config.database import mongo
+from pymongo import IndexModel
+
+class SubscriptionState:
+    """Per user: when their subscriptions were last detected from history (present = built)"""
+    collection = mongo.db.subscription_state
+    
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('user_id', 1)], name='user_unique', unique=True)
+    ]
+    
+    @staticmethod
+    def mark_built(user_id, subscriptions):
+        SubscriptionState.collection.update_one(
+            {'user_id': user_id},
+            {'$set': {'built_at': datetime.utcnow(), 'subscriptions': subscriptions}},
+            upsert=True
+        )
+    
+    @staticmethod
+    def is_built(user_id):
+        return SubscriptionState.collection.find_one({'user_id': user_id}, {'_id': 1}) is not None
+    
+    @staticmethod
+    def delete(user_id=None):
+        SubscriptionState.collection.delete_many({'user_id': user_id} if user_id is not None else {})
@@ -1,26 +1,102 @@
 from datetime import datetime
 from app.config.database import mongo
 from bson import ObjectId
+from pymongo import IndexModel, UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
 import re
+from app.services import transaction_events
+from app.services.text_search import tokenize
+from app.services.transaction_import import parse_transaction_date
 
 class Transaction:
     collection = mongo.db.transactions
     
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        # _id last so search's (sort field, _id) keyset pages are served in index order
+        IndexModel([('user_id', 1), ('date', -1), ('_id', -1)], name='user_date_id'),
+        IndexModel([('user_id', 1), ('amount', -1), ('_id', -1)], name='user_amount_id'),
+        IndexModel([('user_id', 1), ('category', 1), ('date', -1), ('_id', -1)], name='user_category_date_id'),
+        IndexModel([('user_id', 1), ('type', 1), ('date', -1), ('_id', -1)], name='user_type_date_id'),
+        # Multikey: description search matches tokens instead of scanning with a regex
+        IndexModel([('user_id', 1), ('search_tokens', 1)], name='user_search_tokens'),
+        IndexModel(
+            [('user_id', 1), ('fingerprint', 1)],
+            name='user_fingerprint_unique',
+            unique=True,
+            # Manual entries and rows without a fingerprint are exempt
+            partialFilterExpression={'fingerprint': {'$type': 'string'}}
+        )
+    ]
+    
     @staticmethod
-    def create(user_id, data):
+    def build(user_id, data):
+        """Document for a new transaction (not inserted)"""
         transaction = {
             'user_id': user_id,
             'amount': float(data['amount']),
             'category': data['category'],
             'description': data.get('description', ''),
-            'date': data.get('date', datetime.utcnow()),
+            'search_tokens': tokenize(data.get('description', '')),
+            # Always a real date: search pages and range queries compare it as one
+            'date': parse_transaction_date(data['date']) if data.get('date') else datetime.utcnow(),
             'type': data['type'],
+            'source': data.get('source', 'manual'),  # manual or statement
             'created_at': datetime.utcnow()
         }
+        if data.get('bank_id'):
+            transaction['bank_id'] = data['bank_id']
+        if data.get('fingerprint'):
+            transaction['fingerprint'] = data['fingerprint']
+        return transaction
+    
+    @staticmethod
+    def create(user_id, data):
+        transaction = Transaction.build(user_id, data)
         result = Transaction.collection.insert_one(transaction)
+        transaction_events.publish(transaction_events.INSERTED, user_id, [dict(transaction)])
         transaction['_id'] = str(result.inserted_id)
+        transaction['date'] = transaction['date'].isoformat()
         return transaction
     
+    @staticmethod
+    def bulk_upsert(documents):
+        """Insert documents whose (user_id, fingerprint) isn't stored yet, in one unordered batch.
+        
+        Returns (inserted, already_present). The unique index makes this safe
+        against concurrent imports of overlapping statements.
+        """
+        if not documents:
+            return 0, 0
+        
+        operations = [
+            UpdateOne(
+                {'user_id': doc['user_id'], 'fingerprint': doc['fingerprint']},
+                {'$setOnInsert': doc},
+                upsert=True
+            )
+            for doc in documents
+        ]
+        try:
+            result = Transaction.collection.bulk_write(operations, ordered=False)
+            upserted = result.upserted_ids
+        except BulkWriteError as e:
+            # A concurrent import won the race for these keys (E11000): they're duplicates too
+            errors = e.details.get('writeErrors', [])
+            others = [err for err in errors if err.get('code') != 11000]
+            if others:
+                print(f"⚠️ {len(others)} transactions failed to insert: {others[0].get('errmsg')}")
+            upserted = {u['index']: u['_id'] for u in e.details.get('upserted', [])}
+        
+        inserted = [dict(documents[index], _id=_id) for index, _id in upserted.items()]
+        for user_id in {doc['user_id'] for doc in inserted}:
+            transaction_events.publish(
+                transaction_events.INSERTED,
+                user_id,
+                [doc for doc in inserted if doc['user_id'] == user_id]
+            )
+        return len(inserted), len(documents) - len(inserted)
+    
     @staticmethod
     def find_by_user(user_id, limit=100):
         transactions = list(Transaction.collection.find({'user_id': user_id}).sort('date', -1).limit(limit))
@@ -126,8 +202,10 @@ class Transaction:
     
     @staticmethod
     def delete(transaction_id, user_id):
-        result = Transaction.collection.delete_one({'_id': ObjectId(transaction_id), 'user_id': user_id})
-        return result.deleted_count > 0
+        deleted = Transaction.collection.find_one_and_delete({'_id': ObjectId(transaction_id), 'user_id': user_id})
+        if deleted:
+            transaction_events.publish(transaction_events.DELETED, user_id, [deleted])
+        return deleted is not None
     
     @staticmethod
     def update(transaction_id, user_id, data):
@@ -138,18 +216,24 @@ class Transaction:
             update_data['amount'] = float(data['amount'])
         if 'category' in data:
             update_data['category'] = data['category']
+            # Keep bulk recategorization away from a category the user picked
+            update_data['category_locked'] = True
         if 'description' in data:
             update_data['description'] = data['description']
+            update_data['search_tokens'] = tokenize(data['description'])
         if 'date' in data:
-            update_data['date'] = data['date']
+            update_data['date'] = parse_transaction_date(data['date'])
         if 'type' in data:
             update_data['type'] = data['type']
         
         update_data['updated_at'] = datetime.utcnow()
         
-        result = Transaction.collection.update_one(
+        before = Transaction.collection.find_one_and_update(
             {'_id': ObjectId(transaction_id), 'user_id': user_id},
-            {'$set': update_data}
+            {'$set': update_data},
+            return_document=ReturnDocument.BEFORE
         )
         
-        return result.modified_count > 0
\ No newline at end of file
+        if before:
+            transaction_events.publish(transaction_events.UPDATED, user_id, [(before, dict(before, **update_data))])
+        return before is not None
\ No newline at end of file
@@ -1,10 +1,16 @@
 from datetime import datetime
 from app.config.database import mongo
+from pymongo import IndexModel
 import bcrypt
 
 class User:
     collection = mongo.db.users
     
+    # Applied by app.config.schema (at startup or: python manage_db.py indexes)
+    indexes = [
+        IndexModel([('email', 1)], name='email_unique', unique=True)
+    ]
+    
     @staticmethod
     def create(data):
         hashed_password = bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt())
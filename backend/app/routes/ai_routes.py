@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.ml_models.expense_predictor import ExpensePredictor
 from app.ai_agents.financial_advisor import FinancialAdvisor
 from app.models.transaction import Transaction
+from app.services.frame_cache import get_frame_cache
 import os
 
 bp = Blueprint('ai', __name__)
@@ -16,7 +17,7 @@ advisor = FinancialAdvisor(os.getenv('OPENAI_API_KEY'))
 def get_predictions():
     try:
         current_user = get_jwt_identity()
-        transactions = Transaction.find_by_user(current_user)
+        transactions = get_frame_cache().get(current_user).head(100)
         
         if len(transactions) < 7:
             return jsonify({
@@ -1,9 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.transaction import Transaction
 from app.ml_models.budget_optimizer import BudgetOptimizer
-from datetime import datetime, timedelta
-import calendar
+from app.services import analytics, alert_stream, subscriptions
 
 bp = Blueprint('analytics', __name__)
 
@@ -12,52 +10,42 @@ bp = Blueprint('analytics', __name__)
 def get_spending_trends():
     try:
         current_user = get_jwt_identity()
-        transactions = Transaction.find_by_user(current_user, limit=1000)
-        
-        # Group by month
-        monthly_data = {}
-        for txn in transactions:
-            try:
-                date = datetime.fromisoformat(txn['date'].replace('Z', '+00:00'))
-                month_key = f"{date.year}-{date.month:02d}"
-                
-                if month_key not in monthly_data:
-                    monthly_data[month_key] = {
-                        'month': calendar.month_name[date.month],
-                        'year': date.year,
-                        'income': 0,
-                        'expense': 0,
-                        'categories': {}
-                    }
-                
-                if txn['type'] == 'income':
-                    monthly_data[month_key]['income'] += txn['amount']
-                else:
-                    monthly_data[month_key]['expense'] += txn['amount']
-                    cat = txn.get('category', 'Other')
-                    monthly_data[month_key]['categories'][cat] = \
-                        monthly_data[month_key]['categories'].get(cat, 0) + txn['amount']
-            except:
-                continue
-        
-        # Sort by date
-        sorted_data = sorted(monthly_data.items(), key=lambda x: x[0])
-        result = [data for _, data in sorted_data[-12:]]  # Last 12 months
+        
+        start, end = analytics.date_range(request.args)
+        result = analytics.spending_trends(current_user, start, end)
         
         return jsonify(result), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/category-breakdown', methods=['GET'])
+@jwt_required()
+def get_category_breakdown():
+    """Income/expense per category between start_date and end_date, or over the last `months` months with activity (default 12)"""
+    try:
+        current_user = get_jwt_identity()
+        months = min(max(1, int(request.args.get('months', analytics.DEFAULT_MONTHS))), 120)
+        start, end = analytics.date_range(request.args)
+        summary = analytics.period_summary(current_user, start, end, months)
+        
+        return jsonify({
+            'months': summary['months'],
+            'categories': analytics.category_breakdown(summary)
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('/budget-recommendations', methods=['GET'])
 @jwt_required()
 def get_budget_recommendations():
     try:
         current_user = get_jwt_identity()
-        transactions = Transaction.find_by_user(current_user, limit=500)
+        start, end = analytics.date_range(request.args)
+        summary = analytics.period_summary(current_user, start, end)
         
         optimizer = BudgetOptimizer()
-        analysis = optimizer.analyze_spending_pattern(transactions)
-        suggestions = optimizer.get_smart_suggestions(transactions)
+        analysis = optimizer.analyze_totals(summary['total_income'], summary['total_expense'], summary['category_spending'])
+        suggestions = optimizer.get_smart_suggestions(analysis=analysis)
         
         return jsonify({
             'analysis': analysis,
@@ -71,10 +59,11 @@ def get_budget_recommendations():
 def get_financial_health_score():
     try:
         current_user = get_jwt_identity()
-        transactions = Transaction.find_by_user(current_user, limit=500)
         
-        total_income = sum(t['amount'] for t in transactions if t['type'] == 'income')
-        total_expense = sum(t['amount'] for t in transactions if t['type'] == 'expense')
+        start, end = analytics.date_range(request.args)
+        summary = analytics.period_summary(current_user, start, end)
+        total_income = summary['total_income']
+        total_expense = summary['total_expense']
         
         if total_income == 0:
             return jsonify({'score': 0, 'grade': 'N/A', 'message': 'No income data'}), 200
@@ -100,10 +89,10 @@ def get_financial_health_score():
             factors.append({'name': 'Savings Rate', 'points': 10, 'status': 'Poor'})
         
         # Transaction tracking (20 points)
-        if len(transactions) > 50:
+        if summary['count'] > 50:
             score += 20
             factors.append({'name': 'Regular Tracking', 'points': 20, 'status': 'Excellent'})
-        elif len(transactions) > 20:
+        elif summary['count'] > 20:
             score += 15
             factors.append({'name': 'Regular Tracking', 'points': 15, 'status': 'Good'})
         else:
@@ -111,7 +100,7 @@ def get_financial_health_score():
             factors.append({'name': 'Regular Tracking', 'points': 10, 'status': 'Fair'})
         
         # Category diversification (20 points)
-        categories = set(t.get('category') for t in transactions if t['type'] == 'expense')
+        categories = set(summary['category_spending'])
         if len(categories) >= 5:
             score += 20
             factors.append({'name': 'Expense Categories', 'points': 20, 'status': 'Diverse'})
@@ -124,7 +113,7 @@ def get_financial_health_score():
         
         # Budget adherence (20 points)
         optimizer = BudgetOptimizer()
-        analysis = optimizer.analyze_spending_pattern(transactions)
+        analysis = optimizer.analyze_totals(total_income, total_expense, summary['category_spending'])
         overspending_count = sum(1 for r in analysis['recommendations'].values() if r['status'] == 'over')
         
         if overspending_count == 0:
@@ -166,18 +155,10 @@ def get_financial_health_score():
 def get_savings_suggestions():
     try:
         current_user = get_jwt_identity()
-        transactions = Transaction.find_by_user(current_user, limit=500)
-        
-        # Analyze spending patterns
-        total_income = sum(t['amount'] for t in transactions if t['type'] == 'income')
-        total_expense = sum(t['amount'] for t in transactions if t['type'] == 'expense')
-        
-        # Category spending
-        category_spending = {}
-        for t in transactions:
-            if t['type'] == 'expense':
-                cat = t.get('category', 'Other')
-                category_spending[cat] = category_spending.get(cat, 0) + t['amount']
+        start, end = analytics.date_range(request.args)
+        summary = analytics.period_summary(current_user, start, end)
+        total_expense = summary['total_expense']
+        category_spending = summary['category_spending']
         
         suggestions = []
         
@@ -185,7 +166,7 @@ def get_savings_suggestions():
         for category, amount in sorted(category_spending.items(), key=lambda x: x[1], reverse=True):
             percentage = (amount / total_expense * 100) if total_expense > 0 else 0
             
-            if category == 'Food & Groceries' and percentage > 25:
+            if category == 'Food & Dining' and percentage > 25:
                 suggestions.append({
                     'category': category,
                     'current_spend': amount,
@@ -238,12 +219,29 @@ def get_savings_suggestions():
 def get_alerts():
     try:
         current_user = get_jwt_identity()
-        transactions = Transaction.find_by_user(current_user, limit=500)
         
-        from app.ml_models.alert_system import AlertSystem
-        alert_system = AlertSystem()
-        alerts = alert_system.analyze_transactions(transactions)
+        # Alerts are evaluated as transactions are written; this reads the notifications
+        if not alert_stream.has_stats(current_user):
+            # Statistics not built yet: replay recent transactions through the same rule
+            alert_stream.bootstrap_alerts(current_user)
+        alerts = alert_stream.recent_alerts(current_user)
         
         return jsonify(alerts), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+@bp.route('/recurring', methods=['GET'])
+@jwt_required()
+def get_recurring():
+    """Detected subscriptions and recurring bills, with those due in the next `days` days (default 30)"""
+    try:
+        current_user = get_jwt_identity()
+        days = min(max(1, int(request.args.get('days', subscriptions.UPCOMING_DAYS))), 366)
+        
+        # Kept current as transactions are written; built from history on first use
+        if not subscriptions.has_subscriptions(current_user):
+            subscriptions.rebuild_subscriptions(current_user)
+        
+        return jsonify(subscriptions.overview(current_user, days)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -2,9 +2,10 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.bank import Bank
 from app.models.statement_upload import StatementUpload
-from app.models.transaction import Transaction
-from app.ml_models.statement_extractor import StatementExtractor
+from app.models.ingestion_job import IngestionJob
+from app.ml_models.extraction_cache import hash_stream
 import os
+import uuid
 from werkzeug.utils import secure_filename
 
 bp = Blueprint('banks', __name__)
@@ -56,23 +57,15 @@ def upload_statement():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Only PDF files are allowed'}), 400
         
-        # Save file temporarily
+        # Save file temporarily, hashing it on the way to disk
         filename = secure_filename(file.filename)
-        filepath = os.path.join(UPLOAD_FOLDER, f"{current_user}_{filename}")
-        file.save(filepath)
+        filepath = os.path.join(UPLOAD_FOLDER, f"{current_user}_{uuid.uuid4().hex[:8]}_{filename}")
+        file_hash = hash_stream(file.stream, filepath)
         
         print(f"📁 Saved file to: {filepath}")
         
-        # Extract data from PDF
-        extractor = StatementExtractor()
-        result = extractor.extract_from_pdf(filepath)
-        
-        if not result['success']:
-            os.remove(filepath)
-            return jsonify({'error': result['error']}), 400
-        
-        # Check for duplicate upload
-        existing = StatementUpload.find_by_hash(current_user, result['file_hash'])
+        # Check for duplicate upload before any PDF parsing
+        existing = StatementUpload.find_by_hash(current_user, file_hash)
         if existing:
             os.remove(filepath)
             return jsonify({
@@ -81,89 +74,31 @@ def upload_statement():
                 'uploaded_at': existing['uploaded_at']
             }), 200
         
-        bank_info = result['bank_info']
-        transactions = result['transactions']
-        
-        print(f"✅ Extracted {len(transactions)} transactions")
-        print(f"🏦 Bank: {bank_info.get('bank_name')}")
-        print(f"💰 Opening Balance: {bank_info.get('opening_balance')}")
-        print(f"💰 Closing Balance: {bank_info.get('closing_balance')}")
-        
-        # Find or create bank account
-        bank = None
-        account_to_match = bank_info.get('full_account_number') or bank_info.get('account_number')
-        
-        if account_to_match:
-            bank = Bank.find_by_account(current_user, account_to_match)
-        
-        if not bank and bank_info['bank_name']:
-            # Create new bank account
-            bank = Bank.create(current_user, {
-                'bank_name': bank_info['bank_name'],
-                'account_number': bank_info.get('account_number', 'Unknown'),
-                'account_type': 'Savings',
-                'balance': bank_info.get('closing_balance', 0),
-                'is_active': True
-            })
-            print(f"✨ Created new bank account: {bank.get('_id')}")
-        elif bank:
-            # Update existing bank balance
-            Bank.update_balance(str(bank['_id']), bank_info.get('closing_balance', bank.get('balance', 0)))
-            print(f"🔄 Updated bank balance")
-        
-        # Add transactions
-        added_count = 0
-        skipped_count = 0
-        
-        for txn in transactions:
-            try:
-                # Check if transaction already exists to avoid duplicates
-                existing_txn = Transaction.find_duplicate(
-                    current_user,
-                    txn['date'],
-                    txn['amount'],
-                    txn['description'][:50]
-                )
-                
-                if existing_txn:
-                    skipped_count += 1
-                    continue
-                
-                Transaction.create(current_user, txn)
-                added_count += 1
-            except Exception as e:
-                print(f"⚠️ Error adding transaction: {e}")
-                skipped_count += 1
-        
-        print(f"✅ Added {added_count} new transactions")
-        print(f"⏭️ Skipped {skipped_count} duplicate transactions")
-        
-        # Record statement upload
-        StatementUpload.create(current_user, {
-            'bank_id': str(bank['_id']) if bank else None,
+        # Already queued or running for this file: hand back that job
+        active_job = IngestionJob.find_active_by_hash(current_user, file_hash)
+        if active_job:
+            os.remove(filepath)
+            return jsonify({
+                'message': 'This statement is already being processed',
+                'job_id': active_job['_id'],
+                'status': active_job['status'],
+                'duplicate': False
+            }), 202
+        
+        # Parsing and importing happen in the ingestion workers
+        job = IngestionJob.create(current_user, {
             'filename': filename,
-            'file_hash': result['file_hash'],
-            'statement_date': bank_info.get('statement_date'),
-            'transactions_count': added_count
+            'filepath': os.path.abspath(filepath),
+            'file_hash': file_hash
         })
-        
-        # Clean up file
-        os.remove(filepath)
+        print(f"📥 Queued ingestion job {job['_id']}")
         
         return jsonify({
-            'message': 'Statement processed successfully',
-            'bank_info': {
-                'bank_name': bank_info.get('bank_name'),
-                'account_number': bank_info.get('account_number'),
-                'customer_name': bank_info.get('customer_name'),
-                'opening_balance': bank_info.get('opening_balance'),
-                'closing_balance': bank_info.get('closing_balance'),
-            },
-            'transactions_added': added_count,
-            'transactions_skipped': skipped_count,
-            'total_extracted': len(transactions),
+            'message': 'Statement queued for processing',
+            'job_id': job['_id'],
+            'status': job['status'],
             'duplicate': False
-        }), 200
+        }), 202
         
     except Exception as e:
         import traceback
@@ -177,5 +112,17 @@ def get_statements():
         current_user = get_jwt_identity()
         statements = StatementUpload.find_by_user(current_user)
         return jsonify(statements), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    try:
+        current_user = get_jwt_identity()
+        job = IngestionJob.get_by_id(job_id, current_user)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
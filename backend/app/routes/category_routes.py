@@ -0,0 +1,76 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.category_rule import CategoryRule
+from app.ml_models.categorizer import DEFAULT_CATEGORY_RULES
+from app.services.category_rules import get_rule_index
+
+bp = Blueprint('categories', __name__)
+
+@bp.route('', methods=['GET'])
+@jwt_required()
+def get_categories():
+    try:
+        categories = [category for category, _ in DEFAULT_CATEGORY_RULES]
+        categories += ['Transfer', 'Other']
+        return jsonify(categories), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/rules', methods=['GET'])
+@jwt_required()
+def get_rules():
+    try:
+        current_user = get_jwt_identity()
+        rules = CategoryRule.find_by_user(current_user)
+        return jsonify(rules), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/rules', methods=['POST'])
+@jwt_required()
+def create_rule():
+    try:
+        current_user = get_jwt_identity()
+        data = request.get_json()
+
+        if not data or not data.get('keyword', '').strip() or not data.get('category'):
+            return jsonify({'error': 'keyword and category are required'}), 400
+
+        rule = CategoryRule.create(current_user, data)
+        get_rule_index().invalidate(current_user)
+        return jsonify(rule), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/rules/<rule_id>', methods=['PUT'])
+@jwt_required()
+def update_rule(rule_id):
+    try:
+        current_user = get_jwt_identity()
+        data = request.get_json() or {}
+
+        if 'keyword' in data and not data['keyword'].strip():
+            return jsonify({'error': 'keyword cannot be empty'}), 400
+
+        updated = CategoryRule.update(rule_id, current_user, data)
+        if not updated:
+            return jsonify({'error': 'Rule not found'}), 404
+
+        get_rule_index().invalidate(current_user)
+        return jsonify({'message': 'Rule updated successfully'}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/rules/<rule_id>', methods=['DELETE'])
+@jwt_required()
+def delete_rule(rule_id):
+    try:
+        current_user = get_jwt_identity()
+        deleted = CategoryRule.delete(rule_id, current_user)
+        if not deleted:
+            return jsonify({'error': 'Rule not found'}), 404
+
+        get_rule_index().invalidate(current_user)
+        return jsonify({'message': 'Rule deleted successfully'}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,339 @@
+import math
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from app.services import transaction_events
+
+# z-score of a log amount against the running mean/std that writes a notification
+Z_THRESHOLD = float(os.getenv('ALERT_Z_THRESHOLD', 3.0))
+
+# A category (or the daily series) needs this many values before it can alert
+MIN_SAMPLES = 5
+
+# Day totals stay open (still accumulating) this many days behind the newest
+# day seen; older days are folded into the daily statistics
+OPEN_DAYS = 7
+
+# Older transactions (e.g. from an imported statement) update the statistics without notifying
+MAX_ALERT_AGE_DAYS = 30
+
+# Alerts shown by the alerts endpoint
+ALERT_HISTORY_DAYS = 90
+
+SAVE_RETRIES = 5
+
+
+def empty_accumulator():
+    return {'n': 0, 'mean': 0.0, 'm2': 0.0}
+
+
+def empty_stats():
+    return {'categories': {}, 'daily': empty_accumulator(), 'days': {}, 'latest_day': None}
+
+
+def welford_add(acc, x):
+    acc['n'] += 1
+    delta = x - acc['mean']
+    acc['mean'] += delta / acc['n']
+    acc['m2'] += delta * (x - acc['mean'])
+
+
+def welford_remove(acc, x):
+    """Undo welford_add(acc, x)"""
+    if acc['n'] <= 1:
+        acc.update(empty_accumulator())
+        return
+    delta = x - acc['mean']
+    acc['mean'] -= delta / (acc['n'] - 1)
+    acc['m2'] = max(acc['m2'] - delta * (x - acc['mean']), 0.0)
+    acc['n'] -= 1
+
+
+def accumulator_of(values):
+    """The accumulator welford_add would reach over values (a NumPy array)"""
+    if not len(values):
+        return empty_accumulator()
+    mean = float(values.mean())
+    return {'n': int(len(values)), 'mean': mean, 'm2': float(((values - mean) ** 2).sum())}
+
+
+def merge_accumulators(a, b):
+    """Accumulator of the union of two value sets (Chan et al.)"""
+    n = a['n'] + b['n']
+    if not n:
+        return empty_accumulator()
+    delta = b['mean'] - a['mean']
+    return {
+        'n': n,
+        'mean': a['mean'] + delta * b['n'] / n,
+        'm2': a['m2'] + b['m2'] + delta * delta * a['n'] * b['n'] / n
+    }
+
+
+def z_score(acc, x):
+    """x against the accumulator's mean and sample std; None until MIN_SAMPLES values"""
+    if acc['n'] < MIN_SAMPLES:
+        return None
+    std = math.sqrt(acc['m2'] / (acc['n'] - 1))
+    if std == 0:
+        return math.inf if x > acc['mean'] + 1e-9 else 0.0
+    return (x - acc['mean']) / std
+
+
+def log_amount(amount):
+    return math.log1p(max(float(amount or 0), 0.0))
+
+
+def _day(date):
+    if not isinstance(date, datetime):
+        from app.services.transaction_import import parse_transaction_date
+        date = parse_transaction_date(date)
+    return date.strftime('%Y-%m-%d')
+
+
+def _shift_day(day, days):
+    return (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def _fold_closed_days(stats):
+    """Move day totals older than the open window into the daily statistics"""
+    cutoff = _shift_day(stats['latest_day'], -OPEN_DAYS)
+    for day in [d for d in stats['days'] if d < cutoff]:
+        welford_add(stats['daily'], log_amount(stats['days'].pop(day)['total']))
+    return cutoff
+
+
+def _expenses(documents):
+    """(day key, amount, category key) of the expense documents, oldest first"""
+    from app.models.monthly_rollup import MonthlyRollup
+
+    rows = []
+    for txn in documents:
+        if txn.get('type') != 'expense':
+            continue
+        try:
+            day = _day(txn['date'])
+        except Exception:
+            continue
+        rows.append((day, float(txn.get('amount') or 0), MonthlyRollup.category_key(txn.get('category'))))
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+
+def add_transactions(stats, documents, now=None):
+    """Fold inserted documents into stats; returns the alerts they trigger.
+
+    Alerts are {'type': 'high_spending', 'date', ...} for a day total and
+    {'type': 'unusual_transaction', 'category', 'amount', ...} for a single
+    expense, each with severity, message and suggestion.
+
+    Each transaction is scored against its category before being added,
+    and its day's running total against the closed days. A day alerts at
+    most once. Transactions older than MAX_ALERT_AGE_DAYS only update
+    the statistics, as do days already folded (they count per category).
+    """
+    now = now or datetime.utcnow()
+    oldest_alerting = (now - timedelta(days=MAX_ALERT_AGE_DAYS)).strftime('%Y-%m-%d')
+    alerts = []
+
+    for day, amount, category in _expenses(documents):
+        x = log_amount(amount)
+        alerting = day >= oldest_alerting
+
+        acc = stats['categories'].setdefault(category, empty_accumulator())
+        z = z_score(acc, x)
+        if alerting and z is not None and z > Z_THRESHOLD:
+            alerts.append({
+                'type': 'unusual_transaction',
+                'severity': 'info',
+                'category': category,
+                'amount': amount,
+                'message': f'Large {category} expense: ₹{amount:.2f}',
+                'suggestion': 'Was this expected? Consider if this could be reduced next time'
+            })
+        welford_add(acc, x)
+
+        if stats['latest_day'] is None or day > stats['latest_day']:
+            stats['latest_day'] = day
+        if day < _fold_closed_days(stats):
+            continue
+
+        entry = stats['days'].setdefault(day, {'total': 0.0, 'notified': False})
+        entry['total'] += amount
+        z = z_score(stats['daily'], log_amount(entry['total']))
+        if alerting and not entry['notified'] and z is not None and z > Z_THRESHOLD:
+            entry['notified'] = True
+            date = datetime.strptime(day, '%Y-%m-%d')
+            alerts.append({
+                'type': 'high_spending',
+                'severity': 'warning',
+                'date': day,
+                'message': f'High spending detected on {date.strftime("%d %b")}: ₹{entry["total"]:.2f}',
+                'suggestion': 'Review your expenses for this day and identify unnecessary purchases'
+            })
+
+    return alerts
+
+
+def remove_transactions(stats, documents):
+    """Take deleted (or pre-update) documents back out; days already folded keep their totals"""
+    for day, amount, category in _expenses(documents):
+        acc = stats['categories'].get(category)
+        if acc and acc['n']:
+            welford_remove(acc, log_amount(amount))
+        if day in stats['days']:
+            stats['days'][day]['total'] = max(stats['days'][day]['total'] - amount, 0.0)
+
+
+def stats_from_history(user_id, frame=None):
+    """Statistics over a user's whole history, or over `frame` (vectorized over a TransactionFrame)"""
+    from app.ml_models.transaction_frame import TransactionFrame
+    from app.models.monthly_rollup import MonthlyRollup
+
+    stats = empty_stats()
+    frame = frame if frame is not None else TransactionFrame.load(user_id)
+    expense = frame.is_expense & ~np.isnat(frame.dates)
+    amounts = frame.amounts[expense]
+    if not len(amounts):
+        return stats
+    log_amounts = np.log1p(np.maximum(amounts, 0))
+
+    # Aliases share a category key; their accumulators are merged
+    codes = frame.category_codes[expense]
+    for code in np.unique(codes):
+        values = log_amounts[codes == code]
+        key = MonthlyRollup.category_key(frame.categories[code])
+        stats['categories'][key] = merge_accumulators(
+            stats['categories'].get(key, empty_accumulator()), accumulator_of(values)
+        )
+
+    day_numbers = frame.dates[expense].astype('datetime64[D]').astype(np.int64)
+    offsets = day_numbers - day_numbers.min()
+    spent = np.bincount(offsets) > 0
+    totals = np.bincount(offsets, weights=amounts)[spent]
+    days = [str(d) for d in (day_numbers.min() + np.flatnonzero(spent)).astype('datetime64[D]')]
+
+    stats['latest_day'] = days[-1]
+    cutoff = _shift_day(days[-1], -OPEN_DAYS)
+    closed = np.array([day < cutoff for day in days])
+    stats['daily'] = accumulator_of(np.log1p(totals[closed]))
+    # Open days of existing history have had their chance to alert
+    stats['days'] = {
+        day: {'total': float(total), 'notified': True}
+        for day, total, is_closed in zip(days, totals, closed) if not is_closed
+    }
+    return stats
+
+
+def rebuild_alert_stats(user_id=None, progress=None):
+    """Recompute alert statistics from transactions (one user, or everyone); returns {'users': n}"""
+    from app.models.alert_stats import AlertStats
+    from app.models.transaction import Transaction
+
+    user_ids = [user_id] if user_id is not None else Transaction.collection.distinct('user_id')
+    if user_id is None:
+        AlertStats.collection.delete_many({'user_id': {'$nin': user_ids}})
+
+    for done, uid in enumerate(user_ids, 1):
+        stats = stats_from_history(uid)
+        current = AlertStats.find_by_user(uid)
+        while not AlertStats.save(uid, stats, current['version'] if current else None):
+            current = AlertStats.find_by_user(uid)
+        if progress:
+            progress(users=done)
+    return {'users': len(user_ids)}
+
+
+def bootstrap_alerts(user_id, now=None):
+    """First build of a user's stats, notifying what streaming would have raised for recent rows.
+
+    History older than MAX_ALERT_AGE_DAYS is folded in directly and the
+    rest is replayed through add_transactions, so a user gets the same
+    alerts whether their stats existed before or not. Only the caller
+    that creates the stats notifies; returns whether that was this one.
+    """
+    from app.ml_models.transaction_frame import TransactionFrame
+    from app.models.alert_stats import AlertStats
+
+    now = now or datetime.utcnow()
+    frame = TransactionFrame.load(user_id)
+    recent = frame.dates >= np.datetime64(now - timedelta(days=MAX_ALERT_AGE_DAYS))
+    stats = stats_from_history(user_id, frame.take(~recent))
+    alerts = add_transactions(stats, frame.take(recent).to_records(), now)
+    if not AlertStats.save(user_id, stats, None):
+        return False
+    notify(user_id, alerts)
+    return True
+
+
+def _update(user_id, change):
+    """Read-modify-write a user's stats with optimistic retries; stats missing = bootstrap from history"""
+    from app.models.alert_stats import AlertStats
+
+    for _ in range(SAVE_RETRIES):
+        stats = AlertStats.find_by_user(user_id)
+        if stats is None:
+            if bootstrap_alerts(user_id):
+                return []
+            continue
+        version = stats.pop('version', 0)
+        stats.pop('user_id', None)
+        stats.pop('updated_at', None)
+        alerts = change(stats)
+        if AlertStats.save(user_id, stats, version):
+            return alerts
+    print(f"⚠️ Alert stats for {user_id} kept changing underneath, rebuilding")
+    rebuild_alert_stats(user_id)
+    return []
+
+
+def notify(user_id, alerts):
+    from app.models.notification import Notification
+
+    for alert in alerts:
+        Notification.create(user_id, {
+            'title': 'High spending' if alert['type'] == 'high_spending' else 'Unusual transaction',
+            'message': alert['message'],
+            'type': alert['severity'],
+            'source': 'alerts',
+            'alert': alert
+        })
+
+
+def recent_alerts(user_id, days=ALERT_HISTORY_DAYS):
+    """What the alerts endpoint shows: alert notifications from the last `days` days"""
+    from app.models.notification import Notification
+    return Notification.find_alerts(user_id, since=datetime.utcnow() - timedelta(days=days))
+
+
+def has_stats(user_id):
+    from app.models.alert_stats import AlertStats
+    return AlertStats.find_by_user(user_id) is not None
+
+
+def _on_inserted(user_id, documents):
+    notify(user_id, _update(user_id, lambda stats: add_transactions(stats, documents)))
+
+
+def _on_updated(user_id, changes):
+    def change(stats):
+        remove_transactions(stats, [before for before, _ in changes])
+        add_transactions(stats, [after for _, after in changes])
+        return []
+    _update(user_id, change)
+
+
+def _on_deleted(user_id, documents):
+    _update(user_id, lambda stats: remove_transactions(stats, documents) or [])
+
+
+def _on_reset(user_id, changes=None):
+    rebuild_alert_stats(user_id)
+
+
+def watch_transaction_changes():
+    """Evaluate alerts as transactions are written through the models in this process"""
+    transaction_events.subscribe(transaction_events.INSERTED, _on_inserted)
+    transaction_events.subscribe(transaction_events.UPDATED, _on_updated)
+    transaction_events.subscribe(transaction_events.DELETED, _on_deleted)
+    transaction_events.subscribe(transaction_events.RESET, _on_reset)
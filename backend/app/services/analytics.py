@@ -0,0 +1,200 @@
+import calendar
+from collections import Counter
+from dateutil import parser
+from app.ml_models.categorizer import canonical_category
+
+# Analytics without an explicit date range cover this many months with activity
+DEFAULT_MONTHS = 12
+
+
+def date_range(args):
+    """(start, end) datetimes from start_date/end_date arguments; unparseable dates are ignored"""
+    start = end = None
+    try:
+        if args.get('start_date', '').strip():
+            start = parser.parse(args['start_date'].strip())
+    except (ValueError, OverflowError):
+        pass
+    try:
+        if args.get('end_date', '').strip():
+            # Include the entire end date
+            end = parser.parse(args['end_date'].strip()).replace(hour=23, minute=59, second=59)
+    except (ValueError, OverflowError):
+        pass
+    return start, end
+
+
+def date_match(user_id, start=None, end=None):
+    match = {'user_id': user_id} if user_id is not None else {}
+    if start or end:
+        match['date'] = {}
+        if start:
+            match['date']['$gte'] = start
+        if end:
+            match['date']['$lte'] = end
+    return match
+
+
+def monthly_groups(match):
+    """Totals per (user, month, type, category) from one $group, sorted by user and month.
+
+    Yields {'user_id', 'month': 'YYYY-MM', 'type', 'category', 'amount', 'count'}.
+    """
+    from app.models.transaction import Transaction
+
+    groups = Transaction.collection.aggregate([
+        {'$match': match},
+        {'$group': {
+            '_id': {
+                'user_id': '$user_id',
+                # $toDate also accepts rows still holding ISO date strings
+                'month': {'$dateTrunc': {'date': {'$toDate': '$date'}, 'unit': 'month'}},
+                'type': '$type',
+                'category': '$category'
+            },
+            'amount': {'$sum': '$amount'},
+            'count': {'$sum': 1}
+        }},
+        {'$sort': {'_id.user_id': 1, '_id.month': 1}}
+    ], allowDiskUse=True)
+
+    for group in groups:
+        key = group['_id']
+        yield {
+            'user_id': key['user_id'],
+            'month': f"{key['month'].year}-{key['month'].month:02d}",
+            'type': key['type'],
+            'category': key['category'],
+            'amount': group['amount'],
+            'count': group['count']
+        }
+
+
+def category_groups(match):
+    """Totals per (type, category) from one $group: a few dozen rows whatever the history size"""
+    from app.models.transaction import Transaction
+
+    groups = Transaction.collection.aggregate([
+        {'$match': match},
+        {'$group': {
+            '_id': {'type': '$type', 'category': '$category'},
+            'amount': {'$sum': '$amount'},
+            'count': {'$sum': 1}
+        }}
+    ], allowDiskUse=True)
+
+    return [
+        {
+            'type': group['_id']['type'],
+            'category': canonical_category(group['_id']['category'] or 'Other'),
+            'amount': group['amount'],
+            'count': group['count']
+        }
+        for group in groups
+    ]
+
+
+def user_months(user_id, start=None, end=None, months=DEFAULT_MONTHS):
+    """Month documents shaped like the rollups, oldest first.
+
+    With a date range they come from the monthly pipeline; otherwise they
+    are the user's latest `months` rollup months with activity.
+    """
+    from app.models.monthly_rollup import MonthlyRollup
+    from app.services.rollups import recent_months
+
+    if not (start or end):
+        return recent_months(user_id, months)
+
+    increments = {}
+    for group in monthly_groups(date_match(user_id, start, end)):
+        MonthlyRollup.add_amounts(increments, group['month'], group['type'], group['category'],
+                                  group['amount'], group['count'])
+    return MonthlyRollup.rounded(MonthlyRollup.month_documents(increments))
+
+
+def spending_trends(user_id, start=None, end=None, months=DEFAULT_MONTHS):
+    """Income, expense and expense per category for each month"""
+    trends = []
+    for month in user_months(user_id, start, end, months):
+        year, month_number = (int(part) for part in month['month'].split('-'))
+        trends.append({
+            'month': calendar.month_name[month_number],
+            'year': year,
+            'income': month['income'],
+            'expense': month['expense'],
+            'categories': {
+                category: amounts['expense']
+                for category, amounts in month['categories'].items()
+                if amounts.get('expense')
+            }
+        })
+    return trends
+
+
+def period_summary(user_id, start=None, end=None, months=DEFAULT_MONTHS):
+    """Totals, transaction count and per-category income/expense/count over a period.
+
+    A date range is one (type, category) $group; without one the latest
+    rollup months are summed. Either way only a few dozen numbers leave
+    the database.
+    """
+    if start or end:
+        groups = category_groups(date_match(user_id, start, end))
+        covered = None
+    else:
+        rollup_months = user_months(user_id, months=months)
+        covered = [month['month'] for month in rollup_months]
+        # Rollups count per category rather than per (type, category), so
+        # each category's count rides on its expense entry
+        groups = [
+            {'type': kind, 'category': category, 'amount': amounts.get(kind, 0),
+             'count': amounts.get('count', 0) if kind == 'expense' else 0}
+            for month in rollup_months
+            for category, amounts in month['categories'].items()
+            for kind in ('income', 'expense')
+        ]
+
+    summary = {'total_income': 0, 'total_expense': 0, 'count': 0}
+    spending, income, counts = Counter(), Counter(), Counter()
+    for group in groups:
+        if group['type'] == 'income':
+            summary['total_income'] += group['amount']
+            income[group['category']] += group['amount']
+        else:
+            summary['total_expense'] += group['amount']
+            spending[group['category']] += group['amount']
+        summary['count'] += group['count']
+        counts[group['category']] += group['count']
+
+    summary['total_income'] = round(summary['total_income'], 2)
+    summary['total_expense'] = round(summary['total_expense'], 2)
+    summary['category_spending'] = _positive(spending)
+    summary['category_income'] = _positive(income)
+    summary['category_counts'] = dict(counts)
+    summary['months'] = covered
+    return summary
+
+
+def _positive(amounts):
+    """Rounded amounts above zero, largest first"""
+    return {
+        category: round(amount, 2)
+        for category, amount in amounts.most_common()
+        if round(amount, 2) > 0
+    }
+
+
+def category_breakdown(summary):
+    """Per-category income/expense/count rows of a period summary, largest first"""
+    categories = set(summary['category_spending']) | set(summary['category_income'])
+    breakdown = [
+        {
+            'category': category,
+            'income': summary['category_income'].get(category, 0),
+            'expense': summary['category_spending'].get(category, 0),
+            'count': summary['category_counts'].get(category, 0)
+        }
+        for category in categories
+    ]
+    return sorted(breakdown, key=lambda c: (-(c['expense'] + c['income']), c['category']))
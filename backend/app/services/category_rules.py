@@ -0,0 +1,145 @@
+import os
+import threading
+from datetime import timedelta
+from app.ml_models.categorizer import TransactionCategorizer
+
+# How often each worker polls category_rules for changes
+POLL_SECONDS = int(os.getenv('CATEGORY_RULES_POLL_SECONDS', 30))
+
+# Re-read this much history on every poll so writes from hosts with a
+# slightly different clock are not missed (changes already seen in that
+# window are remembered and skipped)
+CLOCK_SKEW = timedelta(seconds=5)
+
+
+def rules_to_groups(rules):
+    """(category, [keywords]) groups in rule order, merging neighbours with the same category"""
+    groups = []
+    for rule in rules:
+        if groups and groups[-1][0] == rule['category']:
+            groups[-1][1].append(rule['keyword'])
+        else:
+            groups.append((rule['category'], [rule['keyword']]))
+    return groups
+
+
+class CategoryRuleIndex:
+    """Compiled category rules for every scope this worker has used.
+
+    Rules are matched user first, then global rules from the database,
+    then the built-in keyword rules. Each scope is compiled once and only
+    recompiled when a rule in that scope changes, so categorizing an
+    import never goes back to the database per row.
+    """
+
+    def __init__(self, loader=None):
+        # loader(user_id) -> active rule documents of that scope, highest priority first
+        self.loader = loader
+        self.defaults = TransactionCategorizer()
+        self.scopes = {}            # user_id (None = global) -> TransactionCategorizer
+        self.combined = {}          # user_id -> user + global + defaults
+        self.last_change = None
+        self._seen = set()          # (rule _id, updated_at) already handled inside the skew window
+        self._primed = False
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def _load_scope(self, user_id):
+        if self.loader is None:
+            from app.models.category_rule import CategoryRule
+            self.loader = CategoryRule.find_by_scope
+        return TransactionCategorizer(rules=rules_to_groups(self.loader(user_id)))
+
+    def _scope(self, user_id):
+        if user_id not in self.scopes:
+            self.scopes[user_id] = self._load_scope(user_id)
+        return self.scopes[user_id]
+
+    def categorizer_for(self, user_id=None):
+        """Categorizer with this user's rules applied (safe to pickle into worker processes)"""
+        with self._lock:
+            if user_id not in self.combined:
+                global_rules = self._scope(None)
+                if user_id is None:
+                    self.combined[user_id] = global_rules.chain(self.defaults)
+                else:
+                    self.combined[user_id] = self._scope(user_id).chain(global_rules, self.defaults)
+            return self.combined[user_id]
+
+    def categorize_batch(self, user_id, descriptions):
+        return self.categorizer_for(user_id).categorize_batch(descriptions)
+
+    def invalidate(self, user_id):
+        """Recompile one scope after its rules changed"""
+        with self._lock:
+            if user_id is None:
+                if None in self.scopes:
+                    self.scopes[None] = self._load_scope(None)
+                # Every combined categorizer embeds the global rules
+                self.combined = {}
+            else:
+                if user_id in self.scopes:
+                    self.scopes[user_id] = self._load_scope(user_id)
+                self.combined.pop(user_id, None)
+
+    def refresh(self):
+        """Pick up rule changes made by other workers since the last poll"""
+        from app.models.category_rule import CategoryRule
+        since = self.last_change - CLOCK_SKEW if self.last_change else None
+        changes = CategoryRule.changed_since(since)
+        scopes = {user_id for rule_id, user_id, updated_at in changes if (rule_id, updated_at) not in self._seen}
+
+        if self._primed:
+            changed = {s for s in scopes if s in self.scopes}
+        else:
+            # First poll: anything compiled before it may already be stale
+            changed = set(self.scopes)
+            self._primed = True
+
+        for user_id in changed:
+            self.invalidate(user_id)
+        for _, _, updated_at in changes:
+            if self.last_change is None or updated_at > self.last_change:
+                self.last_change = updated_at
+        if self.last_change:
+            window_start = self.last_change - CLOCK_SKEW
+            self._seen = {
+                (rule_id, updated_at) for rule_id, _, updated_at in changes if updated_at > window_start
+            }
+        if changed:
+            print(f"🔄 Reloaded category rules for {len(changed)} scope(s)")
+        return changed
+
+    def start_watching(self, interval=None):
+        """Poll for rule changes in a daemon thread"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        interval = interval or POLL_SECONDS
+
+        def watch():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"⚠️ Category rule refresh failed: {e}")
+                if self._stop.wait(interval):
+                    return
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=watch, name='category-rules-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+
+_index = None
+
+
+def get_rule_index():
+    """Process-wide rule index shared by every request this worker handles"""
+    global _index
+    if _index is None:
+        _index = CategoryRuleIndex()
+    return _index
@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from app.services import transaction_events
+from app.ml_models.transaction_frame import TransactionFrame
+
+MAX_USERS = 200
+TTL_SECONDS = 300
+
+# Newest rows kept per user; the models look at recent history
+MAX_ROWS = int(os.getenv('FRAME_MAX_ROWS', 100000))
+
+
+class FrameCache:
+    """TransactionFrames for recently active users, shared by the ML models.
+
+    A user's frame is loaded with one projected query on first use. Any
+    write to their transactions in this process drops it; entries also
+    expire after ttl seconds, which bounds staleness from writes made
+    elsewhere, and the least recently used users are evicted past max_users.
+    Loads run outside the lock; a write that lands during one bumps the
+    user's generation, and the (possibly stale) frame is returned but not kept.
+    """
+
+    def __init__(self, loader=None, max_users=MAX_USERS, ttl=TTL_SECONDS, max_rows=MAX_ROWS):
+        self.loader = loader or (lambda user_id: TransactionFrame.load(user_id, limit=self.max_rows))
+        self.max_users = max_users
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.frames = OrderedDict()     # user_id -> (frame, loaded_at)
+        self.generations = {}           # user_id -> forget() count
+        self.epoch = 0                  # forget(None) count
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self.frames.get(user_id)
+            if entry and time.time() - entry[1] < self.ttl:
+                self.frames.move_to_end(user_id)
+                return entry[0]
+            generation = (self.epoch, self.generations.get(user_id, 0))
+
+        frame = self.loader(user_id)
+        with self._lock:
+            if generation != (self.epoch, self.generations.get(user_id, 0)):
+                return frame
+            self.frames[user_id] = (frame, time.time())
+            self.frames.move_to_end(user_id)
+            while len(self.frames) > self.max_users:
+                self.frames.popitem(last=False)
+        return frame
+
+    def forget(self, user_id, changes=None):
+        with self._lock:
+            if user_id is None:
+                self.frames.clear()
+                self.generations.clear()
+                self.epoch += 1
+            else:
+                self.frames.pop(user_id, None)
+                self.generations[user_id] = self.generations.get(user_id, 0) + 1
+
+
+_frame_cache = None
+
+
+def get_frame_cache():
+    """Process-wide frame cache, invalidated by this process's transaction writes"""
+    global _frame_cache
+    if _frame_cache is None:
+        _frame_cache = FrameCache()
+        for event in (transaction_events.INSERTED, transaction_events.UPDATED,
+                      transaction_events.DELETED, transaction_events.RESET):
+            transaction_events.subscribe(event, _frame_cache.forget)
+    return _frame_cache
@@ -0,0 +1,240 @@
+import os
+import socket
+import threading
+import time
+from app.ml_models.statement_extractor import StatementExtractor
+from app.ml_models.extraction_cache import ExtractionCache
+from app.services.category_rules import get_rule_index
+from app.services.transaction_import import import_transactions
+
+# Processes used to extract statement pages in parallel (1 = serial)
+EXTRACT_WORKERS = int(os.getenv('STATEMENT_EXTRACT_WORKERS', 1))
+
+# Background threads taking statements off the ingestion queue (0 = this process doesn't ingest)
+INGESTION_WORKERS = int(os.getenv('INGESTION_WORKERS', 2))
+POLL_SECONDS = float(os.getenv('INGESTION_POLL_SECONDS', 1))
+
+# A running job without a heartbeat for this long belonged to a worker that died
+STALE_SECONDS = int(os.getenv('INGESTION_STALE_SECONDS', 300))
+
+# Parsed statements by content hash, so re-uploads skip PDF parsing
+extraction_cache = ExtractionCache()
+
+
+class JobProgress:
+    """Progress callback that writes counters to the job, at most every `interval` seconds"""
+
+    def __init__(self, job_id, worker_id, interval=0.5):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self.pending = {}
+        self.last_write = 0
+
+    def __call__(self, force=False, **fields):
+        from app.models.ingestion_job import IngestionJob
+
+        self.pending.update(fields)
+        now = time.time()
+        if self.pending and (force or now - self.last_write >= self.interval):
+            IngestionJob.update_progress(self.job_id, self.worker_id, self.pending)
+            self.pending = {}
+            self.last_write = now
+
+
+def process_statement(user_id, filepath, filename, file_hash, progress=None):
+    """Extract a saved statement and import its transactions; returns the upload summary"""
+    from app.models.bank import Bank
+    from app.models.statement_upload import StatementUpload
+
+    progress = progress or (lambda **fields: None)
+
+    # Another job for the same file may have finished while this one was queued
+    existing = StatementUpload.find_by_hash(user_id, file_hash)
+    if existing:
+        return {
+            'message': 'This statement has already been uploaded',
+            'duplicate': True,
+            'uploaded_at': existing['uploaded_at']
+        }
+
+    # Extract data from PDF
+    extractor = StatementExtractor(
+        workers=EXTRACT_WORKERS,
+        categorizer=get_rule_index().categorizer_for(user_id),
+        cache=extraction_cache
+    )
+    result = extractor.extract_from_pdf(filepath, file_hash=file_hash, progress=progress)
+
+    if not result['success']:
+        raise ValueError(result['error'])
+
+    bank_info = result['bank_info']
+    transactions = result['transactions']
+    progress(rows_extracted=len(transactions), force=True)
+
+    print(f"✅ Extracted {len(transactions)} transactions")
+    print(f"🏦 Bank: {bank_info.get('bank_name')}")
+    print(f"💰 Opening Balance: {bank_info.get('opening_balance')}")
+    print(f"💰 Closing Balance: {bank_info.get('closing_balance')}")
+
+    # Find or create bank account
+    bank = None
+    account_to_match = bank_info.get('full_account_number') or bank_info.get('account_number')
+
+    if account_to_match:
+        bank = Bank.find_by_account(user_id, account_to_match)
+
+    if not bank and bank_info['bank_name']:
+        # Create new bank account
+        bank = Bank.create(user_id, {
+            'bank_name': bank_info['bank_name'],
+            'account_number': bank_info.get('account_number', 'Unknown'),
+            'account_type': 'Savings',
+            'balance': bank_info.get('closing_balance', 0),
+            'is_active': True
+        })
+        print(f"✨ Created new bank account: {bank.get('_id')}")
+    elif bank:
+        # Update existing bank balance
+        Bank.update_balance(str(bank['_id']), bank_info.get('closing_balance', bank.get('balance', 0)))
+        print(f"🔄 Updated bank balance")
+
+    # Add transactions: unordered upserts, the fingerprint index drops duplicates
+    added_count, skipped_count = import_transactions(
+        user_id,
+        transactions,
+        progress,
+        bank_id=str(bank['_id']) if bank else None
+    )
+    progress(rows_inserted=added_count, rows_skipped=skipped_count, force=True)
+
+    print(f"✅ Added {added_count} new transactions")
+    print(f"⏭️ Skipped {skipped_count} duplicate transactions")
+
+    # Record statement upload
+    StatementUpload.create(user_id, {
+        'bank_id': str(bank['_id']) if bank else None,
+        'filename': filename,
+        'file_hash': file_hash,
+        'statement_date': bank_info.get('statement_date'),
+        'transactions_count': added_count
+    })
+
+    return {
+        'message': 'Statement processed successfully',
+        'bank_info': {
+            'bank_name': bank_info.get('bank_name'),
+            'account_number': bank_info.get('account_number'),
+            'customer_name': bank_info.get('customer_name'),
+            'opening_balance': bank_info.get('opening_balance'),
+            'closing_balance': bank_info.get('closing_balance'),
+        },
+        'transactions_added': added_count,
+        'transactions_skipped': skipped_count,
+        'total_extracted': len(transactions),
+        'reconciliation': result.get('reconciliation'),
+        'duplicate': False
+    }
+
+
+class IngestionWorkerPool:
+    """Threads that take queued statement uploads from ingestion_jobs and process them.
+
+    The queue lives in Mongo, so jobs outlive the process: a job whose
+    worker died stops getting heartbeats and is put back on the queue
+    (or failed after IngestionJob.MAX_ATTEMPTS tries).
+    """
+
+    def __init__(self, workers=None, poll_interval=None, stale_after=None):
+        self.workers = INGESTION_WORKERS if workers is None else workers
+        self.poll_interval = poll_interval or POLL_SECONDS
+        self.stale_after = stale_after or STALE_SECONDS
+        self.threads = []
+        self._stop = threading.Event()
+        self._last_requeue = 0
+        self._requeue_lock = threading.Lock()
+
+    def start(self):
+        if self.threads or self.workers <= 0:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            worker_id = f"{socket.gethostname()}:{os.getpid()}:{i}"
+            thread = threading.Thread(target=self._run, args=(worker_id,),
+                                      name=f'ingestion-worker-{i}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"📥 Started {self.workers} ingestion workers")
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def requeue_stale(self):
+        """Recover jobs from dead workers (run by whichever thread gets here first)"""
+        from app.models.ingestion_job import IngestionJob
+
+        with self._requeue_lock:
+            if time.time() - self._last_requeue < self.stale_after / 2:
+                return
+            self._last_requeue = time.time()
+        requeued, failed = IngestionJob.requeue_stale(self.stale_after)
+        if requeued or failed:
+            print(f"♻️ Requeued {requeued} stale ingestion jobs, failed {failed}")
+
+    def _run(self, worker_id):
+        from app.models.ingestion_job import IngestionJob
+
+        while not self._stop.is_set():
+            try:
+                self.requeue_stale()
+                job = IngestionJob.claim_next(worker_id)
+            except Exception as e:
+                print(f"⚠️ Ingestion queue unavailable: {e}")
+                job = None
+
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+
+            self.process(job)
+
+    def process(self, job):
+        from app.models.ingestion_job import IngestionJob
+
+        job_id, worker_id = str(job['_id']), job['worker_id']
+        print(f"📥 Processing ingestion job {job_id} ({job['filename']}, attempt {job['attempts']})")
+
+        try:
+            result = process_statement(
+                job['user_id'],
+                job['filepath'],
+                job['filename'],
+                job['file_hash'],
+                progress=JobProgress(job_id, worker_id)
+            )
+            finished = IngestionJob.complete(job_id, worker_id, result)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            finished = IngestionJob.fail(job_id, worker_id, str(e))
+
+        # A job requeued while this worker was quiet belongs to another attempt now: keep its file
+        if not finished:
+            print(f"⚠️ Ingestion job {job_id} was taken over by another worker, leaving it alone")
+        elif os.path.exists(job['filepath']):
+            os.remove(job['filepath'])
+
+
+_pool = None
+
+
+def get_worker_pool():
+    """Process-wide ingestion worker pool"""
+    global _pool
+    if _pool is None:
+        _pool = IngestionWorkerPool()
+    return _pool
@@ -0,0 +1,176 @@
+import time
+from collections import Counter
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app.services import transaction_events
+from app.services.category_rules import get_rule_index
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+class RecategorizationJob:
+    """Re-run the categorizer over stored transactions.
+
+    Transactions are read in _id order, one batch at a time, so memory use
+    is bounded by the batch size no matter how large the collection (or a
+    single user's history) is. Every written batch records its last _id in
+    job_checkpoints; running the job again with the same name and options
+    resumes from there. Transactions entered by hand (or without a recorded
+    source) and those whose category a user edited are left alone.
+    """
+
+    def __init__(self, job_name='recategorize', batch_size=DEFAULT_BATCH_SIZE, user_id=None,
+                 dry_run=False, include_manual=False, rule_index=None, progress=None):
+        self.job_name = job_name
+        self.batch_size = batch_size
+        self.user_id = user_id
+        self.dry_run = dry_run
+        self.include_manual = include_manual
+        self.rule_index = rule_index or get_rule_index()
+        self.progress = progress or self.print_progress
+
+    @property
+    def checkpoint_key(self):
+        """Checkpoint name: a run over one user or another row set must not resume (or finish) another's"""
+        key = self.job_name
+        if self.user_id:
+            key += f':user={self.user_id}'
+        if self.include_manual:
+            key += ':include_manual'
+        return key
+
+    def base_query(self):
+        query = {'category_locked': {'$ne': True}}
+        if not self.include_manual:
+            # Only imported rows: documents from before the source field
+            # existed may have been entered by hand
+            query['source'] = 'statement'
+        if self.user_id:
+            query['user_id'] = self.user_id
+        return query
+
+    def categorize_batch(self, docs):
+        """New category for every doc, categorizing each user's rows in one call"""
+        by_user = {}
+        for doc in docs:
+            by_user.setdefault(doc.get('user_id'), []).append(doc)
+
+        new_categories = {}
+        for user_id, user_docs in by_user.items():
+            categorizer = self.rule_index.categorizer_for(user_id)
+            categories = categorizer.categorize_batch([d.get('description') or '' for d in user_docs])
+            for doc, category in zip(user_docs, categories):
+                new_categories[doc['_id']] = category
+        return new_categories
+
+    def run(self, resume=True):
+        from app.models.transaction import Transaction
+        from app.models.job_checkpoint import JobCheckpoint
+
+        collection = Transaction.collection
+        query = self.base_query()
+
+        state = {'last_id': None, 'processed': 0, 'changed': 0, 'errors': 0}
+        if resume and not self.dry_run:
+            checkpoint = JobCheckpoint.get(self.checkpoint_key)
+            if checkpoint and not checkpoint.get('finished'):
+                state.update({k: checkpoint.get(k, state[k]) for k in state})
+                print(f"⏩ Resuming {self.checkpoint_key} after {state['last_id']} ({state['processed']} already processed)")
+
+        if self.user_id:
+            total = collection.count_documents({'user_id': self.user_id})
+        else:
+            total = collection.estimated_document_count()
+
+        transitions = Counter()
+        started = time.time()
+        processed_at_start = state['processed']
+
+        while True:
+            batch_query = dict(query)
+            if state['last_id'] is not None:
+                batch_query['_id'] = {'$gt': state['last_id']}
+
+            docs = list(collection.find(
+                batch_query,
+                {'user_id': 1, 'description': 1, 'category': 1}
+            ).sort('_id', 1).limit(self.batch_size))
+
+            if not docs:
+                break
+
+            new_categories = self.categorize_batch(docs)
+            now = datetime.utcnow()
+            operations = []
+
+            for doc in docs:
+                old_category = doc.get('category')
+                new_category = new_categories[doc['_id']]
+                if old_category == new_category:
+                    continue
+                transitions[(old_category, new_category)] += 1
+                # Match on the old category too, so an edit made while the job runs wins
+                operations.append(UpdateOne(
+                    {'_id': doc['_id'], 'category': old_category, 'category_locked': {'$ne': True}},
+                    {'$set': {'category': new_category, 'recategorized_at': now}}
+                ))
+
+            if operations and not self.dry_run:
+                try:
+                    result = collection.bulk_write(operations, ordered=False)
+                    state['changed'] += result.modified_count
+                except BulkWriteError as e:
+                    state['changed'] += e.details.get('nModified', 0)
+                    state['errors'] += len(e.details.get('writeErrors', []))
+                    print(f"⚠️ {len(e.details.get('writeErrors', []))} write errors in batch ending {docs[-1]['_id']}")
+            elif self.dry_run:
+                state['changed'] += len(operations)
+
+            state['last_id'] = docs[-1]['_id']
+            state['processed'] += len(docs)
+
+            if not self.dry_run:
+                JobCheckpoint.save(self.checkpoint_key, dict(state, finished=False))
+
+            elapsed = time.time() - started
+            rate = (state['processed'] - processed_at_start) / elapsed if elapsed > 0 else 0
+            self.progress(state['processed'], total, state['changed'], rate)
+
+        if not self.dry_run:
+            JobCheckpoint.save(self.checkpoint_key, dict(state, finished=True))
+            if state['changed']:
+                transaction_events.publish(transaction_events.RESET, self.user_id)
+
+        summary = {
+            'job_name': self.job_name,
+            'dry_run': self.dry_run,
+            'processed': state['processed'],
+            'changed': state['changed'],
+            'errors': state['errors'],
+            'seconds': round(time.time() - started, 2),
+            'categories': self.category_diff(transitions),
+            'transitions': [
+                {'from': old, 'to': new, 'count': count}
+                for (old, new), count in transitions.most_common()
+            ]
+        }
+        return summary
+
+    @staticmethod
+    def category_diff(transitions):
+        """Rows each category gains and loses, with the net change"""
+        diff = {}
+        for (old, new), count in transitions.items():
+            old_entry = diff.setdefault(old or 'Uncategorized', {'gained': 0, 'lost': 0})
+            new_entry = diff.setdefault(new, {'gained': 0, 'lost': 0})
+            old_entry['lost'] += count
+            new_entry['gained'] += count
+        for entry in diff.values():
+            entry['net'] = entry['gained'] - entry['lost']
+        return dict(sorted(diff.items(), key=lambda item: -abs(item[1]['net'])))
+
+    def print_progress(self, processed, total, changed, rate):
+        percent = f" ({processed / total * 100:.1f}%)" if total else ''
+        verb = 'would change' if self.dry_run else 'changed'
+        print(f"   🔄 {processed}/{total}{percent} processed, {changed} {verb}, {rate:.0f} rows/s")
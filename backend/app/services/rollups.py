@@ -0,0 +1,103 @@
+from app.services import analytics, transaction_events
+
+
+def rebuild_rollups(user_id=None, progress=None):
+    """Recompute monthly rollups from transactions (one user, or everyone).
+
+    The analytics monthly pipeline streams groups sorted by user,
+    and each user's months are replaced as soon as their groups are done.
+    Each rebuilt user is marked built. Returns {'users': n, 'months': n}.
+    """
+    from app.models.monthly_rollup import MonthlyRollup
+    from app.models.rollup_state import RollupState
+
+    groups = analytics.monthly_groups(analytics.date_match(user_id))
+
+    stats = {'users': 0, 'months': 0}
+    users_seen = []
+    current_user = None
+    increments = {}
+
+    def flush():
+        months = MonthlyRollup.replace_user(current_user, increments)
+        RollupState.mark_built(current_user, months)
+        stats['months'] += months
+        stats['users'] += 1
+        users_seen.append(current_user)
+        if progress:
+            progress(**stats)
+
+    for group in groups:
+        if group['user_id'] != current_user and increments:
+            flush()
+            increments = {}
+        current_user = group['user_id']
+        MonthlyRollup.add_amounts(increments, group['month'], group['type'], group['category'],
+                                  group['amount'], group['count'])
+
+    if increments:
+        flush()
+
+    # Users left without transactions keep no months
+    if user_id is not None:
+        if not users_seen:
+            MonthlyRollup.collection.delete_many({'user_id': user_id})
+            RollupState.mark_built(user_id, 0)
+    else:
+        for model in (MonthlyRollup, RollupState):
+            model.collection.delete_many({'user_id': {'$nin': users_seen}})
+
+    return stats
+
+
+def has_rollups(user_id):
+    """Whether the user's rollups have been built (even if they have no months)"""
+    from app.models.rollup_state import RollupState
+    return RollupState.is_built(user_id)
+
+
+def recent_months(user_id, count=12):
+    """The user's latest `count` months that have transactions, oldest first"""
+    from app.models.monthly_rollup import MonthlyRollup
+
+    # Not built yet (e.g. data from before rollups): build from history once
+    if not has_rollups(user_id):
+        rebuild_rollups(user_id)
+
+    # Months emptied by deletes stay behind with zero counts
+    active = {'user_id': user_id, '$or': [{'income_count': {'$gt': 0}}, {'expense_count': {'$gt': 0}}]}
+    latest = MonthlyRollup.collection.find(active, {'month': 1}).sort('month', -1).limit(count)
+    months = [doc['month'] for doc in latest]
+    if not months:
+        return []
+    return [
+        month for month in MonthlyRollup.find_by_user(user_id, start_month=months[-1], end_month=months[0])
+        if month['income_count'] > 0 or month['expense_count'] > 0
+    ]
+
+
+def _on_inserted(user_id, documents):
+    from app.models.monthly_rollup import MonthlyRollup
+    MonthlyRollup.apply(user_id, added=documents)
+
+
+def _on_updated(user_id, changes):
+    from app.models.monthly_rollup import MonthlyRollup
+    MonthlyRollup.apply(user_id, added=[after for _, after in changes], removed=[before for before, _ in changes])
+
+
+def _on_deleted(user_id, documents):
+    from app.models.monthly_rollup import MonthlyRollup
+    MonthlyRollup.apply(user_id, removed=documents)
+
+
+def _on_reset(user_id, changes=None):
+    rebuild_rollups(user_id)
+
+
+def watch_transaction_changes():
+    """Keep rollups current with every transaction write made through the models in this process"""
+    transaction_events.subscribe(transaction_events.INSERTED, _on_inserted)
+    transaction_events.subscribe(transaction_events.UPDATED, _on_updated)
+    transaction_events.subscribe(transaction_events.DELETED, _on_deleted)
+    transaction_events.subscribe(transaction_events.RESET, _on_reset)
@@ -0,0 +1,189 @@
+import os
+from datetime import datetime
+from app.services import transaction_events
+from app.services.transaction_search import (
+    build_search_query, search_page, query_key, format_summary, serialize_transaction, encode_cursor,
+    SUMMARY_GROUP, DEFAULT_LIMIT, MAX_LIMIT
+)
+
+# Saved searches run at least this often get a materialized snapshot
+SNAPSHOT_MIN_USES = int(os.getenv('SAVED_SEARCH_SNAPSHOT_USES', 3))
+
+# Newest matching ids kept in a snapshot (enough for the first pages)
+SNAPSHOT_IDS = 500
+
+
+def filters_to_args(filters):
+    """Saved filters as search endpoint arguments (lists become comma-separated)"""
+    args = {}
+    for name, value in (filters or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ','.join(str(v) for v in value)
+        args[name] = str(value)
+    return args
+
+
+def merge_summaries(current, delta):
+    """Summary of two disjoint result sets"""
+    total_income = current['total_income'] + delta['total_income']
+    total_expense = current['total_expense'] + delta['total_expense']
+    count = current['count'] + delta['count']
+    return format_summary([{
+        'total_income': total_income,
+        'total_expense': total_expense,
+        'count': count
+    }] if count else [])
+
+
+def _match_newest(collection, query, limit):
+    """Newest matches as [id, date] pairs, the summary of every match and the highest _id.
+
+    Separate queries rather than one $facet: stages inside $facet can't
+    use an index, so the rows and max _id are indexed finds.
+    """
+    rows = [
+        [row['_id'], row.get('date')]
+        for row in collection.find(query, {'date': 1}, sort=[('date', -1), ('_id', -1)], limit=limit)
+    ]
+    summary = format_summary(list(collection.aggregate([{'$match': query}, SUMMARY_GROUP], allowDiskUse=True)))
+    newest = collection.find_one(query, {'_id': 1}, sort=[('_id', -1)])
+    return rows, summary, newest['_id'] if newest else None
+
+
+def build_snapshot(collection, query):
+    rows, summary, max_id = _match_newest(collection, query, SNAPSHOT_IDS)
+    return {
+        'filter_key': query_key(query),
+        'rows': rows,
+        'summary': summary,
+        'max_id': max_id,
+        'refreshed_at': datetime.utcnow(),
+        'stale': False
+    }
+
+
+def refresh_snapshot(collection, query, snapshot):
+    """Bring a snapshot up to date: fold in rows inserted since it was taken, or rebuild.
+
+    New rows are found by _id > max_id, which reads only the newest part
+    of the _id index. Updates and deletes can't be seen that way; they
+    mark the user's snapshots stale (see watch_transaction_changes), and a
+    stale snapshot, or one whose filter now resolves differently (text
+    search terms expand against a growing vocabulary), is rebuilt.
+    """
+    if not snapshot or snapshot.get('stale') or snapshot.get('filter_key') != query_key(query):
+        return build_snapshot(collection, query), True
+
+    delta_query = query
+    if snapshot['max_id'] is not None:
+        delta_query = {'$and': [query, {'_id': {'$gt': snapshot['max_id']}}]}
+    rows, delta_summary, max_id = _match_newest(collection, delta_query, SNAPSHOT_IDS)
+    if not rows:
+        return snapshot, False
+
+    merged = rows + snapshot['rows']
+    merged.sort(key=lambda row: (row[1] if isinstance(row[1], datetime) else datetime.min, row[0]), reverse=True)
+    snapshot = dict(
+        snapshot,
+        rows=merged[:SNAPSHOT_IDS],
+        summary=merge_summaries(snapshot['summary'], delta_summary),
+        max_id=max_id,
+        refreshed_at=datetime.utcnow()
+    )
+    return snapshot, True
+
+
+def run_saved_search(search, args, summary_cache=None):
+    """Run a saved search (raw document) with paging/sort arguments; returns (transactions, pagination, summary).
+
+    Usage is recorded. For searches used at least SNAPSHOT_MIN_USES times,
+    the first page in date order is served from the snapshot: the summary
+    is stored and the page is a lookup of known ids.
+    """
+    from app.models.transaction import Transaction
+    from app.models.saved_search import SavedSearch
+
+    collection = Transaction.collection
+    user_id = search['user_id']
+    query, filters_applied, text_query = build_search_query(user_id, filters_to_args(search.get('filters')))
+
+    SavedSearch.update_usage(str(search['_id']), user_id)
+
+    sort_by = args.get('sort_by', 'date')
+    sort_direction = -1 if args.get('sort_order', 'desc') == 'desc' else 1
+    try:
+        limit = min(max(1, int(args.get('limit', DEFAULT_LIMIT))), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    cursor = args.get('cursor') or None
+    page = None
+    if 'cursor' not in args:
+        try:
+            page = int(args.get('page', 1))
+        except ValueError:
+            page = 1
+
+    first_page = not cursor and page in (None, 1)
+    uses = search.get('use_count', 0) + 1
+    if first_page and sort_by == 'date' and sort_direction == -1 and uses >= SNAPSHOT_MIN_USES:
+        snapshot, changed = refresh_snapshot(collection, query, search.get('snapshot'))
+        if changed:
+            SavedSearch.save_snapshot(str(search['_id']), snapshot)
+
+        if limit <= len(snapshot['rows']) or len(snapshot['rows']) == snapshot['summary']['count']:
+            ids = [row[0] for row in snapshot['rows'][:limit]]
+            by_id = {doc['_id']: doc for doc in collection.find({'_id': {'$in': ids}})}
+            transactions = [serialize_transaction(by_id[i]) for i in ids if i in by_id]
+            return transactions, snapshot_pagination(query, snapshot, limit, page), snapshot['summary']
+
+    return search_page(
+        collection,
+        query,
+        sort_field=sort_by,
+        sort_direction=sort_direction,
+        limit=limit,
+        cursor=cursor,
+        page=page,
+        text_query=text_query,
+        summary_cache=summary_cache
+    )
+
+
+def snapshot_pagination(query, snapshot, limit, page):
+    """First-page pagination block matching search_page's, from a snapshot"""
+    total_count = snapshot['summary']['count']
+    has_next = total_count > limit
+    pagination = {'per_page': limit, 'has_next': has_next, 'total_count': total_count, 'has_prev': False}
+    if page is not None:
+        pagination.update({'current_page': 1, 'total_pages': (total_count + limit - 1) // limit})
+    else:
+        last_id, last_date = snapshot['rows'][limit - 1] if has_next else (None, None)
+        pagination['next_cursor'] = encode_cursor(
+            query, 'date', -1, {'_id': last_id, 'date': last_date}
+        ) if has_next else None
+    return pagination
+
+
+def refresh_user_snapshots(user_id):
+    """Apply pending inserts to every snapshot of a user (one _id-range query each)"""
+    from app.models.transaction import Transaction
+    from app.models.saved_search import SavedSearch
+
+    for search in SavedSearch.collection.find({'user_id': user_id, 'snapshot': {'$type': 'object'}}):
+        query = build_search_query(user_id, filters_to_args(search.get('filters')))[0]
+        snapshot, changed = refresh_snapshot(Transaction.collection, query, search['snapshot'])
+        if changed:
+            SavedSearch.save_snapshot(str(search['_id']), snapshot)
+
+
+def _mark_stale(user_id, changes=None):
+    from app.models.saved_search import SavedSearch
+    SavedSearch.mark_snapshots_stale(user_id)
+
+
+def watch_transaction_changes():
+    """Mark snapshots stale on updates/deletes made in this process (inserts are picked up by _id)"""
+    for event in (transaction_events.UPDATED, transaction_events.DELETED, transaction_events.RESET):
+        transaction_events.subscribe(event, _mark_stale)
@@ -0,0 +1,272 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from app.ml_models.recurring_detector import (
+    RecurringDetector, CADENCE_BY_NAME, merchant_key, amount_fits, cadence_fits, next_expected
+)
+from app.services import transaction_events
+
+# Unmatched expenses kept per merchant key while a cadence may still emerge
+CANDIDATE_LIMIT = 24
+
+# A rebuild buffers expenses from this far back (an annual payment plus its tolerance)
+CANDIDATE_DAYS = 400
+
+# Bills due in the next UPCOMING_DAYS days are upcoming, as are ones a few days late
+UPCOMING_DAYS = 30
+DUE_GRACE_DAYS = 5
+
+
+def _expense_rows(documents):
+    """(merchant key, buffer row) of the expense documents, oldest first"""
+    from app.services.transaction_import import parse_transaction_date
+
+    rows = []
+    for txn in documents:
+        if txn.get('type') != 'expense':
+            continue
+        try:
+            date = parse_transaction_date(txn['date'])
+        except Exception:
+            continue
+        rows.append((merchant_key(txn.get('description')), {
+            'id': str(txn['_id']) if txn.get('_id') is not None else None,
+            'date': date,
+            'amount': float(txn.get('amount') or 0),
+            'description': txn.get('description') or '',
+            'category': txn.get('category') or 'Other',
+            'type': 'expense'
+        }))
+    rows.sort(key=lambda row: row[1]['date'])
+    return rows
+
+
+def _matching_series(series_list, row):
+    """The series a payment continues: same amount band and a whole number of periods from its ends"""
+    for series in series_list:
+        low, high = min(series['amount_min'], row['amount']), max(series['amount_max'], row['amount'])
+        if not amount_fits(low, high, series['cadence']):
+            continue
+        anchor = series['first_date'] if row['date'] < series['first_date'] else series['last_date']
+        if cadence_fits((row['date'].date() - anchor.date()).days, series['cadence']):
+            return series
+    return None
+
+
+def _promote(user_id, key, buffer):
+    """Turn series found in a merchant's buffer into subscriptions; returns how many"""
+    from app.models.subscription import Subscription
+    from app.models.subscription_candidate import SubscriptionCandidate
+
+    found = RecurringDetector().detect_series(buffer)
+    taken = set()
+    for series in found:
+        series['merchant_key'] = key
+        Subscription.create(user_id, series)
+        taken.update(
+            row['id'] for row in buffer
+            if series['amount_min'] <= row['amount'] <= series['amount_max']
+            and series['first_date'] <= row['date'] <= series['last_date']
+        )
+    if taken:
+        SubscriptionCandidate.remove(user_id, key, taken)
+    return len(found)
+
+
+def add_transactions(user_id, documents):
+    """Place inserted expenses into their series, or their merchant's candidate buffer.
+
+    A series is extended when the amount stays in its band and the date
+    is a whole number of periods from its first or last payment. Unmatched
+    rows are buffered per merchant key and the buffer is re-checked for a
+    new series, so each insert touches one merchant's documents only.
+    Returns {'matched': n, 'buffered': n, 'detected': n}.
+    """
+    from app.models.subscription import Subscription
+    from app.models.subscription_candidate import SubscriptionCandidate
+
+    counts = {'matched': 0, 'buffered': 0, 'detected': 0}
+    rows = _expense_rows(documents)
+    if not rows:
+        return counts
+
+    series_by_key = {}
+    for series in Subscription.find_by_keys(user_id, {key for key, _ in rows}):
+        series_by_key.setdefault(series['merchant_key'], []).append(series)
+
+    unmatched = {}
+    for key, row in rows:
+        series = _matching_series(series_by_key.get(key, []), row)
+        if series is None:
+            unmatched.setdefault(key, []).append(row)
+            continue
+        Subscription.record_payment(series, row['date'], row['amount'], row['description'],
+                                    next_expected(row['date'], series['cadence']))
+        # Later rows of the batch see the extended series
+        series['amount_min'] = min(series['amount_min'], row['amount'])
+        series['amount_max'] = max(series['amount_max'], row['amount'])
+        series['first_date'] = min(series['first_date'], row['date'])
+        series['last_date'] = max(series['last_date'], row['date'])
+        counts['matched'] += 1
+
+    for key, key_rows in unmatched.items():
+        buffer = SubscriptionCandidate.push(user_id, key, key_rows, CANDIDATE_LIMIT)
+        counts['buffered'] += len(key_rows)
+        counts['detected'] += _promote(user_id, key, buffer)
+    return counts
+
+
+def series_from_history(user_id):
+    """(detected series, candidate buffers by merchant key) over a user's whole history"""
+    from app.ml_models.transaction_frame import TransactionFrame
+
+    frame = TransactionFrame.load(user_id)
+    series = RecurringDetector().detect_series(frame)
+
+    # Recent expenses outside every detected band wait in their merchant's buffer
+    expenses = frame.take(frame.is_expense & ~np.isnat(frame.dates))
+    if not len(expenses):
+        return series, {}
+    recent = np.flatnonzero(expenses.dates >= expenses.dates.max() - np.timedelta64(CANDIDATE_DAYS, 'D'))
+    bands = {}
+    for s in series:
+        bands.setdefault(s['merchant_key'], []).append((s['amount_min'], s['amount_max']))
+
+    description_codes, descriptions = pd.factorize(expenses.descriptions[recent])
+    keys = [merchant_key(d) for d in descriptions]
+    buffers = {}
+    for i, code in zip(recent[::-1], description_codes[::-1]):
+        key, amount = keys[code], float(expenses.amounts[i])
+        if any(low <= amount <= high for low, high in bands.get(key, [])):
+            continue
+        buffers.setdefault(key, []).append({
+            'id': expenses.ids[i],
+            'date': pd.Timestamp(expenses.dates[i]).to_pydatetime(),
+            'amount': amount,
+            'description': expenses.descriptions[i],
+            'category': expenses.categories[expenses.category_codes[i]],
+            'type': 'expense'
+        })
+    return series, {key: rows[-CANDIDATE_LIMIT:] for key, rows in buffers.items()}
+
+
+def rebuild_subscriptions(user_id=None, progress=None):
+    """Re-detect subscriptions from transactions (one user, or everyone); returns {'users': n, 'subscriptions': n}"""
+    from app.models.subscription import Subscription
+    from app.models.subscription_candidate import SubscriptionCandidate
+    from app.models.subscription_state import SubscriptionState
+    from app.models.transaction import Transaction
+
+    user_ids = [user_id] if user_id is not None else Transaction.collection.distinct('user_id')
+    if user_id is None:
+        for model in (Subscription, SubscriptionCandidate, SubscriptionState):
+            model.collection.delete_many({'user_id': {'$nin': user_ids}})
+
+    stats = {'users': 0, 'subscriptions': 0}
+    for uid in user_ids:
+        series, buffers = series_from_history(uid)
+        found = Subscription.replace_user(uid, series)
+        SubscriptionCandidate.replace_user(uid, buffers)
+        SubscriptionState.mark_built(uid, found)
+        stats['subscriptions'] += found
+        stats['users'] += 1
+        if progress:
+            progress(**stats)
+    return stats
+
+
+def has_subscriptions(user_id):
+    """Whether the user's subscriptions have been built (even if none were found)"""
+    from app.models.subscription_state import SubscriptionState
+    return SubscriptionState.is_built(user_id)
+
+
+def _serialize(subscription, now):
+    period = CADENCE_BY_NAME[subscription['cadence']][1]
+    subscription['status'] = 'lapsed' if now > subscription['next_expected'] + timedelta(days=period) else 'active'
+    subscription['monthly_amount'] = round(subscription['avg_amount'] * 30.44 / period, 2)
+    for field in ('first_date', 'last_date', 'next_expected'):
+        subscription[field] = subscription[field].isoformat()
+    subscription.pop('created_at', None)
+    subscription.pop('updated_at', None)
+    return subscription
+
+
+def upcoming_bills(user_id, days=UPCOMING_DAYS, now=None):
+    """Subscriptions expected in the next `days` days (an index range on next_expected)"""
+    from app.models.subscription import Subscription
+
+    now = now or datetime.utcnow()
+    due = Subscription.find_by_user(
+        user_id, due_from=now - timedelta(days=DUE_GRACE_DAYS), due_until=now + timedelta(days=days)
+    )
+    return [_serialize(s, now) for s in due]
+
+
+def overview(user_id, days=UPCOMING_DAYS, now=None):
+    """What the recurring endpoint shows: every series, the upcoming bills and the monthly cost"""
+    from app.models.subscription import Subscription
+
+    now = now or datetime.utcnow()
+    subscriptions = [_serialize(s, now) for s in Subscription.find_by_user(user_id)]
+    active = [s for s in subscriptions if s['status'] == 'active']
+    return {
+        'subscriptions': subscriptions,
+        'upcoming': upcoming_bills(user_id, days, now),
+        'monthly_total': round(sum(s['monthly_amount'] for s in active), 2),
+        'active_count': len(active)
+    }
+
+
+def _touches_series(user_id, documents):
+    from app.models.subscription import Subscription
+    keys = {key for key, _ in _expense_rows(documents)}
+    return bool(keys) and bool(Subscription.find_by_keys(user_id, keys))
+
+
+def _remove_from_buffers(user_id, documents):
+    from app.models.subscription_candidate import SubscriptionCandidate
+
+    ids_by_key = {}
+    for txn in documents:
+        if txn.get('_id') is not None:
+            ids_by_key.setdefault(merchant_key(txn.get('description')), []).append(str(txn['_id']))
+    for key, ids in ids_by_key.items():
+        SubscriptionCandidate.remove(user_id, key, ids)
+
+
+def _on_inserted(user_id, documents):
+    # Not built yet: detect over the whole history (which includes these rows)
+    if not has_subscriptions(user_id):
+        rebuild_subscriptions(user_id)
+        return
+    add_transactions(user_id, documents)
+
+
+def _on_updated(user_id, changes):
+    before, after = [b for b, _ in changes], [a for _, a in changes]
+    # Series can't take a payment back out; re-detect the user when one is involved
+    if _touches_series(user_id, before + after):
+        rebuild_subscriptions(user_id)
+        return
+    _remove_from_buffers(user_id, before)
+    add_transactions(user_id, after)
+
+
+def _on_deleted(user_id, documents):
+    if _touches_series(user_id, documents):
+        rebuild_subscriptions(user_id)
+        return
+    _remove_from_buffers(user_id, documents)
+
+
+def _on_reset(user_id, changes=None):
+    rebuild_subscriptions(user_id)
+
+
+def watch_transaction_changes():
+    """Keep subscriptions current with every transaction write made through the models in this process"""
+    transaction_events.subscribe(transaction_events.INSERTED, _on_inserted)
+    transaction_events.subscribe(transaction_events.UPDATED, _on_updated)
+    transaction_events.subscribe(transaction_events.DELETED, _on_deleted)
+    transaction_events.subscribe(transaction_events.RESET, _on_reset)
@@ -0,0 +1,232 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter, OrderedDict
+from app.services import transaction_events
+
+# Distinct descriptions kept per user (the most frequent ones)
+MAX_DESCRIPTIONS = 5000
+MAX_USERS = 500
+TTL_SECONDS = 600
+
+# Digit runs this long are reference numbers/dates, not part of a merchant name
+REFERENCE_DIGITS = 4
+
+NON_ALNUM_PATTERN = re.compile(r'[^a-z0-9]+')
+REFERENCE_PATTERN = re.compile(r'\d{%d,}' % REFERENCE_DIGITS)
+
+
+def normalize_description(description):
+    """Grouping key: lowercase words without reference numbers ('UPI/SWIGGY/4123..' -> 'upi swiggy')"""
+    text = REFERENCE_PATTERN.sub(' ', (description or '').lower())
+    return NON_ALNUM_PATTERN.sub(' ', text).strip()
+
+
+class UserSuggestions:
+    """One user's distinct descriptions with a sorted (word, key) array for prefix lookup"""
+
+    def __init__(self, max_descriptions=MAX_DESCRIPTIONS):
+        self.max_descriptions = max_descriptions
+        self.entries = {}   # key -> {'text', 'count', 'total_amount', 'categories': Counter}
+        self.words = []     # sorted (word, key) for every word of every key
+        self.loaded_at = time.time()
+
+    def add(self, description, amount, category, count=1):
+        """Count `count` transactions whose amounts sum to `amount`"""
+        key = normalize_description(description)
+        if not key:
+            return
+        entry = self.entries.get(key)
+        if entry is None:
+            if len(self.entries) >= self.max_descriptions:
+                return
+            entry = {'text': description, 'count': 0, 'total_amount': 0.0, 'categories': Counter()}
+            self.entries[key] = entry
+            for word in set(key.split()):
+                insort(self.words, (word, key))
+        entry['count'] += count
+        entry['total_amount'] += amount or 0
+        entry['categories'][category or 'Other'] += count
+
+    def remove(self, description, amount, category):
+        key = normalize_description(description)
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry['count'] -= 1
+        entry['total_amount'] -= amount or 0
+        entry['categories'][category or 'Other'] -= 1
+        if entry['count'] <= 0:
+            del self.entries[key]
+            for word in set(key.split()):
+                i = bisect_left(self.words, (word, key))
+                if i < len(self.words) and self.words[i] == (word, key):
+                    del self.words[i]
+
+    def _prefix_keys(self, prefix):
+        keys = set()
+        i = bisect_left(self.words, (prefix,))
+        while i < len(self.words) and self.words[i][0].startswith(prefix):
+            keys.add(self.words[i][1])
+            i += 1
+        return keys
+
+    def suggest(self, text, limit=10):
+        """Descriptions where every query word prefixes some word, most used first"""
+        terms = normalize_description(text).split()
+        if not terms:
+            return []
+
+        # Narrow with the longest (most selective) term, check the rest per key
+        terms.sort(key=len, reverse=True)
+        keys = self._prefix_keys(terms[0])
+        if len(terms) > 1:
+            keys = [
+                key for key in keys
+                if all(any(word.startswith(term) for word in key.split()) for term in terms[1:])
+            ]
+
+        best = sorted(keys, key=lambda key: (-self.entries[key]['count'], key))[:limit]
+        suggestions = []
+        for key in best:
+            entry = self.entries[key]
+            suggestions.append({
+                'text': entry['text'],
+                'count': entry['count'],
+                'category': entry['categories'].most_common(1)[0][0],
+                'avg_amount': entry['total_amount'] / entry['count']
+            })
+        return suggestions
+
+
+class SuggestionIndex:
+    """Typeahead suggestions for recently active users, answered from memory.
+
+    A user's index is built with one aggregation on their first request,
+    then kept current from this process's transaction events. Entries
+    expire after TTL_SECONDS (picking up writes from other processes) and
+    the least recently used users are evicted past MAX_USERS. Builds run
+    outside the lock; like FrameCache, an index whose user was written to
+    during the build is returned but not kept.
+    """
+
+    def __init__(self, loader=None, max_users=MAX_USERS, ttl=TTL_SECONDS):
+        # loader(user_id) -> [{'description', 'category', 'count', 'total_amount'}]
+        self.loader = loader
+        self.max_users = max_users
+        self.ttl = ttl
+        self.users = OrderedDict()
+        self.generations = {}           # user_id -> writes seen
+        self.epoch = 0                  # forget(None) count
+        self._lock = threading.Lock()
+
+    def _load_groups(self, user_id):
+        if self.loader is None:
+            from app.models.transaction import Transaction
+            self.loader = lambda uid: [
+                {
+                    'description': group['_id']['description'],
+                    'category': group['_id']['category'],
+                    'count': group['count'],
+                    'total_amount': group['total_amount']
+                }
+                for group in Transaction.collection.aggregate([
+                    {'$match': {'user_id': uid}},
+                    {'$group': {
+                        '_id': {'description': '$description', 'category': '$category'},
+                        'count': {'$sum': 1},
+                        'total_amount': {'$sum': '$amount'}
+                    }}
+                ], allowDiskUse=True)
+            ]
+        return self.loader(user_id)
+
+    def _build(self, user_id):
+        index = UserSuggestions()
+        groups = self._load_groups(user_id)
+
+        # Most frequent first, so the size bound keeps the useful ones
+        totals = Counter()
+        for group in groups:
+            totals[normalize_description(group['description'])] += group['count']
+        groups.sort(key=lambda g: -totals[normalize_description(g['description'])])
+
+        for group in groups:
+            index.add(group['description'], group['total_amount'], group['category'], count=group['count'])
+        return index
+
+    def for_user(self, user_id):
+        with self._lock:
+            index = self.users.get(user_id)
+            if index and time.time() - index.loaded_at < self.ttl:
+                self.users.move_to_end(user_id)
+                return index
+            generation = (self.epoch, self.generations.get(user_id, 0))
+
+        index = self._build(user_id)
+        with self._lock:
+            if generation != (self.epoch, self.generations.get(user_id, 0)):
+                return index
+            self.users[user_id] = index
+            self.users.move_to_end(user_id)
+            while len(self.users) > self.max_users:
+                self.users.popitem(last=False)
+        return index
+
+    def suggest(self, user_id, text, limit=10):
+        index = self.for_user(user_id)
+        with self._lock:
+            return index.suggest(text, limit)
+
+    def _loaded(self, user_id):
+        """The user's kept index (if any), counting the write about to be applied to it"""
+        self.generations[user_id] = self.generations.get(user_id, 0) + 1
+        return self.users.get(user_id)
+
+    def on_inserted(self, user_id, documents):
+        with self._lock:
+            index = self._loaded(user_id)
+            if index:
+                for doc in documents:
+                    index.add(doc.get('description'), doc.get('amount'), doc.get('category'))
+
+    def on_updated(self, user_id, changes):
+        with self._lock:
+            index = self._loaded(user_id)
+            if index:
+                for before, after in changes:
+                    index.remove(before.get('description'), before.get('amount'), before.get('category'))
+                    index.add(after.get('description'), after.get('amount'), after.get('category'))
+
+    def on_deleted(self, user_id, documents):
+        with self._lock:
+            index = self._loaded(user_id)
+            if index:
+                for doc in documents:
+                    index.remove(doc.get('description'), doc.get('amount'), doc.get('category'))
+
+    def forget(self, user_id, changes=None):
+        with self._lock:
+            if user_id is None:
+                self.users.clear()
+                self.generations.clear()
+                self.epoch += 1
+            else:
+                self.users.pop(user_id, None)
+                self.generations[user_id] = self.generations.get(user_id, 0) + 1
+
+
+_index = None
+
+
+def get_suggestion_index():
+    """Process-wide suggestion index, kept in sync with this process's transaction writes"""
+    global _index
+    if _index is None:
+        _index = SuggestionIndex()
+        transaction_events.subscribe(transaction_events.INSERTED, _index.on_inserted)
+        transaction_events.subscribe(transaction_events.UPDATED, _index.on_updated)
+        transaction_events.subscribe(transaction_events.DELETED, _index.on_deleted)
+        transaction_events.subscribe(transaction_events.RESET, _index.forget)
+    return _index
@@ -0,0 +1,216 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from app.services import transaction_events
+
+# Digit runs this long are reference numbers (UPI RRN, cheque no.): unique per
+# row, so they would only bloat the token index
+REFERENCE_DIGITS = 6
+MAX_TOKENS = 32
+
+# Edit distance allowed for a query term of at least this many characters
+FUZZY_DISTANCES = [(8, 2), (4, 1)]
+
+# Match quality per query term, used for ranking
+EXACT_SCORE = 3
+PREFIX_SCORE = 2
+FUZZY_SCORE = 1
+
+VOCABULARY_TTL_SECONDS = 300
+VOCABULARY_USERS = 256
+
+WORD_PATTERN = re.compile(r'[a-z]+|[0-9]+')
+PHRASE_SPLIT_PATTERN = re.compile(r'[^a-z0-9 ]+')
+
+
+def tokenize(description):
+    """Index tokens of a description: lowercase words and short numbers.
+
+    UPI/NEFT strings like 'UPI/DR/412345678901/SWIGGY/YESB/swiggy@ybl' are
+    split on every separator and on letter/digit boundaries, reference
+    numbers are dropped, and neighbouring words are also indexed joined
+    ('big bazaar' -> 'bigbazaar') since merchants are spelt both ways.
+    """
+    tokens = []
+    seen = set()
+    text = (description or '').lower()
+
+    for word in WORD_PATTERN.findall(text):
+        if word.isdigit() and len(word) >= REFERENCE_DIGITS:
+            continue
+        if word not in seen:
+            seen.add(word)
+            tokens.append(word)
+
+    # Joined neighbours, only across spaces ('big bazaar', not 'swiggy/yesb')
+    for phrase in PHRASE_SPLIT_PATTERN.split(text):
+        words = [w for w in phrase.split() if w.isalpha() and len(w) > 1]
+        for first, second in zip(words, words[1:]):
+            if first + second not in seen:
+                seen.add(first + second)
+                tokens.append(first + second)
+
+    return tokens[:MAX_TOKENS]
+
+
+def query_terms(text):
+    """Words of a search box query (no joined forms)"""
+    return [w for w in WORD_PATTERN.findall((text or '').lower()) if w]
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, or limit + 1 once it's certain to exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class TokenVocabulary:
+    """Sorted distinct search tokens of recently searched users.
+
+    Loaded with one distinct() over the (user_id, search_tokens) index,
+    grown in place when this process inserts transactions, dropped on
+    updates/deletes and after VOCABULARY_TTL_SECONDS. Prefix lookups are
+    a bisect; fuzzy lookups compare only tokens of a similar length.
+    """
+
+    def __init__(self, loader=None, max_users=VOCABULARY_USERS, ttl=VOCABULARY_TTL_SECONDS):
+        self.loader = loader
+        self.max_users = max_users
+        self.ttl = ttl
+        self.users = OrderedDict()  # user_id -> (sorted tokens, loaded_at)
+        self._lock = threading.Lock()
+
+    def _load(self, user_id):
+        if self.loader is None:
+            from app.models.transaction import Transaction
+            self.loader = lambda uid: Transaction.collection.distinct('search_tokens', {'user_id': uid})
+        return sorted(t for t in self.loader(user_id) if t)
+
+    def tokens(self, user_id):
+        with self._lock:
+            entry = self.users.get(user_id)
+            if entry and time.time() - entry[1] < self.ttl:
+                self.users.move_to_end(user_id)
+                return entry[0]
+
+        tokens = self._load(user_id)
+        with self._lock:
+            self.users[user_id] = (tokens, time.time())
+            self.users.move_to_end(user_id)
+            while len(self.users) > self.max_users:
+                self.users.popitem(last=False)
+        return tokens
+
+    def forget(self, user_id, changes=None):
+        with self._lock:
+            if user_id is None:
+                self.users.clear()
+            else:
+                self.users.pop(user_id, None)
+
+    def add_documents(self, user_id, documents):
+        with self._lock:
+            entry = self.users.get(user_id)
+            if not entry:
+                return
+            merged = set(entry[0])
+            for doc in documents:
+                merged.update(doc.get('search_tokens') or [])
+            self.users[user_id] = (sorted(merged), entry[1])
+
+    def expand(self, user_id, term):
+        """Vocabulary tokens matching a query term: (exact, prefix, fuzzy) sets"""
+        tokens = self.tokens(user_id)
+        exact = {term} if self._contains(tokens, term) else set()
+
+        prefix = set()
+        if len(term) >= 2 or term.isdigit():
+            i = bisect_left(tokens, term)
+            while i < len(tokens) and tokens[i].startswith(term):
+                prefix.add(tokens[i])
+                i += 1
+            prefix -= exact
+
+        fuzzy = set()
+        limit = next((d for length, d in FUZZY_DISTANCES if len(term) >= length), 0)
+        if limit and not term.isdigit():
+            for token in tokens:
+                if token not in prefix and token != term and edit_distance(term, token, limit) <= limit:
+                    fuzzy.add(token)
+        return exact, prefix, fuzzy
+
+    @staticmethod
+    def _contains(tokens, term):
+        i = bisect_left(tokens, term)
+        return i < len(tokens) and tokens[i] == term
+
+
+class TextQuery:
+    """A search box query resolved against one user's vocabulary"""
+
+    def __init__(self, text, terms):
+        self.text = text
+        self.terms = terms  # [(term, exact, prefix, fuzzy)]
+
+    def filter(self):
+        """Mongo clause: every term must match one of its candidate tokens"""
+        clauses = []
+        for term, exact, prefix, fuzzy in self.terms:
+            candidates = exact | prefix | fuzzy
+            if candidates:
+                clauses.append({'search_tokens': {'$in': sorted(candidates)}})
+            elif term.isdigit():
+                # Reference numbers aren't indexed: match them in the description
+                clauses.append({'description': {'$regex': re.escape(term)}})
+            else:
+                clauses.append({'search_tokens': {'$in': []}})
+        if not clauses:
+            return {}
+        return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+    def score(self, doc):
+        tokens = set(doc.get('search_tokens') or [])
+        total = 0
+        for term, exact, prefix, fuzzy in self.terms:
+            if tokens & exact:
+                total += EXACT_SCORE
+            elif tokens & prefix:
+                total += PREFIX_SCORE
+            elif tokens & fuzzy:
+                total += FUZZY_SCORE
+        return total
+
+
+_vocabulary = None
+
+
+def get_vocabulary():
+    """Process-wide vocabulary cache, kept in sync with this process's transaction writes"""
+    global _vocabulary
+    if _vocabulary is None:
+        _vocabulary = TokenVocabulary()
+        transaction_events.subscribe(transaction_events.INSERTED, _vocabulary.add_documents)
+        transaction_events.subscribe(transaction_events.UPDATED, _vocabulary.forget)
+        transaction_events.subscribe(transaction_events.DELETED, _vocabulary.forget)
+        transaction_events.subscribe(transaction_events.RESET, _vocabulary.forget)
+    return _vocabulary
+
+
+def parse_text_query(user_id, text):
+    """TextQuery for a search string, or None if it has no searchable words"""
+    terms = query_terms(text)
+    if not terms:
+        return None
+    vocabulary = get_vocabulary()
+    return TextQuery(text, [(term,) + vocabulary.expand(user_id, term) for term in terms])
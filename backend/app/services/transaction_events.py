@@ -0,0 +1,40 @@
+"""In-process notifications about transaction writes, for caches and derived data.
+
+Handlers are called synchronously after the write with (user_id, changes):
+  inserted - list of the inserted documents
+  updated  - list of (before, after) document pairs
+  deleted  - list of the deleted documents
+  reset    - None; many rows changed at once (user_id None = every user)
+
+Only writes made in this process are seen, so caches that listen here
+should also expire on their own for changes made by other processes.
+"""
+
+INSERTED = 'inserted'
+UPDATED = 'updated'
+DELETED = 'deleted'
+RESET = 'reset'
+
+_handlers = {INSERTED: [], UPDATED: [], DELETED: [], RESET: []}
+
+
+def subscribe(event, handler):
+    if handler not in _handlers[event]:
+        _handlers[event].append(handler)
+    return handler
+
+
+def unsubscribe(event, handler):
+    if handler in _handlers[event]:
+        _handlers[event].remove(handler)
+
+
+def publish(event, user_id, changes=None):
+    """Run the handlers for event; a failing handler never fails the write"""
+    if event != RESET and not changes:
+        return
+    for handler in list(_handlers[event]):
+        try:
+            handler(user_id, changes)
+        except Exception as e:
+            print(f"⚠️ Transaction {event} handler {getattr(handler, '__name__', handler)} failed: {e}")
@@ -0,0 +1,193 @@
+import hashlib
+import re
+from datetime import datetime, timezone
+from dateutil import parser as date_parser
+
+# Rows per bulk_write round trip
+INSERT_BATCH_SIZE = 1000
+
+# Characters of normalized description that go into the fingerprint
+FINGERPRINT_DESCRIPTION_LENGTH = 30
+
+NON_ALNUM_PATTERN = re.compile(r'[^a-z0-9]+')
+
+_indexes_ready = False
+
+
+def parse_transaction_date(value):
+    """Extractor dates are ISO strings; store them as real (naive UTC) dates"""
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            value = date_parser.parse(value)
+    if value.tzinfo is not None:
+        # The dashboard sends toISOString() ('...Z'); stored dates compare naive
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def normalize_description(description):
+    """Lowercase alphanumerics only, so spacing/punctuation differences between extractions don't matter"""
+    return NON_ALNUM_PATTERN.sub('', (description or '').lower())[:FINGERPRINT_DESCRIPTION_LENGTH]
+
+
+def transaction_fingerprint(user_id, date, amount, description):
+    """Stable identity of a statement row: user, day, amount and description prefix.
+
+    The bank is left out: a re-upload may resolve to a different Bank
+    document, and backfilled rows never had one.
+    """
+    key = '|'.join([
+        str(user_id),
+        parse_transaction_date(date).strftime('%Y-%m-%d'),
+        f"{float(amount):.2f}",
+        normalize_description(description)
+    ])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def ensure_indexes():
+    """Make sure the unique fingerprint index exists before relying on it (once per process)"""
+    global _indexes_ready
+    if not _indexes_ready:
+        from app.models.transaction import Transaction
+        from app.config.schema import apply_indexes
+        apply_indexes([Transaction])
+        _indexes_ready = True
+
+
+def import_transactions(user_id, transactions, progress=None, source='statement', bank_id=None):
+    """Insert extracted rows that aren't already stored; returns (added, skipped).
+
+    Every row carries a fingerprint, and the unique (user_id, fingerprint)
+    index decides what is a duplicate: rows go in as unordered upserts
+    that only insert when the key is new. Concurrent imports of
+    overlapping statements can't both insert the same row.
+    """
+    from app.models.transaction import Transaction
+
+    ensure_indexes()
+
+    progress = progress or (lambda **fields: None)
+    added_count = 0
+    skipped_count = 0
+
+    documents = []
+    for txn in transactions:
+        try:
+            date = parse_transaction_date(txn['date'])
+            fingerprint = transaction_fingerprint(user_id, date, txn['amount'], txn.get('description'))
+            documents.append(Transaction.build(user_id, dict(
+                txn,
+                date=date,
+                source=source,
+                bank_id=bank_id,
+                fingerprint=fingerprint
+            )))
+        except Exception as e:
+            print(f"⚠️ Error adding transaction: {e}")
+            skipped_count += 1
+
+    for start in range(0, len(documents), INSERT_BATCH_SIZE):
+        inserted, present = Transaction.bulk_upsert(documents[start:start + INSERT_BATCH_SIZE])
+        added_count += inserted
+        skipped_count += present
+        progress(rows_inserted=added_count, rows_skipped=skipped_count)
+
+    return added_count, skipped_count
+
+
+def backfill_fingerprints(batch_size=1000, job_name='backfill_fingerprints', resume=True, progress=None):
+    """Give stored transactions a fingerprint (and a real date), in _id order.
+
+    Covers statement imports and rows from before the source field existed.
+    Those legacy rows may be manual entries, but the old date+amount check
+    matched imports against every stored row, so fingerprinting them keeps
+    re-uploads of already imported statements from inserting again. Rows
+    recorded as manual are left alone. A row whose fingerprint already
+    belongs to another row is an existing duplicate: it keeps fingerprint
+    None and records the clashing value in duplicate_fingerprint, so
+    nothing is deleted and the unique index can still be built. Progress
+    is checkpointed in job_checkpoints like the recategorization job.
+    """
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+    from app.models.transaction import Transaction
+    from app.models.job_checkpoint import JobCheckpoint
+
+    ensure_indexes()
+    collection = Transaction.collection
+    query = {'fingerprint': {'$exists': False}, 'source': {'$in': ['statement', None]}}
+
+    state = {'last_id': None, 'processed': 0, 'fingerprinted': 0, 'duplicates': 0, 'errors': 0}
+    if resume:
+        checkpoint = JobCheckpoint.get(job_name)
+        if checkpoint and not checkpoint.get('finished'):
+            state.update({k: checkpoint.get(k, state[k]) for k in state})
+
+    while True:
+        batch_query = dict(query)
+        if state['last_id'] is not None:
+            batch_query['_id'] = {'$gt': state['last_id']}
+
+        docs = list(collection.find(
+            batch_query,
+            {'user_id': 1, 'date': 1, 'amount': 1, 'description': 1}
+        ).sort('_id', 1).limit(batch_size))
+
+        if not docs:
+            break
+
+        operations = []
+        fingerprints = []
+        dates = []
+        for doc in docs:
+            try:
+                date = parse_transaction_date(doc['date'])
+                fingerprint = transaction_fingerprint(doc['user_id'], date, doc['amount'], doc.get('description'))
+            except Exception:
+                # Unparseable row: mark it so later batches don't pick it up again
+                operations.append(UpdateOne({'_id': doc['_id']}, {'$set': {'fingerprint': None}}))
+                fingerprints.append(None)
+                dates.append(None)
+                state['errors'] += 1
+                continue
+            operations.append(UpdateOne(
+                {'_id': doc['_id']},
+                {'$set': {'fingerprint': fingerprint, 'date': date}}
+            ))
+            fingerprints.append(fingerprint)
+            dates.append(date)
+
+        clashes = []
+        try:
+            result = collection.bulk_write(operations, ordered=False)
+            state['fingerprinted'] += result.modified_count
+        except BulkWriteError as e:
+            state['fingerprinted'] += e.details.get('nModified', 0)
+            for error in e.details.get('writeErrors', []):
+                if error.get('code') == 11000:
+                    clashes.append(error['index'])
+                else:
+                    state['errors'] += 1
+
+        if clashes:
+            collection.bulk_write([
+                UpdateOne(
+                    {'_id': docs[i]['_id']},
+                    {'$set': {'fingerprint': None, 'duplicate_fingerprint': fingerprints[i], 'date': dates[i]}}
+                )
+                for i in clashes
+            ], ordered=False)
+            state['duplicates'] += len(clashes)
+
+        state['last_id'] = docs[-1]['_id']
+        state['processed'] += len(docs)
+        JobCheckpoint.save(job_name, dict(state, finished=False))
+
+        if progress:
+            progress(**{k: v for k, v in state.items() if k != 'last_id'})
+
+    JobCheckpoint.save(job_name, dict(state, finished=True))
+    return state
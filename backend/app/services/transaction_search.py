@@ -0,0 +1,369 @@
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from bson import ObjectId
+from dateutil import parser
+from app.services import transaction_events
+from app.services.text_search import parse_text_query
+
+SORT_FIELDS = ['date', 'amount', 'category', 'relevance']
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 100
+
+# Relevance ranking scores at most this many matches (newest first)
+MAX_RANKED = 1000
+
+# Cached search summaries expire after this long even without a local write
+SUMMARY_TTL_SECONDS = 60
+SUMMARY_CACHE_SIZE = 5000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def build_search_query(user_id, args):
+    """Mongo filter for the search endpoint's query parameters.
+
+    Returns (query, filters_applied, text_query); text_query is the parsed
+    q parameter (None without one), used to rank results by relevance.
+    """
+    query = {'user_id': user_id}
+
+    # Text search in description: prefix/fuzzy token matches on the search_tokens index
+    search_text = args.get('q', '').strip()
+    text_query = parse_text_query(user_id, search_text) if search_text else None
+    if text_query:
+        query.update(text_query.filter())
+
+    # Category filter (support multiple categories)
+    categories = args.get('category', '').strip()
+    category_list = [c.strip() for c in categories.split(',')] if categories else None
+    if category_list:
+        query['category'] = {'$in': sorted(category_list)}
+
+    # Transaction type filter
+    txn_type = args.get('type', '').strip()
+    if txn_type in ['income', 'expense']:
+        query['type'] = txn_type
+
+    # Bank account filter
+    bank_id = args.get('bank_id', '').strip()
+    if bank_id:
+        query['bank_id'] = bank_id
+
+    # Amount range filter
+    min_amount = args.get('min_amount', '').strip()
+    max_amount = args.get('max_amount', '').strip()
+
+    if min_amount or max_amount:
+        query['amount'] = {}
+        if min_amount:
+            try:
+                query['amount']['$gte'] = float(min_amount)
+            except ValueError:
+                pass
+        if max_amount:
+            try:
+                query['amount']['$lte'] = float(max_amount)
+            except ValueError:
+                pass
+
+    # Date range filter
+    start_date = args.get('start_date', '').strip()
+    end_date = args.get('end_date', '').strip()
+
+    if start_date or end_date:
+        query['date'] = {}
+        if start_date:
+            try:
+                query['date']['$gte'] = parser.parse(start_date)
+            except (ValueError, OverflowError):
+                pass
+        if end_date:
+            try:
+                # Include the entire end date
+                end = parser.parse(end_date).replace(hour=23, minute=59, second=59)
+                query['date']['$lte'] = end
+            except (ValueError, OverflowError):
+                pass
+
+    # Tags filter
+    tags = args.get('tags', '').strip()
+    if tags:
+        query['tags'] = {'$in': sorted(t.strip() for t in tags.split(','))}
+
+    filters_applied = {
+        'search_query': search_text if search_text else None,
+        'categories': category_list,
+        'type': txn_type if txn_type else None,
+        'bank_id': bank_id if bank_id else None,
+        'amount_range': {
+            'min': query['amount'].get('$gte'),
+            'max': query['amount'].get('$lte')
+        } if min_amount or max_amount else None,
+        'date_range': {
+            'start': start_date if start_date else None,
+            'end': end_date if end_date else None
+        } if start_date or end_date else None
+    }
+    return query, filters_applied, text_query
+
+
+def query_key(query):
+    """Stable digest of a filter, used to bind cursors and cache entries to one search"""
+    encoded = json.dumps(query, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()[:16]
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'$date': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and '$date' in value:
+        return datetime.fromisoformat(value['$date'])
+    return value
+
+
+def encode_cursor(query, sort_field, sort_direction, last=None, offset=None):
+    """Opaque continuation token bound to this filter and sort.
+
+    Holds the last row's sort key and _id, or for relevance order (which
+    has no stored sort key) the offset into the ranked matches.
+    """
+    payload = {'k': query_key(query), 'f': sort_field, 'd': sort_direction}
+    if offset is not None:
+        payload['o'] = offset
+    else:
+        payload['v'] = _encode_value(last.get(sort_field))
+        payload['id'] = str(last['_id'])
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, query, sort_field, sort_direction):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        if 'o' in payload:
+            position = int(payload['o'])
+        else:
+            position = (_decode_value(payload['v']), ObjectId(payload['id']))
+    except Exception:
+        raise InvalidCursor('Invalid cursor')
+    if (payload.get('k'), payload.get('f'), payload.get('d')) != (query_key(query), sort_field, sort_direction):
+        raise InvalidCursor('Cursor belongs to a different search; start again without a cursor')
+    return position
+
+
+def keyset_condition(sort_field, sort_direction, value, last_id):
+    """Rows strictly after (value, last_id) in (sort_field, _id) order"""
+    op = '$lt' if sort_direction == -1 else '$gt'
+    tie = {sort_field: value, '_id': {op: last_id}}
+    if value is None:
+        # Missing values sort lowest: descending there is nothing below them
+        if sort_direction == -1:
+            return tie
+        return {'$or': [{sort_field: {'$ne': None}}, tie]}
+    return {'$or': [{sort_field: {op: value}}, tie]}
+
+
+SUMMARY_GROUP = {
+    '$group': {
+        '_id': None,
+        'total_income': {'$sum': {'$cond': [{'$eq': ['$type', 'income']}, '$amount', 0]}},
+        'total_expense': {'$sum': {'$cond': [{'$eq': ['$type', 'expense']}, '$amount', 0]}},
+        'count': {'$sum': 1}
+    }
+}
+
+
+def format_summary(groups):
+    """Search summary from the SUMMARY_GROUP result (empty list: no matches)"""
+    if not groups or not groups[0]['count']:
+        return {
+            'total_income': 0,
+            'total_expense': 0,
+            'net': 0,
+            'count': 0,
+            'average_transaction': 0
+        }
+
+    totals = groups[0]
+    return {
+        'total_income': totals['total_income'],
+        'total_expense': totals['total_expense'],
+        'net': totals['total_income'] - totals['total_expense'],
+        'count': totals['count'],
+        'average_transaction': (totals['total_income'] + totals['total_expense']) / totals['count']
+    }
+
+
+class SummaryCache:
+    """Search summaries per user and filter.
+
+    Every write to a user's transactions in this process drops that user's
+    entries; entries also expire after ttl seconds, which bounds staleness
+    from writes made elsewhere (ingestion workers, scripts).
+    """
+
+    def __init__(self, ttl=SUMMARY_TTL_SECONDS, max_entries=SUMMARY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()    # (user_id, filter key) -> (summary, stored_at)
+        self.keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id, key):
+        with self._lock:
+            entry = self.entries.get((user_id, key))
+            if not entry:
+                return None
+            if time.time() - entry[1] >= self.ttl:
+                self._remove((user_id, key))
+                return None
+            self.entries.move_to_end((user_id, key))
+            return entry[0]
+
+    def put(self, user_id, key, summary):
+        with self._lock:
+            self.entries[(user_id, key)] = (summary, time.time())
+            self.entries.move_to_end((user_id, key))
+            self.keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+
+    def forget(self, user_id, changes=None):
+        with self._lock:
+            if user_id is None:
+                self.entries.clear()
+                self.keys_by_user.clear()
+                return
+            for key in self.keys_by_user.pop(user_id, ()):
+                self.entries.pop((user_id, key), None)
+
+    def _remove(self, entry_key):
+        self.entries.pop(entry_key, None)
+        user_keys = self.keys_by_user.get(entry_key[0])
+        if user_keys is not None:
+            user_keys.discard(entry_key[1])
+            if not user_keys:
+                del self.keys_by_user[entry_key[0]]
+
+
+_summary_cache = None
+
+
+def get_summary_cache():
+    """Process-wide summary cache, invalidated by this process's transaction writes"""
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = SummaryCache()
+        for event in (transaction_events.INSERTED, transaction_events.UPDATED,
+                      transaction_events.DELETED, transaction_events.RESET):
+            transaction_events.subscribe(event, _summary_cache.forget)
+    return _summary_cache
+
+
+def serialize_transaction(txn):
+    txn['_id'] = str(txn['_id'])
+    txn.pop('search_tokens', None)
+    if isinstance(txn.get('date'), datetime):
+        txn['date'] = txn['date'].isoformat()
+    if isinstance(txn.get('created_at'), datetime):
+        txn['created_at'] = txn['created_at'].isoformat()
+    if 'bank_id' in txn and txn['bank_id']:
+        txn['bank_id'] = str(txn['bank_id'])
+    return txn
+
+
+def rank_rows(rows, text_query):
+    """Rows (newest first) reordered by text match score; the sort is stable"""
+    for row in rows:
+        row['score'] = text_query.score(row)
+    return sorted(rows, key=lambda row: -row['score'])
+
+
+def search_page(collection, query, sort_field='date', sort_direction=-1, limit=DEFAULT_LIMIT,
+                cursor=None, page=None, text_query=None, summary_cache=None):
+    """One page of matching transactions plus a summary of every match.
+
+    Cursor mode (page is None) seeks past the previous page's last
+    (sort value, _id) instead of skipping, so every page costs the same.
+    One extra row is fetched to tell whether another page exists.
+    Relevance order (needs text_query) ranks the newest MAX_RANKED matches,
+    and pagination counts only those.
+
+    The page is a plain find on the (sort field, _id) indexes. The summary
+    (totals, count, average over the whole filtered set) is a separate
+    $group, skipped when summary_cache already has it.
+    Returns (transactions, pagination, summary).
+    """
+    sort_field = sort_field if sort_field in SORT_FIELDS else 'date'
+    if sort_field == 'relevance' and not text_query:
+        sort_field = 'date'
+    sort = [(sort_field, sort_direction), ('_id', sort_direction)]
+    limit = min(max(1, limit), MAX_LIMIT)
+
+    offset = 0
+    skip = 0
+    fetch = limit + 1
+    page_query = query
+    if sort_field == 'relevance':
+        if page is not None:
+            offset = (max(1, page) - 1) * limit
+        elif cursor:
+            offset = decode_cursor(cursor, query, sort_field, sort_direction)
+        sort = [('date', -1), ('_id', -1)]
+        fetch = MAX_RANKED
+    elif page is not None:
+        page = max(1, page)
+        skip = (page - 1) * limit
+    elif cursor:
+        value, last_id = decode_cursor(cursor, query, sort_field, sort_direction)
+        page_query = {'$and': [query, keyset_condition(sort_field, sort_direction, value, last_id)]}
+
+    rows = list(collection.find(page_query, sort=sort, skip=skip, limit=fetch))
+
+    user_id = query.get('user_id')
+    key = query_key(query)
+    summary = summary_cache.get(user_id, key) if summary_cache else None
+    if summary is None:
+        summary = format_summary(list(collection.aggregate([{'$match': query}, SUMMARY_GROUP], allowDiskUse=True)))
+        if summary_cache:
+            summary_cache.put(user_id, key, summary)
+
+    total_count = summary['count']
+    if sort_field == 'relevance':
+        rows = rank_rows(rows, text_query)[offset:offset + limit + 1]
+        total_count = min(total_count, MAX_RANKED)
+
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+
+    pagination = {'per_page': limit, 'has_next': has_next, 'total_count': total_count}
+    if page is not None:
+        total_pages = (total_count + limit - 1) // limit
+        pagination.update({
+            'current_page': page,
+            'total_pages': total_pages,
+            'has_next': page < total_pages,
+            'has_prev': page > 1
+        })
+    else:
+        if not has_next:
+            pagination['next_cursor'] = None
+        elif sort_field == 'relevance':
+            pagination['next_cursor'] = encode_cursor(query, sort_field, sort_direction, offset=offset + limit)
+        else:
+            pagination['next_cursor'] = encode_cursor(query, sort_field, sort_direction, rows[-1])
+        pagination['has_prev'] = bool(cursor)
+
+    return [serialize_transaction(txn) for txn in rows], pagination, summary
@@ -0,0 +1,43 @@
+"""
+Backfill transaction fingerprints on existing data.
+
+Adds the (user, date, amount, description prefix) fingerprint that
+statement imports now rely on for duplicate detection to statement
+transactions stored before it existed, and to rows from before the source
+field (imports and manual entries alike, as the old duplicate check
+matched both), converting ISO string dates to real dates on the way.
+Rows recorded as manual are left alone. Runs in _id-ordered batches and
+resumes from its checkpoint if interrupted. Rows that turn out to duplicate an earlier row are left in
+place with duplicate_fingerprint set.
+
+Usage: python backfill_fingerprints.py [batch_size] [--restart]
+"""
+
+import sys
+import os
+
+os.environ['INGESTION_WORKERS'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+
+
+def print_progress(processed, fingerprinted, duplicates, errors):
+    print(f"   🔄 {processed} processed, {fingerprinted} fingerprinted, "
+          f"{duplicates} duplicates, {errors} errors")
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    batch_size = int(args[0]) if args else 1000
+    restart = '--restart' in sys.argv
+
+    app = create_app()
+    with app.app_context():
+        from app.services.transaction_import import backfill_fingerprints
+
+        print("🔑 Backfilling transaction fingerprints...")
+        state = backfill_fingerprints(batch_size=batch_size, resume=not restart, progress=print_progress)
+
+    print(f"\n✅ Done: {state['fingerprinted']} fingerprinted, "
+          f"{state['duplicates']} existing duplicates marked, {state['errors']} errors")
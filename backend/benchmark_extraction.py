@@ -0,0 +1,110 @@
+"""
+Benchmark for statement page parsing.
+
+Compares the old access pattern (pdfplumber page used directly for text and
+for every table strategy) with the shared PageLayout cache, counting how often
+each expensive step runs and timing the whole extraction.
+
+Usage: python benchmark_extraction.py [path_to_pdf] [repeats]
+"""
+
+import sys
+import os
+import io
+import time
+import tempfile
+import contextlib
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pdfplumber
+import pdfplumber.utils
+import pdfplumber.table
+from pdfminer.pdfinterp import PDFPageInterpreter
+
+from app.ml_models.statement_extractor import StatementExtractor
+from app.ml_models.bank_profiles import BankProfileRegistry
+
+counts = Counter()
+
+
+def counted(name, func):
+    def wrapper(*args, **kwargs):
+        counts[name] += 1
+        return func(*args, **kwargs)
+    return wrapper
+
+
+# Content stream decodes, page-level word clustering and table row scans
+PDFPageInterpreter.process_page = counted('content stream decodes', PDFPageInterpreter.process_page)
+pdfplumber.utils.extract_words = counted('word clusterings', pdfplumber.utils.extract_words)
+pdfplumber.utils.chars_to_textmap = counted('text maps', pdfplumber.utils.chars_to_textmap)
+pdfplumber.table.TableFinder.__init__ = counted('table searches', pdfplumber.table.TableFinder.__init__)
+pdfplumber.table.Table.extract = counted('full-page row scans', pdfplumber.table.Table.extract)
+
+
+def extract_uncached(extractor, pdf_path):
+    """The pre-cache pattern: text from each page, then tables from the raw pages"""
+    with pdfplumber.open(pdf_path) as pdf:
+        texts = [page.extract_text() for page in pdf.pages]
+        transactions = []
+        for page_num, page in enumerate(pdf.pages, 1):
+            transactions.extend(extractor.extract_transactions_from_page(page, page_num))
+    return texts, transactions
+
+
+def extract_cached(extractor, pdf_path):
+    results = extractor.extract_page_range(pdf_path, 1)
+    texts = [text for _, text, _, _ in results]
+    transactions = [txn for _, _, page_transactions, _ in results for txn in page_transactions]
+    return texts, transactions
+
+
+def run(label, func, extractor, pdf_path, repeats):
+    counts.clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        output = func(extractor, pdf_path)
+    parse_counts = dict(counts)
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(extractor, pdf_path)
+        timings.append(time.perf_counter() - start)
+
+    print(f"\n{label}")
+    print("-" * 60)
+    for name in ['content stream decodes', 'text maps', 'word clusterings',
+                 'table searches', 'full-page row scans']:
+        print(f"   {name:<26} {parse_counts.get(name, 0):>6}")
+    print(f"   {'wall time (best)':<26} {min(timings):>9.3f}s")
+    print(f"   {'wall time (mean)':<26} {sum(timings) / len(timings):>9.3f}s")
+    return output, min(timings)
+
+
+if __name__ == "__main__":
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else "test_bank_statement_sbi.pdf"
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    if not os.path.exists(pdf_path):
+        print(f"❌ Could not find file: {pdf_path}")
+        sys.exit(1)
+
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+
+    print("=" * 60)
+    print(f"PAGE PARSING BENCHMARK: {pdf_path} ({page_count} pages, {repeats} runs)")
+    print("=" * 60)
+
+    # A blank profile each time, so both runs go through the full strategy trial
+    extractor = StatementExtractor(profiles=BankProfileRegistry(os.path.join(tempfile.mkdtemp(), 'profiles.json')))
+    before, before_time = run("BEFORE: pdfplumber pages", extract_uncached, extractor, pdf_path, repeats)
+    after, after_time = run("AFTER: PageLayout cache", extract_cached, extractor, pdf_path, repeats)
+
+    print("\n" + "=" * 60)
+    print(f"Same text and transactions: {'✅ yes' if before == after else '❌ NO'}")
+    print(f"Speedup: {before_time / after_time:.2f}x")
+    print("=" * 60)
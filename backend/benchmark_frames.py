@@ -0,0 +1,81 @@
+"""
+Benchmark for the ML models' input format.
+
+Times ExpensePredictor, BudgetOptimizer and RecurringDetector
+on synthetic transactions shaped like Transaction.find_by_user output
+(list of dicts with ISO date strings, converted on every call) and on a
+prebuilt TransactionFrame (what the frame cache hands out), and reports
+the one-off cost of building the frame.
+
+Usage: python benchmark_frames.py [transactions] [repeats]
+"""
+
+import sys
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.ml_models.transaction_frame import TransactionFrame
+from app.ml_models.expense_predictor import ExpensePredictor
+from app.ml_models.budget_optimizer import BudgetOptimizer
+from app.ml_models.recurring_detector import RecurringDetector
+
+CATEGORIES = ['Food & Dining', 'Transportation', 'Shopping', 'Bills & Utilities',
+              'Entertainment', 'Healthcare', 'Education', 'Salary', 'Other']
+MERCHANTS = ['SWIGGY', 'ZOMATO', 'UBER', 'AMAZON', 'FLIPKART', 'NETFLIX', 'AIRTEL', 'APOLLO PHARMACY']
+
+
+def synthetic_transactions(count):
+    """Newest first, like Transaction.find_by_user"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    transactions = []
+    for i in range(count):
+        transactions.append({
+            '_id': f'{i:024x}',
+            'date': (now - timedelta(minutes=rng.randrange(3 * 365 * 24 * 60))).isoformat(),
+            'amount': round(rng.uniform(10, 5000), 2),
+            'type': 'income' if rng.random() < 0.1 else 'expense',
+            'category': rng.choice(CATEGORIES),
+            'description': f'UPI/{rng.choice(MERCHANTS)}/{rng.randrange(10 ** 6)}'
+        })
+    transactions.sort(key=lambda t: t['date'], reverse=True)
+    return transactions
+
+
+def best_of(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    print(f"🧪 {count:,} synthetic transactions, best of {repeats}")
+    transactions = synthetic_transactions(count)
+
+    build_time = best_of(lambda: TransactionFrame.from_records(transactions), repeats)
+    frame = TransactionFrame.from_records(transactions)
+    print(f"   🧱 building the frame: {build_time * 1000:9.1f} ms (once per cache load)\n")
+
+    predictor, optimizer, detector = ExpensePredictor(), BudgetOptimizer(), RecurringDetector()
+    cases = [
+        ('ExpensePredictor.predict_simple', lambda data: predictor.predict_simple(data)),
+        ('BudgetOptimizer.analyze_spending_pattern', lambda data: optimizer.analyze_spending_pattern(data)),
+        ('RecurringDetector.detect_recurring', lambda data: detector.detect_recurring(data)),
+    ]
+
+    print(f"{'model':<42} {'dicts/call':>14} {'frame':>10} {'speedup':>8}")
+    for name, run in cases:
+        list_time = best_of(lambda: run(transactions), repeats)
+        frame_time = best_of(lambda: run(frame), repeats)
+        print(f"{name:<42} {list_time * 1000:>11.1f} ms {frame_time * 1000:>7.1f} ms "
+              f"{list_time / frame_time:>7.1f}x")
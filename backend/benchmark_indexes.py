@@ -0,0 +1,133 @@
+"""
+Benchmark for the declared MongoDB indexes.
+
+Seeds a scratch database with synthetic transactions (default 1,000,000
+across 200 users), times the app's hot transaction queries with only the
+_id index, then applies the declared indexes and times them again.
+
+Needs a local mongod. The database named by BENCH_DB (default
+finplanner_bench) on MONGODB_URI's server is dropped and recreated.
+
+Usage: python benchmark_indexes.py [transactions] [users] [--keep]
+"""
+
+import sys
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+os.environ['AUTO_APPLY_INDEXES'] = '0'
+os.environ['INGESTION_WORKERS'] = '0'
+
+BENCH_DB = os.getenv('BENCH_DB', 'finplanner_bench')
+server = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/finplanner').rsplit('/', 1)[0]
+os.environ['MONGODB_URI'] = f"{server}/{BENCH_DB}"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+
+CATEGORIES = ['Food & Dining', 'Transportation', 'Shopping', 'Bills & Utilities',
+              'Entertainment', 'Healthcare', 'Education', 'Other']
+MERCHANTS = ['SWIGGY', 'ZOMATO', 'UBER', 'AMAZON', 'FLIPKART', 'NETFLIX', 'AIRTEL', 'APOLLO PHARMACY']
+BATCH_SIZE = 10000
+
+
+def seed(collection, count, users):
+    start = datetime(2022, 1, 1)
+    rng = random.Random(42)
+    inserted = 0
+    while inserted < count:
+        batch = []
+        for _ in range(min(BATCH_SIZE, count - inserted)):
+            is_income = rng.random() < 0.1
+            batch.append({
+                'user_id': f"user{rng.randrange(users)}",
+                'amount': round(rng.uniform(10, 5000), 2),
+                'category': 'Income' if is_income else rng.choice(CATEGORIES),
+                'description': f"UPI/{rng.choice(MERCHANTS)}/{rng.randrange(10 ** 6)}",
+                'date': start + timedelta(minutes=rng.randrange(3 * 365 * 24 * 60)),
+                'type': 'income' if is_income else 'expense',
+                'source': 'statement',
+                'created_at': datetime.utcnow(),
+                'updated_at': datetime.utcnow()
+            })
+        collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+        print(f"   🌱 {inserted}/{count}", end='\r')
+    print()
+
+
+def queries(user_id):
+    month_start = datetime(2024, 6, 1)
+    return [
+        ('recent transactions', lambda c: list(c.find({'user_id': user_id}).sort('date', -1).limit(100))),
+        ('date range', lambda c: list(c.find(
+            {'user_id': user_id, 'date': {'$gte': month_start, '$lt': month_start + timedelta(days=30)}}
+        ).sort('date', -1))),
+        ('category search page', lambda c: list(c.find(
+            {'user_id': user_id, 'category': {'$in': ['Shopping']}}
+        ).sort('date', -1).skip(20).limit(20))),
+        ('type count', lambda c: c.count_documents({'user_id': user_id, 'type': 'expense'})),
+        ('fingerprint lookup', lambda c: c.find_one({'user_id': user_id, 'fingerprint': 'missing'})),
+        ('analytics $match/$group', lambda c: list(c.aggregate([
+            {'$match': {'user_id': user_id, 'type': 'expense'}},
+            {'$group': {'_id': '$category', 'total': {'$sum': '$amount'}}}
+        ]))),
+    ]
+
+
+def time_queries(collection, users, repeats=5):
+    timings = {}
+    for user_index in range(repeats):
+        for name, run in queries(f"user{(user_index * 37) % users}"):
+            started = time.perf_counter()
+            run(collection)
+            timings.setdefault(name, []).append(time.perf_counter() - started)
+    return {name: sorted(values)[len(values) // 2] for name, values in timings.items()}
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    count = int(args[0]) if len(args) > 0 else 1000000
+    users = int(args[1]) if len(args) > 1 else 200
+
+    app = create_app()
+    with app.app_context():
+        from app.config.database import mongo
+        from app.config.schema import apply_indexes, explain_queries
+        from app.models.transaction import Transaction
+
+        collection = Transaction.collection
+        print(f"🗑️ Dropping {BENCH_DB}")
+        mongo.cx.drop_database(BENCH_DB)
+
+        print(f"🌱 Seeding {count} transactions for {users} users")
+        started = time.perf_counter()
+        seed(collection, count, users)
+        print(f"   done in {time.perf_counter() - started:.1f}s")
+
+        print("⏱️ Timing queries without secondary indexes")
+        before = time_queries(collection, users)
+
+        print("🗂️ Applying declared indexes")
+        started = time.perf_counter()
+        apply_indexes([Transaction])
+        print(f"   built in {time.perf_counter() - started:.1f}s")
+
+        print("⏱️ Timing queries with indexes")
+        after = time_queries(collection, users)
+
+        print(f"\n{'query':<26}{'no index':>12}{'indexed':>12}{'speedup':>10}")
+        for name in before:
+            print(f"{name:<26}{before[name] * 1000:>10.1f}ms{after[name] * 1000:>10.1f}ms"
+                  f"{before[name] / max(after[name], 1e-6):>9.0f}x")
+
+        print("\n📋 Plans for the transaction query shapes")
+        for row in explain_queries('user0'):
+            if row['collection'] == collection.name:
+                print(f"   {row['query']:<38} {row['plan']}")
+
+        if '--keep' not in sys.argv:
+            mongo.cx.drop_database(BENCH_DB)
@@ -0,0 +1,35 @@
+"""
+Standalone statement ingestion worker.
+
+Processes queued statement uploads from the ingestion_jobs collection, for
+deployments that run the web app with INGESTION_WORKERS=0 and ingest
+elsewhere. Jobs left running by a worker that died are picked up again
+once their heartbeat is older than INGESTION_STALE_SECONDS.
+
+Usage: python ingestion_worker.py [threads]
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The web app's own worker threads stay off in this process
+threads = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+os.environ['INGESTION_WORKERS'] = '0'
+
+from app import create_app
+from app.services.ingestion import IngestionWorkerPool
+
+
+if __name__ == '__main__':
+    app = create_app()
+    pool = IngestionWorkerPool(workers=threads)
+    pool.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping ingestion workers...")
+        pool.stop(timeout=30)
@@ -0,0 +1,142 @@
+"""
+Database schema management: indexes, query plans and data migrations.
+
+Commands:
+    indexes              create the indexes declared on the models (idempotent)
+    status               declared vs existing indexes per collection
+    explain [--user ID]  explain the app's hot queries and flag COLLSCANs / in-memory sorts
+    profile [limit]      recent COLLSCANs recorded by the profiler (enable it first with
+                         db.setProfilingLevel(1, {slowms: 50}) in mongosh)
+    migrations           list data migrations and when they were applied
+    migrate [ID]         run pending data migrations (or just ID)
+    rollups [--user ID]  rebuild monthly analytics rollups from transactions
+    alert-stats [--user ID]
+                         rebuild the running statistics behind streaming alerts
+    subscriptions [--user ID]
+                         re-detect subscriptions and recurring bills from transactions
+
+Usage: python manage_db.py <command> [options]
+"""
+
+import sys
+import os
+
+os.environ['AUTO_APPLY_INDEXES'] = '0'
+os.environ['INGESTION_WORKERS'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+
+
+def cmd_indexes(args):
+    from app.config.schema import apply_indexes
+
+    for row in apply_indexes():
+        icon = {'created': '✨', 'exists': '✅'}.get(row['status'], '❌')
+        print(f"{icon} {row['collection']}.{row['name']}: {row['status']}"
+              + (f" ({row['error']})" if row.get('error') else ''))
+
+
+def cmd_status(args):
+    from app.config.schema import declared_models
+
+    for model in declared_models():
+        existing = model.collection.index_information()
+        declared = {index.document['name'] for index in model.indexes}
+        print(f"📁 {model.collection.name}")
+        for name in sorted(declared):
+            print(f"   {'✅' if name in existing else '❌ missing'} {name}")
+        for name in sorted(set(existing) - declared - {'_id_'}):
+            print(f"   ⚠️ undeclared {name} {existing[name]['key']}")
+
+
+def cmd_explain(args):
+    from app.config.schema import explain_queries
+
+    user_id = args[args.index('--user') + 1] if '--user' in args else None
+    report = explain_queries(user_id)
+    for row in report:
+        icon = '❌' if row['collscan'] else ('⚠️' if row['in_memory_sort'] else '✅')
+        print(f"{icon} {row['query']:<38} {row['plan']:<40} examined={row['docs_examined']}")
+
+    collscans = [row for row in report if row['collscan']]
+    print(f"\n{len(collscans)} of {len(report)} queries use a collection scan")
+
+
+def cmd_profile(args):
+    from app.config.database import mongo
+    from app.config.schema import profiled_collscans
+
+    limit = int(args[0]) if args else 20
+    report = profiled_collscans(mongo.db, limit)
+    if not report:
+        print("✅ No COLLSCANs in system.profile (is profiling enabled?)")
+    for row in report:
+        print(f"❌ {row['ts']} {row['ns']} {row['op']} on {row['fields']} "
+              f"{row['millis']}ms examined={row['docs_examined']}")
+
+
+def cmd_migrations(args):
+    from app.config.migrations import migration_status
+
+    for row in migration_status():
+        applied = row['applied_at'].isoformat() if row['applied_at'] else 'pending'
+        print(f"{'✅' if row['applied_at'] else '⏳'} {row['id']:<32} {applied:<28} {row['description']}")
+
+
+def cmd_migrate(args):
+    from app.config.migrations import run_pending
+
+    results = run_pending(args[0] if args else None)
+    if not results:
+        print("✅ Nothing to migrate")
+    for row in results:
+        print(f"{'✅' if row['status'] == 'applied' else '❌'} {row['id']}: "
+              f"{row.get('summary', row.get('error'))}")
+
+
+def cmd_rollups(args):
+    from app.services.rollups import rebuild_rollups
+
+    user_id = args[args.index('--user') + 1] if '--user' in args else None
+    stats = rebuild_rollups(user_id, progress=lambda users, months: print(f"   🔄 {users} users, {months} months", end='\r'))
+    print(f"\n✅ Rebuilt {stats['months']} months for {stats['users']} users")
+
+
+def cmd_alert_stats(args):
+    from app.services.alert_stream import rebuild_alert_stats
+
+    user_id = args[args.index('--user') + 1] if '--user' in args else None
+    stats = rebuild_alert_stats(user_id, progress=lambda users: print(f"   🔄 {users} users", end='\r'))
+    print(f"\n✅ Rebuilt alert statistics for {stats['users']} users")
+
+
+def cmd_subscriptions(args):
+    from app.services.subscriptions import rebuild_subscriptions
+
+    user_id = args[args.index('--user') + 1] if '--user' in args else None
+    stats = rebuild_subscriptions(user_id, progress=lambda users, subscriptions: print(f"   🔄 {users} users, {subscriptions} subscriptions", end='\r'))
+    print(f"\n✅ Detected {stats['subscriptions']} subscriptions for {stats['users']} users")
+
+
+COMMANDS = {
+    'indexes': cmd_indexes,
+    'status': cmd_status,
+    'explain': cmd_explain,
+    'profile': cmd_profile,
+    'migrations': cmd_migrations,
+    'migrate': cmd_migrate,
+    'rollups': cmd_rollups,
+    'alert-stats': cmd_alert_stats,
+    'subscriptions': cmd_subscriptions,
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(__doc__)
+        sys.exit(1)
+
+    app = create_app()
+    with app.app_context():
+        COMMANDS[sys.argv[1]](sys.argv[2:])
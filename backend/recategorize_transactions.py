@@ -0,0 +1,68 @@
+"""
+Re-apply the current category rules to stored transactions.
+
+Streams the transactions collection in _id order and writes changed
+categories back in unordered bulk updates. Progress is checkpointed, so an
+interrupted run picks up where it stopped when started again.
+
+Usage:
+    python recategorize_transactions.py --dry-run
+    python recategorize_transactions.py [--user USER_ID] [--batch-size 5000] [--restart]
+"""
+
+import sys
+import os
+import argparse
+
+# A one-off run must not claim queued statement uploads and then exit
+os.environ['INGESTION_WORKERS'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Recategorize stored transactions')
+    arg_parser.add_argument('--dry-run', action='store_true', help='report what would change without writing')
+    arg_parser.add_argument('--user', help='only this user_id')
+    arg_parser.add_argument('--batch-size', type=int, default=5000)
+    arg_parser.add_argument('--job-name', default='recategorize')
+    arg_parser.add_argument('--restart', action='store_true', help='ignore the saved checkpoint')
+    arg_parser.add_argument('--include-manual', action='store_true',
+                            help='also recategorize transactions entered by hand or without a recorded source')
+    args = arg_parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        from app.services.recategorization import RecategorizationJob
+
+        job = RecategorizationJob(
+            job_name=args.job_name,
+            batch_size=args.batch_size,
+            user_id=args.user,
+            dry_run=args.dry_run,
+            include_manual=args.include_manual
+        )
+        summary = job.run(resume=not args.restart)
+
+    print("\n" + "=" * 60)
+    print("DRY RUN - nothing written" if summary['dry_run'] else "RECATEGORIZATION COMPLETE")
+    print("=" * 60)
+    print(f"Processed: {summary['processed']}")
+    print(f"{'Would change' if summary['dry_run'] else 'Changed'}: {summary['changed']}")
+    if summary['errors']:
+        print(f"Write errors: {summary['errors']}")
+    print(f"Time: {summary['seconds']}s\n")
+
+    if summary['categories']:
+        print(f"{'Category':<25}{'Gained':>10}{'Lost':>10}{'Net':>10}")
+        for category, entry in summary['categories'].items():
+            print(f"{category:<25}{entry['gained']:>10}{entry['lost']:>10}{entry['net']:>+10}")
+
+        print("\nTop moves:")
+        for move in summary['transitions'][:15]:
+            print(f"  {move['from']} -> {move['to']}: {move['count']}")
+
+
+if __name__ == '__main__':
+    main()
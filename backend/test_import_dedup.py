@@ -0,0 +1,67 @@
+"""
+Check that re-importing a statement doesn't insert its rows again.
+
+Imports a synthetic statement for a throwaway user, then an overlapping
+one (half old rows, half new) under a different bank id, then the first
+statement again with no bank. Only the new half may be inserted. Runs
+against the configured database and removes everything it wrote.
+
+Usage: python test_import_dedup.py
+"""
+
+import sys
+import os
+import uuid
+from datetime import datetime, timedelta
+
+os.environ['INGESTION_WORKERS'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+
+
+def statement_rows(start, days):
+    return [
+        {
+            'date': (start + timedelta(days=i)).isoformat(),
+            'amount': 100 + i,
+            'description': f'UPI/DR/{i:06d}/SHOP {i}',
+            'category': 'Shopping',
+            'type': 'expense'
+        }
+        for i in range(days)
+    ]
+
+
+def check(label, result, expected):
+    ok = result == expected
+    print(f"{'✅' if ok else '❌'} {label}: added/skipped {result}, expected {expected}")
+    return ok
+
+
+if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        from app.config.database import mongo
+        from app.services.transaction_import import import_transactions
+
+        user_id = f'dedup-check-{uuid.uuid4().hex}'
+        start = datetime(2026, 1, 1)
+        first = statement_rows(start, 40)
+        overlapping = first[20:] + statement_rows(start + timedelta(days=40), 20)
+
+        try:
+            results = [
+                check('first statement', import_transactions(user_id, first, bank_id='bank-a'), (40, 0)),
+                check('overlapping statement, other bank', import_transactions(user_id, overlapping, bank_id='bank-b'), (20, 20)),
+                check('first statement again, no bank', import_transactions(user_id, first), (0, 40)),
+            ]
+            stored = mongo.db.transactions.count_documents({'user_id': user_id})
+            results.append(check('rows stored', (stored, 0), (60, 0)))
+        finally:
+            for name in ('transactions', 'monthly_rollups', 'rollup_state', 'alert_stats', 'notifications',
+                         'subscriptions', 'subscription_candidates', 'subscription_state'):
+                mongo.db[name].delete_many({'user_id': user_id})
+
+        print("\n✅ Re-imports insert no duplicates" if all(results) else "\n❌ Duplicate rows were inserted")
+        sys.exit(0 if all(results) else 1)
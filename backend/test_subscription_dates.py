@@ -0,0 +1,70 @@
+"""
+Check that a manual payment dated by the dashboard extends its subscription.
+
+The dashboard sends toISOString() dates ('2026-10-17T10:00:00.000Z').
+Imports a monthly series for a throwaway user, then records the next
+payment the way the dashboard does and expects the series to take it.
+Runs against the configured database and removes everything it wrote.
+
+Usage: python test_subscription_dates.py
+"""
+
+import sys
+import os
+import uuid
+from datetime import datetime, timedelta
+
+os.environ['INGESTION_WORKERS'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+
+
+def check(label, actual, expected):
+    ok = actual == expected
+    print(f"{'✅' if ok else '❌'} {label}: {actual}, expected {expected}")
+    return ok
+
+
+if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        from app.config.database import mongo
+        from app.models.transaction import Transaction
+        from app.services.transaction_import import import_transactions
+        from app.services.subscriptions import rebuild_subscriptions, overview
+
+        user_id = f'subscription-check-{uuid.uuid4().hex}'
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        payments = [today - timedelta(days=30 * k) for k in range(4, 0, -1)]
+
+        try:
+            import_transactions(user_id, [
+                {'date': date.isoformat(), 'amount': 649, 'description': 'NETFLIX.COM SUBSCRIPTION',
+                 'category': 'Entertainment', 'type': 'expense'}
+                for date in payments
+            ])
+            rebuild_subscriptions(user_id)
+
+            Transaction.create(user_id, {
+                'amount': 649,
+                'category': 'Entertainment',
+                'type': 'expense',
+                'description': 'NETFLIX.COM SUBSCRIPTION',
+                'date': (today + timedelta(hours=10)).isoformat(timespec='milliseconds') + 'Z'
+            })
+            series = overview(user_id)['subscriptions']
+            results = [
+                check('subscriptions', len(series), 1),
+                check('payments', series[0]['occurrences'] if series else None, 5),
+                check('last payment', series[0]['last_date'][:10] if series else None, today.date().isoformat()),
+                check('status', series[0]['status'] if series else None, 'active'),
+            ]
+        finally:
+            for name in ('transactions', 'monthly_rollups', 'rollup_state', 'alert_stats', 'notifications',
+                         'subscriptions', 'subscription_candidates', 'subscription_state'):
+                mongo.db[name].delete_many({'user_id': user_id})
+
+        print("\n✅ Dashboard-dated payments extend their subscription" if all(results)
+              else "\n❌ The payment was not recorded on its subscription")
+        sys.exit(0 if all(results) else 1)
@@ -48,6 +48,26 @@ export default function BankManagement({ onRefresh }) {
     }
   };
 
+  const waitForJob = async (jobId) => {
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, 1000));
+      const { data: job } = await api.get(`/banks/jobs/${jobId}`);
+      const { pages_total, pages_parsed, rows_extracted, rows_inserted, rows_skipped } = job.progress;
+
+      // Parsing pages is the first 60%, importing rows the rest
+      let progress = pages_total ? (pages_parsed / pages_total) * 60 : 0;
+      if (rows_extracted) {
+        progress = 60 + ((rows_inserted + rows_skipped) / rows_extracted) * 40;
+      }
+      setUploadProgress(Math.min(Math.round(progress), 99));
+
+      if (job.status === 'completed') return job.result;
+      if (job.status === 'failed') {
+        throw new Error(job.error || 'Failed to process statement');
+      }
+    }
+  };
+
   const handleFileUpload = async (e) => {
     const file = e.target.files[0];
     if (!file) return;
@@ -65,25 +85,24 @@ export default function BankManagement({ onRefresh }) {
       const formData = new FormData();
       formData.append('file', file);
 
-      // Simulate progress
-      const progressInterval = setInterval(() => {
-        setUploadProgress(prev => Math.min(prev + 10, 90));
-      }, 500);
-
-      const result = await api.post('/banks/upload-statement', formData, {
+      const response = await api.post('/banks/upload-statement', formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
       });
 
-      clearInterval(progressInterval);
+      // The statement is processed in the background; follow its job
+      const result = response.data.job_id
+        ? await waitForJob(response.data.job_id)
+        : response.data;
+
       setUploadProgress(100);
 
-      if (result.data.duplicate) {
-        setUploadMessage(`⚠️ ${result.data.message}`);
+      if (result.duplicate) {
+        setUploadMessage(`⚠️ ${result.message}`);
       } else {
         setUploadMessage(
-          `✅ Success! ${result.data.transactions_added} transactions added from ${result.data.bank_info.bank_name}`
+          `✅ Success! ${result.transactions_added} transactions added from ${result.bank_info.bank_name}`
         );
         loadData();
         if (onRefresh) onRefresh();
@@ -91,7 +110,7 @@ export default function BankManagement({ onRefresh }) {
     } catch (error) {
       console.error('Upload error:', error);
       setUploadMessage(
-        `❌ Error: ${error.response?.data?.error || 'Failed to process statement. Please try again.'}`
+        `❌ Error: ${error.response?.data?.error || error.message || 'Failed to process statement. Please try again.'}`
       );
     } finally {
       setUploading(false);
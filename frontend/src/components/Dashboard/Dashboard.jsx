@@ -628,11 +628,11 @@ export default function Dashboard() {
               <div className="form-group">
                 <label>Category</label>
                 <select name="category" required>
-                  <option value="Food & Groceries">Food & Groceries</option>
+                  <option value="Food & Dining">Food & Dining</option>
                   <option value="Shopping">Shopping</option>
                   <option value="Transportation">Transportation</option>
                   <option value="Entertainment">Entertainment</option>
-                  <option value="Bills">Bills</option>
+                  <option value="Bills & Utilities">Bills & Utilities</option>
                   <option value="Salary">Salary</option>
                   <option value="Other">Other</option>
                 </select>
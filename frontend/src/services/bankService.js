@@ -23,6 +23,11 @@ export const bankService = {
     return response.data;
   },
 
+  getJob: async (jobId) => {
+    const response = await api.get(`/banks/jobs/${jobId}`);
+    return response.data;
+  },
+
   getStatements: async () => {
     const response = await api.get('/banks/statements');
     return response.data;